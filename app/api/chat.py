@@ -1,4 +1,5 @@
 from fastapi import APIRouter, HTTPException, Request
+import asyncio
 from app.models.schemas import ChatRequest, UnifiedResponse, ExecutionPlan, SubTask
 from app.services.planner import PlannerService
 from app.services.fetcher import FetcherService
@@ -71,22 +72,26 @@ async def chat(request: Request, body: ChatRequest):
             assets = intent_data.get("assets", [])
             comparison_results = []
             
-            # Fetch data for each asset
-            for asset_name in assets:
-                # Resolve ID
-                coin_id = await market_service.search_coin(asset_name)
-                if coin_id:
-                    chart = await market_service.get_market_chart(coin_id, days="30")
-                    kpi = await market_service.get_coin_data(coin_id)
-                    
-                    if chart and kpi:
-                        comparison_results.append({
-                            "symbol": kpi.get("symbol", asset_name).upper(),
-                            "name": kpi.get("name", asset_name),
-                            "chart_data": chart,
-                            "current_price": kpi.get("current_price_usd"),
-                            "market_cap": kpi.get("market_cap_usd")
-                        })
+            # Resolve every asset concurrently, then batch the KPI and chart reads
+            assets = assets[:settings.COMPARISON_MAX_SYMBOLS]
+            coin_ids = await asyncio.gather(*(market_service.search_coin(asset_name) for asset_name in assets))
+            resolved = [(asset_name, coin_id) for asset_name, coin_id in zip(assets, coin_ids) if coin_id]
+            coin_ids = [coin_id for _, coin_id in resolved]
+            kpis = await market_service.get_coin_data_many(coin_ids)
+            charts = await market_service.get_market_charts(coin_ids, days="30")
+            
+            for asset_name, coin_id in resolved:
+                chart = charts.get(coin_id)
+                kpi = kpis.get(coin_id)
+                
+                if chart and kpi and "error" not in kpi:
+                    comparison_results.append({
+                        "symbol": kpi.get("symbol", asset_name).upper(),
+                        "name": kpi.get("name", asset_name),
+                        "chart_data": chart,
+                        "current_price": kpi.get("current_price_usd"),
+                        "market_cap": kpi.get("market_cap_usd")
+                    })
             
             response = UnifiedResponse(
                 query=query,
@@ -1,25 +1,52 @@
 from fastapi import APIRouter, HTTPException, Query, Request, BackgroundTasks, WebSocket, WebSocketDisconnect
 from app.services.market import MarketService
+from app.services.price_hub import price_hub, binary_frames_available, encode_frame, decode_frame
+from app.core.config import get_settings
+from app.utils.logger import logger
 from typing import Optional, List
 from app.services.rate_limiter import limiter
 import asyncio
+import json
 
+settings = get_settings()
 router = APIRouter()
 market_service = MarketService()
 
+@router.get("/market/batch")
+@limiter.limit("30/minute")
+async def get_market_batch(
+    request: Request,
+    ids: str = Query(..., description="Comma separated coin ids or symbols (max 50)"),
+    days: Optional[str] = Query("1", description="Chart range in days (1, 7, 30, 90, 365, max)"),
+    fields: str = Query("kpi", description="Comma separated subset of: kpi, chart, score"),
+    axis: str = Query("labels", pattern="^(labels|epoch)$")
+):
+    """
+    Market data for many assets in one call (portfolio, watchlist).
+    Counts as a single rate-limit unit however many ids are requested.
+    """
+    id_list = [i.strip().lower() for i in ids.split(",") if i.strip()]
+    if not id_list:
+        raise HTTPException(status_code=400, detail="No ids provided")
+    if len(id_list) > 50:
+        raise HTTPException(status_code=400, detail="At most 50 ids per request")
+    field_list = [f.strip() for f in fields.split(",") if f.strip()]
+    return await market_service.get_market_batch(id_list, days, field_list, axis=axis)
+
 @router.get("/market/{coin_id}")
 @limiter.limit("40/minute") # Increased for better DX
 async def get_market_data(
     request: Request,
     coin_id: str, 
     background_tasks: BackgroundTasks,
-    days: Optional[str] = Query("30", description="Number of days for historical data (1, 7, 30, 90, 365, max)")
+    days: Optional[str] = Query("30", description="Number of days for historical data (1, 7, 30, 90, 365, max)"),
+    axis: str = Query("labels", pattern="^(labels|epoch)$", description="'labels' adds formatted date labels; 'epoch' sends epoch-ms timestamps only")
 ):
     """
     Get market data, historical chart, and AI score for a specific coin.
     """
     # Unified fetch with Stale-While-Revalidate support
-    data = await market_service.get_market_data(coin_id, days, background_tasks=background_tasks)
+    data = await market_service.get_market_data(coin_id, days, background_tasks=background_tasks, axis=axis)
     
     kpi_data = data.get("kpi")
     chart_data = data.get("chart")
@@ -63,20 +90,53 @@ async def compare_markets(
     """
     Get normalized comparison data for multiple assets.
     """
-    symbol_list = [s.strip() for s in symbols.split(",")]
-    return await market_service.get_comparison_data(symbol_list, range, background_tasks)
+    symbol_list = [s.strip() for s in symbols.split(",") if s.strip()]
+    try:
+        return await market_service.get_comparison_data(symbol_list, range, background_tasks)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/heatmap")
 @limiter.limit("30/minute") # Increased for better DX
 async def market_heatmap(
     request: Request,
-    limit: int = Query(10, le=50),
+    limit: int = Query(10, ge=1, le=500),
+    sort: str = Query("market_cap", pattern="^(market_cap|gainers|losers|volume)$"),
+    min_volume: Optional[float] = Query(None, ge=0, description="Minimum 24h volume (USD)"),
+    min_market_cap: Optional[float] = Query(None, ge=0, description="Minimum market cap (USD)"),
     background_tasks: BackgroundTasks = None
 ):
     """
     Get top coins heatmap data.
+    Any size, sort and filter is sliced from one cached top-coins universe.
+    """
+    return await market_service.get_market_heatmap(limit, background_tasks, sort=sort, min_volume=min_volume, min_market_cap=min_market_cap)
+
+@router.get("/screener")
+@limiter.limit("30/minute")
+async def market_screener(
+    request: Request,
+    days: str = "30",
+    limit: int = Query(50, ge=1, le=500),
+    sort: str = Query("score", pattern="^(score|rsi|volatility|change_24h|market_cap)$"),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    min_score: Optional[int] = Query(None, ge=0, le=100),
+    max_score: Optional[int] = Query(None, ge=0, le=100),
+    min_rsi: Optional[float] = Query(None, ge=0, le=100),
+    max_rsi: Optional[float] = Query(None, ge=0, le=100),
+    trend: Optional[str] = Query(None, pattern="^(Bullish|Bearish|Neutral)$", description="MACD state"),
+    min_volume: Optional[float] = Query(None, ge=0, description="Minimum 24h volume (USD)"),
+    background_tasks: BackgroundTasks = None
+):
     """
-    return await market_service.get_market_heatmap(limit, background_tasks)
+    Rank the top-coins universe by Market Health, RSI, MACD state or volatility,
+    e.g. ?max_rsi=30&min_score=60. Computed in bulk from cached charts only;
+    `coverage` is the share of the universe that had one.
+    """
+    return await market_service.get_screener(
+        days, limit, sort, ascending=order == "asc", min_score=min_score, max_score=max_score,
+        min_rsi=min_rsi, max_rsi=max_rsi, trend=trend, min_volume=min_volume, background_tasks=background_tasks
+    )
 
 @router.get("/explain")
 @limiter.limit("5/minute")
@@ -90,29 +150,130 @@ async def explain_chart(
     Get AI-generated explanation for chart movement.
     """
     return await market_service.get_chart_explanation(symbol, days, background_tasks)
+
+@router.websocket("/ws")
+async def websocket_multiplexed_stream(
+    websocket: WebSocket,
+    format: str = Query("json", pattern="^(json|msgpack)$", description="'msgpack' sends binary frames (if installed on the server)"),
+    max_rate: Optional[float] = Query(None, gt=0, description="Max frames per second for this client (capped by the server)")
+):
+    """
+    Many symbols over one socket. Client messages (JSON text, or msgpack binary):
+      {"action": "subscribe" | "unsubscribe", "symbols": ["btc", "ethereum"]}
+      {"action": "ping"}
+    Server frames:
+      {"type": "prices", "data": {coin_id: changed fields}, "timestamp"}: every coin that moved
+        since the last frame; the first frame for a coin is complete, later ones are deltas
+      {"type": "subscribed" | "unsubscribed", "symbols": ...}, {"type": "pong"},
+      {"type": "heartbeat"} after PRICE_STREAM_HEARTBEAT idle seconds, {"type": "error", "message"}
+    JSON frames are compressed with permessage-deflate when the client offers it.
+    """
+    await websocket.accept()
+    session = price_hub.session(max_rate)
+    send_lock = asyncio.Lock()
+    binary = format == "msgpack" and binary_frames_available()
+    if format == "msgpack" and not binary:
+        await websocket.send_json({"type": "error", "message": "msgpack is not available on this server; sending JSON"})
+
+    async def send(frame):
+        async with send_lock:
+            if binary:
+                pending = websocket.send_bytes(encode_frame(frame))
+            else:
+                pending = websocket.send_json(frame)
+            await asyncio.wait_for(pending, timeout=settings.PRICE_STREAM_SEND_TIMEOUT)
+
+    async def receive():
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(message.get("code", 1000))
+        try:
+            if message.get("bytes") is not None and binary_frames_available():
+                return decode_frame(message["bytes"])
+            return json.loads(message.get("text") or "")
+        except Exception:
+            return None # Reported to the client as an unrecognised message
+
+    async def read_commands():
+        while True:
+            message = await receive()
+            action = message.get("action") if isinstance(message, dict) else None
+            symbols = message.get("symbols") if isinstance(message, dict) else None
+            if action == "ping":
+                await send({"type": "pong", "timestamp": asyncio.get_event_loop().time()})
+            elif action in ("subscribe", "unsubscribe") and isinstance(symbols, list) and all(isinstance(s, str) for s in symbols):
+                symbols = [s.strip().lower() for s in symbols if s.strip()]
+                try:
+                    if action == "subscribe":
+                        await send({"type": "subscribed", "symbols": await session.subscribe(symbols)})
+                    else:
+                        await send({"type": "unsubscribed", "symbols": await session.unsubscribe(symbols)})
+                except ValueError as e:
+                    await send({"type": "error", "message": str(e)})
+            else:
+                await send({"type": "error", "message": "Expected {action: subscribe|unsubscribe|ping, symbols: [...]}"})
+
+    async def push_updates():
+        while True:
+            try:
+                batch = await asyncio.wait_for(session.next_batch(), timeout=settings.PRICE_STREAM_HEARTBEAT)
+                frame = {"type": "prices", "data": batch}
+            except asyncio.TimeoutError:
+                frame = {"type": "heartbeat"}
+            await send({**frame, "timestamp": asyncio.get_event_loop().time()})
+
+    tasks = [asyncio.create_task(read_commands()), asyncio.create_task(push_updates())]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            error = task.exception()
+            if error and not isinstance(error, WebSocketDisconnect):
+                logger.error(f"WebSocket /ws: Stream failed: {error}")
+                try:
+                    await websocket.close()
+                except:
+                    pass
+    finally:
+        session.close()
+        for task in tasks:
+            task.cancel()
+        await asyncio.wait(tasks)
+
 @router.websocket("/ws/{symbol}")
 async def websocket_price_stream(websocket: WebSocket, symbol: str):
     await websocket.accept()
-    try:
+    # One shared poller per symbol feeds every connected client
+    subscription = await price_hub.subscribe(symbol)
+
+    async def watch_disconnect():
+        # Frames only go out when the price moves, so a departed client would
+        # otherwise hold its poller until the next failed send
         while True:
-            # Fetch latest price (relies on cache to protect API limits)
-            # In a real app, a background worker would update cache frequently.
-            data = await market_service.get_coin_data(symbol)
-            
-            if data and "current_price_usd" in data:
-                await websocket.send_json({
-                    "symbol": symbol,
-                    "price": data.get("current_price_usd"), 
-                    "change_24h": data.get("price_change_percentage_24h"),
-                    "timestamp": asyncio.get_event_loop().time()
-                })
-            
-            await asyncio.sleep(5)
-    except WebSocketDisconnect:
-        pass
-    except Exception as e:
-        print(f"WebSocket Error: {e}")
-        try:
-            await websocket.close()
-        except:
-            pass
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+
+    async def push_updates():
+        while True:
+            update = await subscription.get()
+            if update["symbol"] != symbol:
+                update = {**update, "symbol": symbol}
+            # A client that can't keep up is dropped instead of holding its socket open forever
+            await asyncio.wait_for(websocket.send_json(update), timeout=settings.PRICE_STREAM_SEND_TIMEOUT)
+
+    tasks = [asyncio.create_task(watch_disconnect()), asyncio.create_task(push_updates())]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            error = task.exception()
+            if error and not isinstance(error, WebSocketDisconnect):
+                logger.error(f"WebSocket /ws/{symbol}: Stream failed: {error}")
+                try:
+                    await websocket.close()
+                except:
+                    pass
+    finally:
+        price_hub.unsubscribe(subscription)
+        for task in tasks:
+            task.cancel()
+        await asyncio.wait(tasks)
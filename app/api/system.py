@@ -0,0 +1,74 @@
+from fastapi import APIRouter, Request
+from app.core.http_client import http_clients
+from app.services.upstream_governor import coingecko_governor
+from app.services.cache import codec_stats
+from app.services.l1_cache import l1_cache
+from app.services.coin_index import coin_index
+from app.services.price_hub import price_hub
+from app.services.hot_keys import hot_keys
+from app.core.scheduler import scheduler_status
+
+router = APIRouter()
+
+@router.get("/system/http-pool")
+async def http_pool_stats():
+    """
+    Upstream HTTP connection pool utilisation per host.
+    """
+    return http_clients.stats()
+
+@router.get("/system/upstream-budget")
+async def upstream_budget_stats():
+    """
+    CoinGecko token bucket: current tokens and per-priority wait metrics.
+    """
+    return coingecko_governor.stats()
+
+@router.get("/system/cache-codec")
+async def cache_codec_stats():
+    """
+    Cached payload size (stored vs JSON) and decode time per key namespace.
+    """
+    return codec_stats.report()
+
+@router.get("/system/cache-l1")
+async def cache_l1_stats():
+    """
+    In-process L1 cache size, evictions and hit/miss counters per key namespace.
+    """
+    return l1_cache.stats()
+
+@router.get("/system/coin-index")
+async def coin_index_stats():
+    """
+    Size and age of the local coin index used for symbol resolution.
+    """
+    return coin_index.stats()
+
+@router.get("/system/price-stream")
+async def price_stream_stats():
+    """
+    Live price pollers, connected subscribers and conflated (skipped) updates.
+    """
+    return price_hub.stats()
+
+@router.get("/system/hot-keys")
+async def hot_keys_stats():
+    """
+    Most requested assets and chart ranges (decayed requests per minute).
+    """
+    return await hot_keys.stats()
+
+@router.get("/system/scheduler")
+async def scheduler_leader_status():
+    """
+    Which instance holds the refresh lease, and the duration of the last sweep.
+    """
+    return await scheduler_status()
+
+@router.get("/system/startup")
+async def startup_timings(request: Request):
+    """
+    Cold-start breakdown in milliseconds: module imports, then each lifespan step.
+    """
+    return getattr(request.app.state, "startup_timings", {})
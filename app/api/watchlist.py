@@ -1,7 +1,7 @@
 
 from fastapi import APIRouter, HTTPException, Body
 from pydantic import BaseModel
-from typing import List
+from typing import List, Dict, Any
 from app.services.watchlist import WatchlistService
 from app.services.market import MarketService
 
@@ -16,6 +16,16 @@ class WatchlistAddRequest(BaseModel):
 async def get_watchlist():
     return await watchlist_service.get_watchlist()
 
+@router.get("/watchlist/quotes")
+async def get_watchlist_quotes() -> Dict[str, Dict[str, Any]]:
+    """
+    KPI snapshot for every watched asset, fetched in one batched call.
+    """
+    assets = await watchlist_service.get_watchlist()
+    if not assets:
+        return {}
+    return await market_service.get_coin_data_many(assets)
+
 @router.post("/watchlist", response_model=List[str])
 async def add_to_watchlist(req: WatchlistAddRequest):
     # Validate asset exists
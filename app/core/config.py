@@ -19,6 +19,64 @@ class Settings(BaseSettings):
     
     # Redis Configuration
     REDIS_URL: str = "redis://localhost:6379/0"
+    REDIS_CONNECT_TIMEOUT: float = 2.0  # Startup PING; no answer -> FakeRedis (in-memory)
+
+    # Upstream HTTP Pool Configuration (shared keep-alive clients per host)
+    HTTP2_ENABLED: bool = False  # Requires the optional `h2` package
+    HTTP_MAX_CONNECTIONS: int = 20
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    HTTP_TIMEOUT_COINGECKO: float = 10.0
+    HTTP_TIMEOUT_WIKIPEDIA: float = 5.0
+    HTTP_TIMEOUT_EXCHANGERATE: float = 5.0
+
+    # Cache Stampede Protection (single-flight across workers)
+    SINGLEFLIGHT_LOCK_TTL: int = 30  # Seconds; covers a fetch plus its retries
+    SINGLEFLIGHT_WAIT_SECONDS: float = 10.0
+
+    # CoinGecko Rate Governor (cluster-wide token bucket)
+    COINGECKO_RATE_PER_MINUTE: int = 25  # Stay under the free-tier limit
+    COINGECKO_BURST: int = 10
+
+    # Cache Payload Encoding (binary columnar codec for chart series)
+    CACHE_CODEC: str = "columnar"  # "columnar" or "json"
+    CACHE_COMPRESSION: str = "zlib"  # "zlib", "zstd" (requires `zstandard`) or "none"
+    CACHE_FLOAT_DTYPE: str = "float64"  # "float32" halves size at ~7 significant digits
+    CACHE_COLUMNAR_MIN_POINTS: int = 64  # Smaller values stay JSON
+    CACHE_STATS_SAMPLE_EVERY: int = 50  # Columnar writes per JSON size/decode reference measurement
+
+    # In-process L1 cache in front of Redis (invalidated across workers via pub/sub)
+    CACHE_L1_ENABLED: bool = True
+    CACHE_L1_MAX_BYTES: int = 32 * 1024 * 1024  # Summed encoded payload size
+    CACHE_L1_TTL: float = 5.0  # Seconds; never longer than the Redis TTL
+
+    # Multi-Asset Comparison
+    COMPARISON_MAX_SYMBOLS: int = 10
+    COMPARISON_CONCURRENCY: int = 5  # Concurrent chart fetches for cache misses
+
+    # Live Price Stream (one poller per symbol, fanned out to every socket)
+    PRICE_STREAM_INTERVAL: float = 5.0  # Seconds between polls of a symbol
+    PRICE_STREAM_QUEUE_SIZE: int = 1  # Pending updates per client; older ones are conflated
+    PRICE_STREAM_SEND_TIMEOUT: float = 10.0  # Clients slower than this are disconnected
+    PRICE_STREAM_MAX_SYMBOLS: int = 50  # Per multiplexed /ws connection
+    PRICE_STREAM_BATCH_WINDOW: float = 0.25  # Seconds to gather one tick's updates into a frame
+    PRICE_STREAM_HEARTBEAT: float = 25.0  # Idle seconds before a heartbeat frame
+    PRICE_STREAM_MAX_RATE: float = 1.0  # Max frames per second per /ws client (clients may ask for less)
+
+    # Market Universe (backs every heatmap size, sort and filter)
+    MARKET_UNIVERSE_SIZE: int = 500  # Top coins by market cap, fetched in concurrent pages of 250
+
+    # Hot-Key Tracking & Adaptive Refresh
+    HOT_KEYS_HALF_LIFE: float = 1800.0  # Seconds for a request's weight to halve
+    HOT_KEYS_FLUSH_INTERVAL: float = 5.0  # Seconds between per-worker flushes to Redis
+    SCHEDULER_TOP_K: int = 20  # Assets (and chart ranges) kept warm
+    SCHEDULER_UPSTREAM_BUDGET: int = 8  # Upstream calls per minute the refresh job may spend
+    SCHEDULER_BASE_INTERVAL: int = 300  # Seconds between refreshes of an unrequested, calm asset
+    SCHEDULER_MIN_INTERVAL: int = 60
+    SCHEDULER_MAX_INTERVAL: int = 900
+    SCHEDULER_CONCURRENCY: int = 4  # Parallel refreshes within one sweep
+    SCHEDULER_WARMUP_TIMEOUT: float = 20.0  # Seconds startup waits for the first sweep (0 disables)
+    SCHEDULER_LEADER_TTL: float = 15.0  # Seconds before a dead leader's lease lapses (renewed every ttl/3)
 
     # CORS Configuration
     CORS_ORIGINS: List[str] = [
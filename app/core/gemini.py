@@ -0,0 +1,24 @@
+from typing import Any
+from app.core.config import get_settings
+from app.utils.logger import logger
+
+settings = get_settings()
+
+_sdk = None
+
+def genai():
+    """
+    The google.generativeai module, imported and configured on first use.
+    The SDK (gRPC + protobuf) is the largest import in the app, so it stays
+    off the boot path; the lifespan preloads it in the background.
+    """
+    global _sdk
+    if _sdk is None:
+        import google.generativeai as sdk
+        sdk.configure(api_key=settings.GEMINI_API_KEY)
+        _sdk = sdk
+        logger.info("Gemini: SDK loaded")
+    return _sdk
+
+def generative_model(**kwargs) -> Any:
+    return genai().GenerativeModel(model_name=settings.GEMINI_MODEL, **kwargs)
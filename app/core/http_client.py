@@ -0,0 +1,127 @@
+import httpx
+from typing import Dict, Any
+from app.core.config import get_settings
+from app.utils.logger import logger
+
+settings = get_settings()
+
+# Upstream hosts we keep a pooled client for, with their default timeouts.
+UPSTREAMS: Dict[str, float] = {
+    "coingecko": settings.HTTP_TIMEOUT_COINGECKO,
+    "wikipedia": settings.HTTP_TIMEOUT_WIKIPEDIA,
+    "exchangerate": settings.HTTP_TIMEOUT_EXCHANGERATE,
+}
+
+class CountingTransport(httpx.AsyncBaseTransport):
+    """
+    Wraps the pooled transport to count requests per upstream host: total,
+    failed, in flight (waiting on the pool or the response headers) and the
+    peak in flight, which is what approaches `max_connections` under load.
+    """
+    def __init__(self, transport: httpx.AsyncBaseTransport, counters: Dict[str, int]):
+        self.transport = transport
+        self.counters = counters
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        counters = self.counters
+        counters["requests_total"] += 1
+        counters["in_flight"] += 1
+        counters["peak_in_flight"] = max(counters["peak_in_flight"], counters["in_flight"])
+        try:
+            return await self.transport.handle_async_request(request)
+        except Exception:
+            counters["errors"] += 1
+            raise
+        finally:
+            counters["in_flight"] -= 1
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+class HTTPClientManager:
+    """
+    Owns one pooled, keep-alive httpx.AsyncClient per upstream host.
+    Clients are created on app startup and closed on shutdown, so every
+    cache miss reuses warm TCP/TLS connections instead of re-handshaking.
+    """
+    def __init__(self):
+        self.clients: Dict[str, httpx.AsyncClient] = {}
+        # Kept across client rebuilds so totals cover the process lifetime
+        self.counters: Dict[str, Dict[str, int]] = {}
+        self._ssl_context = None
+
+    def _http2_available(self) -> bool:
+        if not settings.HTTP2_ENABLED:
+            return False
+        try:
+            import h2  # noqa: F401
+            return True
+        except ImportError:
+            logger.warning("HTTP/2 requested but the `h2` package is not installed. Using HTTP/1.1.")
+            return False
+
+    def _verify(self):
+        # One SSL context (CA bundle load) shared by every client, instead of one each
+        if self._ssl_context is None:
+            self._ssl_context = httpx.create_ssl_context()
+        return self._ssl_context
+
+    def _counters(self, name: str) -> Dict[str, int]:
+        if name not in self.counters:
+            self.counters[name] = {"requests_total": 0, "errors": 0, "in_flight": 0, "peak_in_flight": 0}
+        return self.counters[name]
+
+    def _build(self, name: str) -> httpx.AsyncClient:
+        transport = httpx.AsyncHTTPTransport(
+            verify=self._verify(),
+            http2=self._http2_available(),
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY
+            )
+        )
+        return httpx.AsyncClient(
+            timeout=UPSTREAMS.get(name, 10.0),
+            transport=CountingTransport(transport, self._counters(name))
+        )
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        """
+        Returns the shared client for an upstream host.
+        Lazily (re)creates it so scripts that never run the app lifespan still work.
+        """
+        client = self.clients.get(name)
+        if client is None or client.is_closed:
+            client = self._build(name)
+            self.clients[name] = client
+        return client
+
+    async def startup(self):
+        for name in UPSTREAMS:
+            self.get(name)
+        logger.info(f"HTTP Pool: Initialized clients for {', '.join(UPSTREAMS)}")
+
+    async def close(self):
+        for name, client in self.clients.items():
+            if not client.is_closed:
+                await client.aclose()
+        self.clients.clear()
+        logger.info("HTTP Pool: Clients Closed")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Pool utilisation per upstream host, from the counting transport.
+        """
+        return {
+            name: {
+                "max_connections": settings.HTTP_MAX_CONNECTIONS,
+                "timeout": client.timeout.read,
+                "closed": client.is_closed,
+                **self._counters(name)
+            }
+            for name, client in self.clients.items()
+        }
+
+# Create a global instance
+http_clients = HTTPClientManager()
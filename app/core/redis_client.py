@@ -1,4 +1,6 @@
-
+import asyncio
+import socket
+from urllib.parse import urlparse
 import redis.asyncio as redis
 from app.core.config import get_settings
 from app.utils.logger import logger
@@ -9,44 +11,107 @@ class RedisManager:
     """
     Manages the Redis connection lifecycle.
     Using a class allows us to easily close the connection on app shutdown.
+    Nothing touches the network at import: the app lifespan calls connect(),
+    which PINGs REDIS_URL and falls back to FakeRedis (in-memory) if nobody
+    answers. Scripts and tests that never run the lifespan get the same choice
+    on first use, via a short blocking port probe.
     """
     def __init__(self):
         self.client: redis.Redis = None
+        # Same connection target without response decoding, for binary cache payloads
+        self.raw_client: redis.Redis = None
+        self.ready = False
+        self.fake = False
+
+    def _build(self):
+        options = dict(socket_timeout=5.0, socket_connect_timeout=5.0, retry_on_timeout=True, health_check_interval=30)
+        self.client = redis.from_url(settings.REDIS_URL, decode_responses=True, encoding="utf-8", **options)
+        self.raw_client = redis.from_url(settings.REDIS_URL, decode_responses=False, **options)
+
+    def _build_fake(self):
+        from fakeredis import FakeAsyncRedis, FakeServer
+        server = FakeServer()
+        self.client = FakeAsyncRedis(server=server, decode_responses=True)
+        self.raw_client = FakeAsyncRedis(server=server)
+        self.fake = True
 
     def initialize(self):
-        import socket
+        """
+        Synchronous fallback for code running outside the app lifespan.
+        """
+        if self.ready:
+            return
+        url = urlparse(settings.REDIS_URL)
         try:
             # Simple check if Redis port is open
             with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
                 s.settimeout(1)
-                s.connect(("localhost", 6379))
-                
-            self.client = redis.from_url(
-                settings.REDIS_URL, 
-                decode_responses=True,
-                encoding="utf-8",
-                socket_timeout=5.0,
-                socket_connect_timeout=5.0,
-                retry_on_timeout=True,
-                health_check_interval=30
-            )
+                s.connect((url.hostname or "localhost", url.port or 6379))
+            self._build()
             logger.info(f"Redis Client initialized for {settings.REDIS_URL}")
         except (socket.error, ConnectionRefusedError):
-            logger.warning("Redis Server not found on localhost:6379. Falling back to FakeRedis (In-Memory).")
-            from fakeredis import FakeAsyncRedis
-            self.client = FakeAsyncRedis(decode_responses=True)
+            logger.warning(f"Redis Server not found at {settings.REDIS_URL}. Falling back to FakeRedis (In-Memory).")
+            self._build_fake()
         except Exception as e:
             logger.error(f"Failed to initialize Redis Client: {e}")
             self.client = None
+            self.raw_client = None
+        self.ready = True
+
+    async def connect(self):
+        """
+        Async initialisation for the app lifespan, bounded by REDIS_CONNECT_TIMEOUT.
+        """
+        if self.ready:
+            return
+        try:
+            self._build()
+            await asyncio.wait_for(self.client.ping(), timeout=settings.REDIS_CONNECT_TIMEOUT)
+            logger.info(f"Redis Client connected to {settings.REDIS_URL}")
+        except Exception as e:
+            logger.warning(f"Redis Server not reachable at {settings.REDIS_URL} ({e or type(e).__name__}). Falling back to FakeRedis (In-Memory).")
+            for client in (self.client, self.raw_client):
+                try:
+                    await client.close()
+                except Exception:
+                    pass
+            self._build_fake()
+        self.ready = True
+
+    def get(self, raw: bool = False) -> redis.Redis:
+        if not self.ready:
+            self.initialize()
+        return (self.raw_client or self.client) if raw else self.client
 
     async def close(self):
+        if self.raw_client:
+            await self.raw_client.close()
         if self.client:
             await self.client.close()
             logger.info("Redis Connection Closed")
 
+class LazyRedis:
+    """
+    Stand-in for the shared client that modules import at load time.
+    Attribute access is forwarded to the manager's client, initialising it on
+    first use; it is falsy when Redis is unavailable, like a missing client.
+    """
+    def __init__(self, manager: RedisManager, raw: bool = False):
+        self._manager = manager
+        self._raw = raw
+
+    def __getattr__(self, name):
+        client = self._manager.get(self._raw)
+        if client is None:
+            raise AttributeError(f"Redis is unavailable ({name})")
+        return getattr(client, name)
+
+    def __bool__(self) -> bool:
+        return self._manager.get(self._raw) is not None
+
 # Create a global instance
 redis_manager = RedisManager()
-redis_manager.initialize()
 
 # Export the client directly for easy valid usage
-redis_client = redis_manager.client
+redis_client = LazyRedis(redis_manager)
+redis_raw_client = LazyRedis(redis_manager, raw=True)
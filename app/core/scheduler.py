@@ -1,54 +1,261 @@
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from app.core.config import get_settings
 from app.services.market import MarketService
+from app.services.hot_keys import hot_keys
+from app.services.cache import CacheService
+from app.services.coin_index import coin_index
+from app.services.leader_election import LeaderElection
+from app.services.upstream_governor import priority_scope, Priority
 from app.utils.logger import logger
+from typing import Dict, Any, Optional
 import asyncio
+import math
+import time
+from datetime import datetime
+
+settings = get_settings()
 
 # Create the scheduler instance
 scheduler = AsyncIOScheduler()
 
-# Define popular assets to refresh
-# Including top 10+ popular coins to ensure instant load times for most users
+# Exactly one instance in the cluster runs the refresh jobs
+scheduler_leader = LeaderElection("scheduler:leader", ttl=settings.SCHEDULER_LEADER_TTL)
+LAST_SWEEP_KEY = "scheduler:last_sweep"
+_sweep_lock = asyncio.Lock()
+_warmup_tasks: set = set() # Strong refs to a warm-up that outlived its timeout
+
+# Seed assets, kept warm while the hot-key tracker has too little traffic to fill the top K
+# (e.g. right after a deploy). Real demand always ranks ahead of them.
 POPULAR_ASSETS = [
     "bitcoin", "ethereum", "solana", "ripple", 
     "cardano", "dogecoin", "polkadot", "chainlink", 
     "avalanche-2", "shiba-inu", "pepe", "arbitrum", "optimism"
 ]
+DEFAULT_CHART_RANGE = "30"
+HEATMAP_INTERVAL = 300
+REFRESH_TICK_SECONDS = 60 # The budget is spent per tick
 
-async def refresh_market_data():
+# When this process last refreshed each target ("kpi:{id}", "chart:{id}:{days}", "heatmap")
+_last_refresh: Dict[str, float] = {}
+
+def refresh_interval(rate_per_minute: float, change_24h: Optional[float]) -> float:
     """
-    Background task to refresh market data for popular assets.
-    Forces a cache update to ensure fresh data in Redis.
+    Seconds between refreshes of one asset or chart: shorter the more often
+    users ask for it and the more its price is moving, within
+    [SCHEDULER_MIN_INTERVAL, SCHEDULER_MAX_INTERVAL].
     """
-    service = MarketService()
-    logger.info("Scheduler: Starting periodic market data refresh...")
-    
+    demand = 1 + math.log2(1 + max(rate_per_minute, 0.0))  # 0/min -> 1, 1/min -> 2, 7/min -> 4
+    volatility = 1 + min(abs(change_24h or 0.0), 20.0) / 5  # 0% -> 1, 5% -> 2, 20%+ -> 5
+    interval = settings.SCHEDULER_BASE_INTERVAL / (demand * volatility)
+    return max(settings.SCHEDULER_MIN_INTERVAL, min(settings.SCHEDULER_MAX_INTERVAL, interval))
+
+async def plan_refresh(service: MarketService, now: float) -> Dict[str, Any]:
+    """
+    Picks what this tick refreshes: the top-K requested assets and chart ranges
+    (seeded with POPULAR_ASSETS), those whose adaptive interval has elapsed,
+    most overdue first, within SCHEDULER_UPSTREAM_BUDGET upstream calls.
+    """
+    k = settings.SCHEDULER_TOP_K
+    asset_rates = dict(await hot_keys.top("assets", k))
+    chart_rates = dict(await hot_keys.top("charts", k))
     for asset in POPULAR_ASSETS:
+        if len(asset_rates) >= k:
+            break
+        asset_rates.setdefault(asset, 0.0)
+    for asset in POPULAR_ASSETS:
+        if len(chart_rates) >= k:
+            break
+        chart_rates.setdefault(f"{asset}:{DEFAULT_CHART_RANGE}", 0.0)
+
+    charts = {tuple(member.rsplit(":", 1)): rate for member, rate in chart_rates.items()}
+    assets = set(asset_rates) | {asset for asset, _ in charts}
+    kpis = await service.cache.get_many([f"market:kpi:{asset}" for asset in assets])
+    change = {asset: (kpis.get(f"market:kpi:{asset}") or {}).get("price_change_percentage_24h") for asset in assets}
+
+    def overdue(target: str, rate: float, asset: str) -> float:
+        elapsed = now - _last_refresh.get(target, 0.0)
+        return elapsed / refresh_interval(rate, change.get(asset))
+
+    due_kpis = [a for a, rate in asset_rates.items() if overdue(f"kpi:{a}", rate, a) >= 1]
+    due_charts = sorted(
+        ((overdue(f"chart:{a}:{d}", rate, a), rate, a, d) for (a, d), rate in charts.items()),
+        reverse=True
+    )
+    budget = settings.SCHEDULER_UPSTREAM_BUDGET
+    refresh_heatmap = now - _last_refresh.get("heatmap", 0.0) >= HEATMAP_INTERVAL
+    universe_pages = math.ceil(settings.MARKET_UNIVERSE_SIZE / MarketService.MARKETS_BATCH_SIZE)
+    budget -= math.ceil(len(due_kpis) / MarketService.MARKETS_BATCH_SIZE) + universe_pages * int(refresh_heatmap)
+    return {
+        "kpis": due_kpis,
+        "charts": [(a, d) for ratio, _, a, d in due_charts if ratio >= 1][:max(budget, 0)],
+        "heatmap": refresh_heatmap,
+        "intervals": {a: round(refresh_interval(rate, change.get(a))) for a, rate in asset_rates.items()}
+    }
+
+async def refresh_market_data():
+    """
+    Background task that keeps the most requested assets warm in Redis.
+    Runs every minute; each asset and chart range is refreshed on its own
+    adaptive interval (see refresh_interval) within the upstream budget.
+    Only the elected leader sweeps; followers serve what it warmed.
+    Runs at scheduler priority, so the upstream governor paces it behind user traffic.
+    """
+    if not scheduler_leader.is_leader:
+        return
+    # The startup warm-up and the interval job share this lock: a sweep never overlaps another
+    if _sweep_lock.locked():
+        logger.info("Scheduler: Previous sweep still running; skipping this tick.")
+        return
+    async with _sweep_lock:
+        started = time.time()
+        with priority_scope(Priority.SCHEDULER):
+            plan = await _refresh_hot_assets()
+        await CacheService().set(LAST_SWEEP_KEY, {
+            "instance": scheduler_leader.instance_id,
+            "started_at": started,
+            "duration_ms": round((time.time() - started) * 1000, 1),
+            "kpis": len(plan["kpis"]),
+            "charts": len(plan["charts"]),
+            "heatmap": plan["heatmap"],
+            "latency_ms": plan.get("latency_ms", {})
+        }, ttl=86400)
+
+async def scheduler_status() -> Dict[str, Any]:
+    """
+    Current leader, this instance's role and the last sweep (run by whichever instance led).
+    """
+    return {
+        **await scheduler_leader.status(),
+        "running": scheduler.running,
+        "last_sweep": await CacheService().get(LAST_SWEEP_KEY)
+    }
+
+async def refresh_coin_index():
+    """
+    Daily rebuild of the local coin index used for symbol/name resolution.
+    Skips the upstream calls while the persisted index is less than a day old.
+    Followers only load the index the leader persisted.
+    """
+    if not scheduler_leader.is_leader:
+        await coin_index.ensure_loaded()
+        return
+    with priority_scope(Priority.SCHEDULER):
+        try:
+            count = await MarketService().refresh_coin_index()
+            logger.info(f"Scheduler: Coin index ready ({count} coins)")
+        except Exception as e:
+            logger.error(f"Scheduler: Coin index refresh failed: {e}")
+
+async def _timed(latency: Dict[str, float], target: str, semaphore: asyncio.Semaphore, func) -> bool:
+    async with semaphore:
+        started = time.perf_counter()
         try:
-            # Force refresh both KPI and Chart data
-            # This calls get_coin_data and get_market_chart(days=30) internally with force_refresh=True
-            await service.get_market_data(asset, days="30", force_refresh=True)
-            logger.info(f"Scheduler: Refreshed cache for {asset}")
-            
-            # Add a small delay between requests to avoid burst rate limits
-            await asyncio.sleep(2) 
-            
+            await func()
+            return True
         except Exception as e:
-            logger.error(f"Scheduler: Refresh failed for {asset}: {e}")
+            logger.error(f"Scheduler: Refresh failed for {target}: {e}")
+            return False
+        finally:
+            latency[target] = round((time.perf_counter() - started) * 1000, 1)
+
+async def _refresh_hot_assets() -> Dict[str, Any]:
+    service = MarketService()
+    now = time.time()
+    plan = await plan_refresh(service, now)
+    plan["latency_ms"] = {}
+    if not plan["kpis"] and not plan["charts"] and not plan["heatmap"]:
+        return plan
+    logger.info(f"Scheduler: Refreshing {len(plan['kpis'])} KPIs, {len(plan['charts'])} charts (intervals: {plan['intervals']})")
+
+    # Every target runs concurrently, at most SCHEDULER_CONCURRENCY at a time.
+    # Upstream calls still draw from the shared governor budget.
+    semaphore = asyncio.Semaphore(settings.SCHEDULER_CONCURRENCY)
+    latency = plan["latency_ms"]
+    jobs, targets = [], []
+
+    # KPIs for every due asset in a single batched upstream call
+    if plan["kpis"]:
+        async def refresh_kpis():
+            kpis = await service.get_coin_data_many(plan["kpis"], force_refresh=True)
+            refreshed = [asset for asset, kpi in kpis.items() if "error" not in kpi]
+            for asset in refreshed:
+                _last_refresh[f"kpi:{asset}"] = now
+            logger.info(f"Scheduler: Refreshed KPI cache for {len(refreshed)}/{len(plan['kpis'])} assets")
+        jobs.append(_timed(latency, "kpis", semaphore, refresh_kpis))
+        targets.append(None)
+
+    # Charts have no batch endpoint upstream, so they are refreshed per asset
+    for asset, days in plan["charts"]:
+        target = f"chart:{asset}:{days}"
+        jobs.append(_timed(latency, target, semaphore, lambda asset=asset, days=days: service.get_market_chart(asset, days=days, force_refresh=True, axis="epoch")))
+        targets.append(target)
 
-    logger.info("Scheduler: Market data refresh complete.")
+    # Keep the market universe behind every heatmap (and get_market_data's score) warm
+    if plan["heatmap"]:
+        jobs.append(_timed(latency, "heatmap", semaphore, lambda: service.get_market_universe(force_refresh=True)))
+        targets.append("heatmap")
 
-def start_scheduler():
+    for target, ok in zip(targets, await asyncio.gather(*jobs)):
+        if target and ok:
+            _last_refresh[target] = now
+
+    slowest = max(latency, key=latency.get)
+    logger.info(f"Scheduler: Market data refresh complete ({len(latency)} targets, slowest {slowest} {latency[slowest]}ms).")
+    return plan
+
+async def warm_up():
+    """
+    First sweep, run before startup completes so the cache is warm when the app
+    reports ready. Bounded by SCHEDULER_WARMUP_TIMEOUT; a slower sweep keeps
+    running in the background (and the first interval tick skips while it does).
+    """
+    if not scheduler_leader.is_leader or settings.SCHEDULER_WARMUP_TIMEOUT <= 0:
+        return
+    started = time.perf_counter()
+    task = asyncio.create_task(refresh_market_data())
+    _warmup_tasks.add(task)
+    task.add_done_callback(_warmup_tasks.discard)
+    try:
+        await asyncio.wait_for(asyncio.shield(task), timeout=settings.SCHEDULER_WARMUP_TIMEOUT)
+        logger.info(f"Scheduler: Warm-up sweep finished in {time.perf_counter() - started:.1f}s")
+    except asyncio.TimeoutError:
+        logger.warning(f"Scheduler: Warm-up still running after {settings.SCHEDULER_WARMUP_TIMEOUT}s; continuing in the background")
+    except Exception as e:
+        logger.error(f"Scheduler: Warm-up sweep failed: {e}")
+
+async def start_scheduler():
     """
-    Starts the AsyncIOScheduler with a 5-minute interval job.
+    Joins the leader election, then starts the AsyncIOScheduler: a 1-minute
+    adaptive refresh tick and the daily coin index job. Every instance runs the
+    scheduler so a follower can take over at once; the jobs check leadership.
     """
+    await scheduler_leader.start()
+    await warm_up()
     if not scheduler.running:
         scheduler.add_job(
             refresh_market_data,
             "interval",
-            minutes=5,
-            jitter=30, # Add randomness to prevent synchronized spikes if multiple instances run
+            seconds=REFRESH_TICK_SECONDS,
+            jitter=10,
+            max_instances=1, # Never start a tick while the previous one runs
+            coalesce=True, # Missed ticks collapse into one
             id="market_refresh",
             replace_existing=True
         )
+        scheduler.add_job(
+            refresh_coin_index,
+            "interval",
+            hours=24,
+            next_run_time=datetime.now(), # Load (or build) the index at startup
+            id="coin_index_refresh",
+            replace_existing=True
+        )
         scheduler.start()
-        logger.info("Background Scheduler Started (Interval: 5m).")
+        role = "leader" if scheduler_leader.is_leader else "follower"
+        logger.info(f"Background Scheduler Started as {role} (Market: adaptive, 1m tick; Coin index: 24h).")
+
+async def stop_scheduler():
+    if scheduler.running:
+        scheduler.shutdown()
+    # Hand the lease back so a follower takes over without waiting for it to expire
+    await scheduler_leader.stop()
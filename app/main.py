@@ -1,3 +1,8 @@
+import time
+_import_started = time.perf_counter()
+
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from slowapi import _rate_limit_exceeded_handler
@@ -7,12 +12,53 @@ import os
 from app.api.chat import router as chat_router
 from app.api.market import router as market_router
 from app.api.watchlist import router as watchlist_router
+from app.api.system import router as system_router
 from app.core.config import get_settings
 from app.utils.logger import logger
 from app.services.rate_limiter import limiter
-from app.core.scheduler import start_scheduler, scheduler
+from app.core.scheduler import start_scheduler, stop_scheduler
+from app.core.http_client import http_clients
+from app.core.redis_client import redis_manager
+from app.core import gemini
+from app.services.l1_cache import l1_cache
+from app.services.price_hub import price_hub
 
 settings = get_settings()
+IMPORT_MS = (time.perf_counter() - _import_started) * 1000
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    logger.info("Starting up application...")
+    timings = {"imports": IMPORT_MS}
+    started = time.perf_counter()
+
+    async def step(name, coro):
+        step_started = time.perf_counter()
+        await coro
+        timings[name] = (time.perf_counter() - step_started) * 1000
+
+    await step("redis", redis_manager.connect())
+    await step("http_clients", http_clients.startup())
+    if settings.CACHE_L1_ENABLED:
+        l1_cache.start_listener(redis_manager.client)
+    await step("scheduler", start_scheduler())
+    # Not awaited: the first chat request finds the SDK loaded, readiness does not wait for it
+    gemini_preload = asyncio.create_task(asyncio.to_thread(gemini.genai))
+
+    timings["total"] = (time.perf_counter() - started) * 1000
+    app.state.startup_timings = {name: round(ms, 1) for name, ms in timings.items()}
+    logger.info("Startup breakdown: " + ", ".join(f"{name} {ms:.0f}ms" for name, ms in timings.items()))
+
+    yield
+
+    logger.info("Shutting down application...")
+    await stop_scheduler()
+    await price_hub.stop()
+    await http_clients.close()
+    await l1_cache.stop_listener()
+    await redis_manager.close()
+    if not gemini_preload.done():
+        gemini_preload.cancel() # The import thread itself runs to completion
 
 app = FastAPI(
     title=settings.APP_NAME,
@@ -20,7 +66,8 @@ app = FastAPI(
     description="InsightAI Production Backend",
     docs_url="/docs",
     redoc_url="/redoc",
-    openapi_url="/openapi.json"
+    openapi_url="/openapi.json",
+    lifespan=lifespan
 )
 
 # Initialize Limiter
@@ -48,19 +95,7 @@ app.add_middleware(
 app.include_router(chat_router, prefix=settings.API_PREFIX)
 app.include_router(market_router, prefix=settings.API_PREFIX)
 app.include_router(watchlist_router, prefix=settings.API_PREFIX)
-
-@app.on_event("startup")
-async def startup_event():
-    logger.info("Starting up application...")
-    start_scheduler()
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    logger.info("Shutting down application...")
-    if scheduler.running:
-        scheduler.shutdown()
-    from app.core.redis_client import redis_manager
-    await redis_manager.close()
+app.include_router(system_router, prefix=settings.API_PREFIX)
 
 @app.get("/")
 def health_check():
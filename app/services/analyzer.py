@@ -1,4 +1,3 @@
-import pandas as pd
 from typing import List, Dict, Any
 from app.models.schemas import FetchedData
 from app.utils.logger import logger
@@ -29,25 +28,23 @@ class AnalyzerService:
             # Numeric Analysis
             elif source in ["crypto", "stock_mock"]:
                 try:
-                    df = pd.DataFrame([data])
-                    
                     # Store key stats
-                    if "current_price_usd" in df.columns:
-                        price = df.iloc[0]["current_price_usd"]
-                        name = df.iloc[0].get("name", "Crypto")
+                    if "current_price_usd" in data:
+                        price = data["current_price_usd"]
+                        name = data.get("name", "Crypto")
                         stats[f"{name} Price"] = price
                         
                         # Trend
-                        change = df.iloc[0].get("price_change_percentage_24h", 0)
+                        change = data.get("price_change_percentage_24h") or 0
                         trend = "UP" if change > 0 else "DOWN"
                         summary_text.append(f"{name} is {trend} by {change:.2f}% in 24h.")
 
-                    if "price" in df.columns:
-                        ticker = df.iloc[0].get("ticker", "Stock")
-                        price = df.iloc[0]["price"]
+                    if "price" in data:
+                        ticker = data.get("ticker", "Stock")
+                        price = data["price"]
                         stats[f"{ticker} Price"] = price
                 except Exception as e:
-                    logger.error(f"Pandas Error: {e}")
+                    logger.error(f"Analyzer Error: {e}")
 
             elif source == "social_sentiment":
                 score = data.get("score", 0.5)
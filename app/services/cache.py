@@ -1,46 +1,337 @@
 
-from typing import Optional, Any
-from app.core.redis_client import redis_client
+from typing import Optional, Any, Dict, List
+from app.core.config import get_settings
+from app.core.redis_client import redis_client, redis_raw_client
+from redis.exceptions import WatchError
+from app.services.cache_codec import ColumnarCodec
+from app.services.l1_cache import l1_cache, INVALIDATION_CHANNEL
 from app.utils.logger import logger
 import json
+import math
+import time
+import uuid
+
+settings = get_settings()
+
+# Marks a JSON payload wrapped with freshness metadata
+ENVELOPE_KEY = "__envelope__"
+
+class CacheCodecStats:
+    """
+    Per-namespace payload sizes and decode times (namespace = first two key segments).
+    For columnar writes the JSON size and a JSON decode of the same value are
+    measured on a sample (the first write per namespace, then 1 in `sample_every`),
+    so savings can be compared on real data without serialising every write twice.
+    """
+    def __init__(self, sample_every: int = settings.CACHE_STATS_SAMPLE_EVERY):
+        self.sample_every = max(1, sample_every)
+        self.namespaces: Dict[str, Dict[str, float]] = {}
+
+    def _ns(self, key: str) -> Dict[str, float]:
+        name = ":".join(key.split(":")[:2])
+        if name not in self.namespaces:
+            self.namespaces[name] = {
+                "writes": 0, "columnar_writes": 0, "stored_bytes": 0,
+                "sampled_stored_bytes": 0, "sampled_json_bytes": 0,
+                "reads": 0, "decode_ms_total": 0.0,
+                "json_reference_reads": 0, "json_reference_ms_total": 0.0
+            }
+        return self.namespaces[name]
+
+    def should_sample(self, key: str) -> bool:
+        """
+        True when the next columnar write under this key's namespace should be
+        measured against JSON.
+        """
+        return self._ns(key)["columnar_writes"] % self.sample_every == 0
+
+    def record_write(self, key: str, stored_bytes: int, json_bytes: int = None, columnar: bool = False, json_decode_ms: float = None):
+        ns = self._ns(key)
+        ns["writes"] += 1
+        ns["stored_bytes"] += stored_bytes
+        if json_bytes is not None:
+            ns["sampled_stored_bytes"] += stored_bytes
+            ns["sampled_json_bytes"] += json_bytes
+        if columnar:
+            ns["columnar_writes"] += 1
+        if json_decode_ms is not None:
+            ns["json_reference_reads"] += 1
+            ns["json_reference_ms_total"] += json_decode_ms
+
+    def record_read(self, key: str, decode_ms: float, json_decode_ms: float = None):
+        ns = self._ns(key)
+        ns["reads"] += 1
+        ns["decode_ms_total"] += decode_ms
+        if json_decode_ms is not None:
+            ns["json_reference_reads"] += 1
+            ns["json_reference_ms_total"] += json_decode_ms
+
+    def report(self) -> Dict[str, Any]:
+        result = {}
+        for name, ns in sorted(self.namespaces.items()):
+            decode_avg = ns["decode_ms_total"] / ns["reads"] if ns["reads"] else 0.0
+            json_avg = ns["json_reference_ms_total"] / ns["json_reference_reads"] if ns["json_reference_reads"] else 0.0
+            # Sampled JSON/stored ratio, extrapolated to every write
+            ratio = ns["sampled_json_bytes"] / ns["sampled_stored_bytes"] if ns["sampled_stored_bytes"] else 0.0
+            result[name] = {
+                "writes": ns["writes"],
+                "columnar_writes": ns["columnar_writes"],
+                "stored_bytes": ns["stored_bytes"],
+                "json_bytes": round(ns["stored_bytes"] * ratio),
+                "memory_saved_pct": round(100 * (1 - 1 / ratio), 1) if ratio else 0.0,
+                "reads": ns["reads"],
+                "decode_ms_avg": round(decode_avg, 4),
+                "json_decode_ms_avg": round(json_avg, 4),
+                "decode_saved_pct": round(100 * (1 - decode_avg / json_avg), 1) if json_avg and ns["reads"] else 0.0
+            }
+        return result
+
+# Shared across CacheService instances in this process
+codec_stats = CacheCodecStats()
 
 class CacheService:
     def __init__(self):
         self.redis = redis_client
+        # Payloads go through the non-decoding client so binary values survive
+        self.raw = redis_raw_client
+        self.codec = ColumnarCodec(
+            compression=settings.CACHE_COMPRESSION,
+            float_dtype=settings.CACHE_FLOAT_DTYPE,
+            min_points=settings.CACHE_COLUMNAR_MIN_POINTS
+        ) if settings.CACHE_CODEC == "columnar" else None
+        self.l1 = l1_cache if settings.CACHE_L1_ENABLED else None
 
-    async def get(self, key: str) -> Optional[Any]:
-        if not self.redis:
+    def _decode(self, key: str, data: Any) -> Dict[str, Any]:
+        started = time.perf_counter()
+        if ColumnarCodec.is_encoded(data):
+            codec = self.codec or ColumnarCodec()
+            value, meta = codec.decode_entry(data)
+            codec_stats.record_read(key, (time.perf_counter() - started) * 1000)
+        else:
+            value, meta = json.loads(data), None
+            elapsed = (time.perf_counter() - started) * 1000
+            codec_stats.record_read(key, elapsed, json_decode_ms=elapsed)
+            if isinstance(value, dict) and ENVELOPE_KEY in value:
+                value, meta = value.get("data"), value[ENVELOPE_KEY]
+        # Values written before envelopes existed carry no metadata and count as fresh
+        meta = meta or {}
+        return {
+            "data": value,
+            "fetched_at": meta.get("fetched_at"),
+            "soft_ttl": meta.get("soft_ttl"),
+            "hard_ttl": meta.get("hard_ttl")
+        }
+
+    def _encode(self, key: str, value: Any, meta: Dict[str, Any]) -> Any:
+        encoded = self.codec.encode(value, extra=meta) if self.codec else None
+        if encoded is not None:
+            if not codec_stats.should_sample(key):
+                codec_stats.record_write(key, len(encoded), columnar=True)
+                return encoded
+            payload = json.dumps({ENVELOPE_KEY: meta, "data": value})
+            started = time.perf_counter()
+            json.loads(payload)
+            json_decode_ms = (time.perf_counter() - started) * 1000
+            codec_stats.record_write(key, len(encoded), len(payload), columnar=True, json_decode_ms=json_decode_ms)
+            return encoded
+
+        payload = json.dumps({ENVELOPE_KEY: meta, "data": value})
+        codec_stats.record_write(key, len(payload), len(payload))
+        return payload
+
+    @staticmethod
+    def is_stale(entry: Dict[str, Any]) -> bool:
+        """
+        True once an entry is past its soft TTL: still servable, but due for a refresh.
+        """
+        if not entry or entry.get("fetched_at") is None or entry.get("soft_ttl") is None:
+            return False
+        return time.time() - entry["fetched_at"] >= entry["soft_ttl"]
+
+    async def get_entry(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Cached value with its freshness envelope:
+        {data, fetched_at, soft_ttl, hard_ttl} (metadata is None for legacy keys).
+        """
+        if self.l1:
+            hit, entry = self.l1.get(key)
+            if hit:
+                return entry
+        if not self.raw:
             return None
         try:
-            data = await self.redis.get(key)
+            if self.l1:
+                # One round-trip for the value and its remaining lifetime
+                pipe = self.raw.pipeline(transaction=False)
+                pipe.get(key)
+                pipe.pttl(key)
+                data, pttl = await pipe.execute()
+            else:
+                data, pttl = await self.raw.get(key), None
             if data:
-                return json.loads(data)
+                entry = self._decode(key, data)
+                if self.l1:
+                    self.l1.set(key, entry, len(data), redis_ttl=pttl / 1000 if pttl and pttl > 0 else None)
+                return entry
             return None
         except Exception as e:
             logger.error(f"Redis GET Error ({key}): {e}")
             return None
 
-    async def set(self, key: str, value: Any, ttl: int = 300) -> bool:
+    async def get(self, key: str) -> Optional[Any]:
+        entry = await self.get_entry(key)
+        return entry["data"] if entry else None
+
+    async def set(self, key: str, value: Any, ttl: int = 300, soft_ttl: Optional[float] = None,
+                  fetched_at: Optional[float] = None) -> bool:
         """
-        Set key with TTL (default 5 mins)
+        Set key with TTL (default 5 mins).
+        `ttl` is the hard expiry; past `soft_ttl` (default: ttl) the entry is stale
+        but still served while it is refreshed. `fetched_at` backdates a value
+        built from older data, shortening its expiry to match.
         """
-        if not self.redis:
+        if not self.raw:
             return False
         try:
             # Handle Pydantic models automatically
             if hasattr(value, 'model_dump'):
-                payload = value.model_dump_json()
+                value = value.model_dump(mode="json")
             elif hasattr(value, 'dict'):
-                payload = json.dumps(value.dict())
+                value = value.dict()
+
+            now = time.time()
+            fetched_at = now if fetched_at is None else min(fetched_at, now)
+            expire = max(1, math.ceil(ttl - (now - fetched_at)))
+            meta = {"fetched_at": fetched_at, "soft_ttl": soft_ttl if soft_ttl is not None else ttl, "hard_ttl": ttl}
+            payload = self._encode(key, value, meta)
+            if self.l1:
+                # Write and tell peer workers to drop their L1 copy in one round-trip
+                pipe = self.raw.pipeline(transaction=False)
+                pipe.set(key, payload, ex=expire)
+                pipe.publish(INVALIDATION_CHANNEL, self.l1.invalidation_message([key]))
+                await pipe.execute()
+                self.l1.set(key, {"data": value, **meta}, len(payload), redis_ttl=expire)
             else:
-                payload = json.dumps(value)
-                
-            await self.redis.set(key, payload, ex=ttl)
+                await self.raw.set(key, payload, ex=expire)
             return True
         except Exception as e:
             logger.error(f"Redis SET Error ({key}): {e}")
             return False
 
+    async def get_many_entries(self, keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        get_entry for several keys in one round-trip (MGET, plus PTTLs for the L1).
+        Missing keys and values that fail to decode are left out, so callers
+        treat them as misses.
+        """
+        found: Dict[str, Dict[str, Any]] = {}
+        remote = []
+        for key in dict.fromkeys(keys):
+            hit, entry = self.l1.get(key) if self.l1 else (False, None)
+            if hit:
+                found[key] = entry
+            else:
+                remote.append(key)
+        if not remote or not self.raw:
+            return found
+
+        try:
+            pipe = self.raw.pipeline(transaction=False)
+            pipe.mget(remote)
+            if self.l1:
+                for key in remote:
+                    pipe.pttl(key)
+            results = await pipe.execute()
+        except Exception as e:
+            logger.error(f"Redis MGET Error ({len(remote)} keys): {e}")
+            return found
+
+        values, pttls = results[0], results[1:] or [None] * len(remote)
+        for key, data, pttl in zip(remote, values, pttls):
+            if not data:
+                continue
+            try:
+                entry = self._decode(key, data)
+            except Exception as e:
+                logger.error(f"Cache decode error ({key}): {e}")
+                continue
+            found[key] = entry
+            if self.l1:
+                self.l1.set(key, entry, len(data), redis_ttl=pttl / 1000 if pttl and pttl > 0 else None)
+        return found
+
+    async def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """
+        Values for the keys that are cached, in one round-trip.
+        """
+        return {key: entry["data"] for key, entry in (await self.get_many_entries(keys)).items()}
+
+    async def set_many(self, items: Dict[str, Any], ttl: int = 300, soft_ttl: Optional[float] = None) -> bool:
+        """
+        Pipelined SET EX for several keys with one shared TTL, plus a single
+        L1 invalidation message for all of them.
+        """
+        if not self.raw or not items:
+            return False
+        try:
+            meta = {"fetched_at": time.time(), "soft_ttl": soft_ttl if soft_ttl is not None else ttl, "hard_ttl": ttl}
+            payloads = {key: self._encode(key, value, meta) for key, value in items.items()}
+            pipe = self.raw.pipeline(transaction=False)
+            for key, payload in payloads.items():
+                pipe.set(key, payload, ex=ttl)
+            if self.l1:
+                pipe.publish(INVALIDATION_CHANNEL, self.l1.invalidation_message(list(payloads)))
+            await pipe.execute()
+            if self.l1:
+                for key, payload in payloads.items():
+                    self.l1.set(key, {"data": items[key], **meta}, len(payload), redis_ttl=ttl)
+            return True
+        except Exception as e:
+            logger.error(f"Redis SET Error ({len(items)} keys): {e}")
+            return False
+
+    async def acquire_lock(self, name: str, ttl: int = 30) -> Optional[str]:
+        """
+        Short cross-worker lock (SET NX EX). Returns an owner token, or None if held elsewhere.
+        Without Redis every caller gets a token (in-process coalescing still applies).
+        """
+        token = uuid.uuid4().hex
+        if not self.redis:
+            return token
+        try:
+            acquired = await self.redis.set(f"lock:{name}", token, nx=True, ex=ttl)
+            return token if acquired else None
+        except Exception as e:
+            logger.error(f"Redis LOCK Error ({name}): {e}")
+            return token
+
+    async def release_lock(self, name: str, token: str) -> None:
+        if not self.redis:
+            return
+        key = f"lock:{name}"
+        try:
+            # Only delete our own lock; a peer may own it if ours expired mid-fetch.
+            # WATCH makes the compare-and-delete atomic: a peer taking the lock in
+            # between aborts the DEL.
+            async with self.redis.pipeline(transaction=True) as pipe:
+                await pipe.watch(key)
+                if await pipe.get(key) == token:
+                    pipe.multi()
+                    pipe.delete(key)
+                    await pipe.execute()
+        except WatchError:
+            pass
+        except Exception as e:
+            logger.error(f"Redis UNLOCK Error ({name}): {e}")
+
+    async def is_locked(self, name: str) -> bool:
+        if not self.redis:
+            return False
+        try:
+            return bool(await self.redis.exists(f"lock:{name}"))
+        except Exception:
+            return False
+
     async def ping(self) -> bool:
         if not self.redis:
             return False
@@ -0,0 +1,154 @@
+import json
+import zlib
+import struct
+import numpy as np
+from typing import Any, Dict, List, Optional, Tuple
+from app.utils.logger import logger
+
+try:
+    import zstandard
+except ImportError:  # Optional: zlib is always available
+    zstandard = None
+
+# Header: magic, format version, compression id
+MAGIC = b"ICC"
+VERSION = 1
+HEADER = struct.Struct("<3sBB")
+
+COMPRESSION_NONE = 0
+COMPRESSION_ZLIB = 1
+COMPRESSION_ZSTD = 2
+COMPRESSION_IDS = {"none": COMPRESSION_NONE, "zlib": COMPRESSION_ZLIB, "zstd": COMPRESSION_ZSTD}
+
+FLOAT_DTYPES = {"float32": "<f4", "float64": "<f8"}
+
+def _column_dtype(values: List[Any], float_dtype: str) -> Optional[str]:
+    """
+    Packed dtype for a list of numbers (None allowed), or None if it is not numeric.
+    Integers (e.g. epoch timestamps) stay int64 so they round-trip exactly.
+    """
+    all_int = True
+    for v in values:
+        if v is None:
+            all_int = False
+        elif type(v) is int:
+            continue
+        elif type(v) is float:
+            all_int = False
+        else:
+            return None
+    if all_int and all(-2**63 <= v < 2**63 for v in values):
+        return "<i8"
+    return float_dtype
+
+def _compress(body: bytes, compression: int) -> bytes:
+    if compression == COMPRESSION_ZSTD:
+        return zstandard.ZstdCompressor(level=3).compress(body)
+    if compression == COMPRESSION_ZLIB:
+        return zlib.compress(body, 6)
+    return body
+
+def _decompress(body: bytes, compression: int) -> bytes:
+    if compression == COMPRESSION_ZSTD:
+        if zstandard is None:
+            raise ValueError("Payload is zstd-compressed but `zstandard` is not installed")
+        return zstandard.ZstdDecompressor().decompress(body)
+    if compression == COMPRESSION_ZLIB:
+        return zlib.decompress(body)
+    return body
+
+class ColumnarCodec:
+    """
+    Binary encoding for dicts of parallel numeric lists (chart payloads).
+    Each numeric list becomes a packed little-endian array plus a bitmap of
+    None positions; everything else rides along as a small JSON header.
+
+    Layout: MAGIC | version | compression | compressed(meta_len | meta | columns)
+    """
+    def __init__(self, compression: str = "zlib", float_dtype: str = "float64", min_points: int = 64):
+        if compression == "zstd" and zstandard is None:
+            logger.warning("Cache codec: zstd requested but `zstandard` is not installed. Using zlib.")
+            compression = "zlib"
+        self.compression = COMPRESSION_IDS.get(compression, COMPRESSION_ZLIB)
+        self.float_dtype = FLOAT_DTYPES.get(float_dtype, "<f8")
+        self.min_points = min_points
+
+    @staticmethod
+    def is_encoded(data: bytes) -> bool:
+        return isinstance(data, (bytes, bytearray)) and data[:len(MAGIC)] == MAGIC
+
+    def _columns(self, value: Any) -> Optional[List[Tuple[str, str]]]:
+        # Only worth it for dicts carrying at least one long numeric series
+        if not isinstance(value, dict):
+            return None
+        columns = []
+        for name, series in value.items():
+            if isinstance(series, list) and series:
+                dtype = _column_dtype(series, self.float_dtype)
+                if dtype:
+                    columns.append((name, dtype))
+        if not any(len(value[name]) >= self.min_points for name, _ in columns):
+            return None
+        return columns
+
+    def encode(self, value: Any, extra: Optional[Dict[str, Any]] = None) -> Optional[bytes]:
+        """
+        Returns the binary payload, or None when the value should stay JSON.
+        `extra` is small JSON metadata stored next to the value (see decode_entry).
+        """
+        columns = self._columns(value)
+        if columns is None:
+            return None
+
+        column_names = {name for name, _ in columns}
+        meta = {
+            "order": list(value.keys()),
+            "fields": {k: v for k, v in value.items() if k not in column_names},
+            "columns": [[name, dtype, len(value[name])] for name, dtype in columns]
+        }
+        if extra is not None:
+            meta["extra"] = extra
+        parts = []
+        for name, dtype in columns:
+            series = value[name]
+            missing = np.fromiter((v is None for v in series), dtype=bool, count=len(series))
+            if dtype == "<i8":
+                packed = np.array(series, dtype=dtype)
+            else:
+                packed = np.array([np.nan if v is None else v for v in series], dtype=dtype)
+            parts.append(np.packbits(missing).tobytes())
+            parts.append(packed.tobytes())
+
+        meta_bytes = json.dumps(meta, separators=(",", ":")).encode()
+        body = struct.pack("<I", len(meta_bytes)) + meta_bytes + b"".join(parts)
+        return HEADER.pack(MAGIC, VERSION, self.compression) + _compress(body, self.compression)
+
+    def decode(self, data: bytes) -> Dict[str, Any]:
+        return self.decode_entry(data)[0]
+
+    def decode_entry(self, data: bytes) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+        """
+        Returns the decoded value and the `extra` metadata it was encoded with.
+        """
+        magic, version, compression = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Unsupported cache payload (version {version})")
+        body = _decompress(bytes(data[HEADER.size:]), compression)
+
+        (meta_len,) = struct.unpack_from("<I", body)
+        offset = 4 + meta_len
+        meta = json.loads(body[4:offset])
+
+        decoded = dict(meta["fields"])
+        for name, dtype, length in meta["columns"]:
+            mask_len = (length + 7) // 8
+            missing = np.unpackbits(np.frombuffer(body, dtype=np.uint8, count=mask_len, offset=offset), count=length).astype(bool)
+            offset += mask_len
+            packed = np.frombuffer(body, dtype=dtype, count=length, offset=offset)
+            offset += packed.nbytes
+
+            series = packed.tolist()
+            for i in np.flatnonzero(missing):
+                series[i] = None
+            decoded[name] = series
+        return {key: decoded[key] for key in meta["order"]}, meta.get("extra")
@@ -0,0 +1,232 @@
+import re
+import time
+import asyncio
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, Any, List, Optional, Tuple
+from app.services.cache import CacheService
+from app.utils.logger import logger
+
+UNRANKED = 10**9
+
+# Hand-picked aliases that win over the index (and cover it before its first load)
+CURATED: Dict[str, str] = {
+    "btc": "bitcoin", "eth": "ethereum", "sol": "solana",
+    "doge": "dogecoin", "dot": "polkadot", "ada": "cardano",
+    "xrp": "ripple", "matic": "polygon", "link": "chainlink",
+    "ltc": "litecoin", "uni": "uniswap", "atom": "cosmos",
+    "avax": "avalanche-2", "shib": "shiba-inu", "shiba": "shiba-inu", "pepe": "pepe",
+    "near": "near", "apt": "aptos", "arb": "arbitrum", "op": "optimism"
+}
+
+CURATED_IDS = set(CURATED.values())
+
+def _trigrams(term: str) -> set:
+    padded = f" {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class CoinIndex:
+    """
+    In-memory index of the CoinGecko coin universe (id, symbol, name, market-cap rank).
+    Exact lookups are dict hits, prefixes use a sorted term list with bisect, and
+    typos are matched through a trigram index. Ties always go to the larger market cap.
+    The coin list is persisted in Redis and rebuilt by the scheduler once a day.
+    """
+    CACHE_KEY = "coins:index"
+    CACHE_TTL = 86400 * 3 # Keep serving the last list if a daily refresh fails
+    MAX_AGE = 86400
+    RELOAD_INTERVAL = 60 # Seconds between Redis load attempts while empty
+    FUZZY_MIN_SCORE = 0.45
+    # Free text is full of words that are also some token's name or symbol,
+    # so text matches are limited to ranked coins (symbols: only the top ones)
+    TEXT_NAME_MAX_RANK = 1000
+    TEXT_SYMBOL_MAX_RANK = 100
+
+    def __init__(self):
+        self.cache = CacheService()
+        self.coins: List[Dict[str, Any]] = []
+        self.by_id: Dict[str, int] = {}
+        self.by_symbol: Dict[str, int] = {}
+        self.by_name: Dict[str, int] = {}
+        self.terms: List[Tuple[str, int]] = []
+        self.grams: Dict[str, List[int]] = {}
+        self.fetched_at: Optional[float] = None
+        self._last_load_attempt = 0.0
+        self._lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self.coins)
+
+    # --- Building ---
+
+    def build(self, coins: List[Dict[str, Any]], fetched_at: Optional[float] = None):
+        """
+        Rebuilds every lookup structure from [{id, symbol, name, rank}] rows.
+        """
+        ordered = sorted(
+            (c for c in coins if c.get("id")),
+            key=lambda c: (c.get("rank") or UNRANKED, c["id"])
+        )
+        by_id, by_symbol, by_name, terms, grams = {}, {}, {}, [], {}
+        for idx, coin in enumerate(ordered):
+            coin_id = coin["id"].lower()
+            symbol = (coin.get("symbol") or "").lower()
+            name = (coin.get("name") or "").lower()
+            # Rows are rank-ordered, so the first coin to claim a term keeps it
+            by_id.setdefault(coin_id, idx)
+            if symbol:
+                by_symbol.setdefault(symbol, idx)
+            if name:
+                by_name.setdefault(name, idx)
+            for term in {coin_id, symbol, name} - {""}:
+                terms.append((term, idx))
+            for gram in _trigrams(name) | _trigrams(coin_id):
+                grams.setdefault(gram, []).append(idx)
+        terms.sort()
+
+        self.coins, self.by_id, self.by_symbol, self.by_name = ordered, by_id, by_symbol, by_name
+        self.terms, self.grams = terms, grams
+        self.fetched_at = fetched_at or time.time()
+        logger.info(f"CoinIndex: Indexed {len(ordered)} coins")
+
+    async def load(self, coins: List[Dict[str, Any]], persist: bool = True):
+        await asyncio.to_thread(self.build, coins)
+        if persist:
+            await self.cache.set(self.CACHE_KEY, {"fetched_at": self.fetched_at, "coins": coins}, ttl=self.CACHE_TTL)
+
+    async def ensure_loaded(self) -> bool:
+        """
+        Loads the persisted list from Redis when this process has none yet, or
+        picks up the daily rebuild once its copy is older than MAX_AGE.
+        Never calls upstream; the scheduler owns refreshing.
+        """
+        if self.is_fresh() or time.monotonic() - self._last_load_attempt < self.RELOAD_INTERVAL:
+            return bool(self.coins)
+        async with self._lock:
+            if self.is_fresh():
+                return True
+            self._last_load_attempt = time.monotonic()
+            stored = await self.cache.get(self.CACHE_KEY)
+            if stored and stored.get("coins") and stored.get("fetched_at") != self.fetched_at:
+                await asyncio.to_thread(self.build, stored["coins"], stored.get("fetched_at"))
+        return bool(self.coins)
+
+    def is_fresh(self) -> bool:
+        return self.fetched_at is not None and time.time() - self.fetched_at < self.MAX_AGE
+
+    # --- Lookups ---
+
+    def exact(self, term: str) -> Optional[str]:
+        """
+        Curated alias, then coin id, symbol or name (best market cap wins).
+        """
+        term = term.strip().lower()
+        if term in CURATED:
+            return CURATED[term]
+        for table in (self.by_id, self.by_symbol, self.by_name):
+            idx = table.get(term)
+            if idx is not None:
+                return self.coins[idx]["id"]
+        return None
+
+    def is_id(self, coin_id: str) -> bool:
+        """
+        True for a known CoinGecko id (curated or in the loaded index).
+        """
+        return coin_id in CURATED_IDS or coin_id in self.by_id
+
+    def prefix(self, term: str, limit: int = 10) -> List[Dict[str, Any]]:
+        term = term.strip().lower()
+        if not term:
+            return []
+        matches = set()
+        i = bisect_left(self.terms, (term, -1))
+        while i < len(self.terms) and self.terms[i][0].startswith(term):
+            matches.add(self.terms[i][1])
+            i += 1
+        return [self.coins[idx] for idx in sorted(matches)[:limit]]
+
+    def fuzzy(self, term: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Typo-tolerant match on names and ids by trigram overlap (Jaccard).
+        """
+        term = term.strip().lower()
+        if len(term) < 3:
+            return []
+        query = _trigrams(term)
+        shared = Counter()
+        for gram in query:
+            shared.update(self.grams.get(gram, ()))
+
+        scored = []
+        for idx, common in shared.items():
+            # Jaccard can't beat shared/|query|, so most candidates are skipped cheaply
+            if common / len(query) < self.FUZZY_MIN_SCORE:
+                continue
+            coin = self.coins[idx]
+            best = 0.0
+            for candidate in (coin["id"].lower(), (coin.get("name") or "").lower()):
+                grams = _trigrams(candidate)
+                best = max(best, len(query & grams) / len(query | grams))
+            if best >= self.FUZZY_MIN_SCORE:
+                scored.append((-round(best, 3), idx))
+        scored.sort()
+        return [self.coins[idx] for _, idx in scored[:limit]]
+
+    def lookup(self, term: str) -> Optional[str]:
+        """
+        Best single id for a user-typed term: exact, then prefix, then typo-tolerant.
+        """
+        found = self.exact(term)
+        if found:
+            return found
+        for candidates in (self.prefix(term, limit=1), self.fuzzy(term, limit=1)):
+            if candidates:
+                return candidates[0]["id"]
+        return None
+
+    def search(self, term: str, limit: int = 10) -> List[Dict[str, Any]]:
+        results, seen = [], set()
+        exact = self.exact(term)
+        if exact and exact in self.by_id:
+            results.append(self.coins[self.by_id[exact]])
+        for coin in self.prefix(term, limit) + self.fuzzy(term, limit):
+            if coin["id"] not in seen and (not exact or coin["id"] != exact):
+                results.append(coin)
+            seen.add(coin["id"])
+        return results[:limit]
+
+    def find_in_text(self, text: str) -> Optional[str]:
+        """
+        First coin mentioned in free text, by name, id or well-known symbol.
+        """
+        words = re.findall(r"[a-z0-9\-]+", text.lower())
+        phrases = [" ".join(words[i:i + 2]) for i in range(len(words) - 1)] + words
+        for phrase in phrases:
+            if phrase in CURATED:
+                return CURATED[phrase]
+            if phrase in CURATED_IDS:
+                return phrase
+            for table in (self.by_name, self.by_id):
+                idx = table.get(phrase)
+                if idx is not None and self._rank(idx) <= self.TEXT_NAME_MAX_RANK:
+                    return self.coins[idx]["id"]
+        for word in words:
+            idx = self.by_symbol.get(word)
+            if idx is not None and self._rank(idx) <= self.TEXT_SYMBOL_MAX_RANK:
+                return self.coins[idx]["id"]
+        return None
+
+    def _rank(self, idx: int) -> int:
+        return self.coins[idx].get("rank") or UNRANKED
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "coins": len(self.coins),
+            "ranked": sum(1 for c in self.coins if c.get("rank")),
+            "fetched_at": self.fetched_at,
+            "fresh": self.is_fresh()
+        }
+
+# Shared per-process index
+coin_index = CoinIndex()
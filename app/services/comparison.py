@@ -0,0 +1,48 @@
+import numpy as np
+from typing import Dict, Any, List, Tuple
+
+def common_grid(series: List[np.ndarray], step_ms: int) -> np.ndarray:
+    """
+    Shared epoch-ms grid over the window every series covers, anchored on the
+    earliest last point so the newest grid point is real data for every asset.
+    """
+    if not series:
+        return np.empty(0, dtype=np.int64)
+    start = max(int(ts[0]) for ts in series)
+    end = min(int(ts[-1]) for ts in series)
+    if end < start:
+        return np.empty(0, dtype=np.int64)
+    return np.arange(end, start - 1, -step_ms, dtype=np.int64)[::-1]
+
+def align_series(charts: Dict[str, Dict[str, Any]], step_ms: int) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """
+    Resamples each chart's (timestamps, values) onto the common grid by linear
+    interpolation. Returns the asset names kept, the grid and an
+    (assets x points) price matrix.
+    """
+    names, stamps, prices = [], [], []
+    for name, chart in charts.items():
+        ts = np.asarray(chart.get("timestamps") or [], dtype=np.float64)
+        values = np.asarray(chart.get("values") or [], dtype=np.float64)
+        if ts.size == 0 or ts.size != values.size:
+            continue
+        names.append(name)
+        stamps.append(ts)
+        prices.append(values)
+
+    grid = common_grid(stamps, step_ms)
+    matrix = np.empty((len(names), grid.size))
+    for row, (ts, values) in enumerate(zip(stamps, prices)):
+        matrix[row] = np.interp(grid, ts, values)
+    return names, grid, matrix
+
+def normalised_returns(matrix: np.ndarray) -> np.ndarray:
+    """
+    Percent change of every row from its first column, in one matrix operation.
+    Rows starting at zero come back as NaN.
+    """
+    if matrix.shape[-1] == 0:
+        return matrix.copy()
+    base = matrix[:, :1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(base != 0, (matrix / base - 1) * 100, np.nan)
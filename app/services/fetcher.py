@@ -1,9 +1,9 @@
-import httpx
 import asyncio
 import random
 from typing import List, Dict, Any
 from app.models.schemas import ExecutionPlan, FetchedData
 from app.utils.logger import logger
+from app.core.http_client import http_clients
 from app.services.market import MarketService
 from app.services.technical_provider import TechnicalProvider
 
@@ -61,22 +61,22 @@ class FetcherService:
         Fetches recent news/developments via a search proxy.
         """
         headers = {"User-Agent": "InsightAI/1.0"}
-        async with httpx.AsyncClient() as client:
-            try:
-                # Use Wikipedia Search API for 'related' or 'recent' articles
-                url = "https://en.wikipedia.org/w/api.php"
-                params = {
-                    "action": "query",
-                    "list": "search",
-                    "srsearch": f"{query} news 2026",
-                    "format": "json",
-                    "srlimit": 3
-                }
-                resp = await client.get(url, params=params, headers=headers)
-                data = resp.json()
-                return {"headlines": data.get("query", {}).get("search", [])}
-            except:
-                return {"headlines": []}
+        client = http_clients.get("wikipedia")
+        try:
+            # Use Wikipedia Search API for 'related' or 'recent' articles
+            url = "https://en.wikipedia.org/w/api.php"
+            params = {
+                "action": "query",
+                "list": "search",
+                "srsearch": f"{query} news 2026",
+                "format": "json",
+                "srlimit": 3
+            }
+            resp = await client.get(url, params=params, headers=headers)
+            data = resp.json()
+            return {"headlines": data.get("query", {}).get("search", [])}
+        except:
+            return {"headlines": []}
 
     async def _fetch_social_sentiment(self, query: str) -> Dict[str, Any]:
         """
@@ -104,39 +104,39 @@ class FetcherService:
             "User-Agent": "InsightAI/1.0 (https://github.com/aditya/InsightAI; contact@insightai.com)"
         }
         
-        async with httpx.AsyncClient() as client:
-            try:
-                # Step 1: Search for the title
-                search_url = f"https://en.wikipedia.org/w/api.php"
-                search_params = {
-                    "action": "query",
-                    "list": "search",
-                    "srsearch": query,
-                    "format": "json",
-                    "srlimit": 1
-                }
-                
-                search_resp = await client.get(search_url, params=search_params, headers=headers)
-                search_data = search_resp.json()
-                
-                search_results = search_data.get("query", {}).get("search", [])
-                if not search_results:
-                    return {"error": "No Wikipedia article found for this topic."}
-                
-                best_title = search_results[0]["title"]
-                
-                # Step 2: Fetch the summary of the best title
-                summary_url = f"https://en.wikipedia.org/api/rest_v1/page/summary/{best_title.replace(' ', '_')}"
-                summary_resp = await client.get(summary_url, headers=headers, follow_redirects=True)
-                
-                if summary_resp.status_code == 200:
-                    return summary_resp.json()
-                
-                return {"error": f"Article found ({best_title}), but summary unavailable."}
-                
-            except Exception as e:
-                logger.error(f"Fetcher Wikipedia Error: {e}")
-                return {"error": "Wikipedia service temporarily unavailable."}
+        client = http_clients.get("wikipedia")
+        try:
+            # Step 1: Search for the title
+            search_url = f"https://en.wikipedia.org/w/api.php"
+            search_params = {
+                "action": "query",
+                "list": "search",
+                "srsearch": query,
+                "format": "json",
+                "srlimit": 1
+            }
+            
+            search_resp = await client.get(search_url, params=search_params, headers=headers)
+            search_data = search_resp.json()
+            
+            search_results = search_data.get("query", {}).get("search", [])
+            if not search_results:
+                return {"error": "No Wikipedia article found for this topic."}
+            
+            best_title = search_results[0]["title"]
+            
+            # Step 2: Fetch the summary of the best title
+            summary_url = f"https://en.wikipedia.org/api/rest_v1/page/summary/{best_title.replace(' ', '_')}"
+            summary_resp = await client.get(summary_url, headers=headers, follow_redirects=True)
+            
+            if summary_resp.status_code == 200:
+                return summary_resp.json()
+            
+            return {"error": f"Article found ({best_title}), but summary unavailable."}
+            
+        except Exception as e:
+            logger.error(f"Fetcher Wikipedia Error: {e}")
+            return {"error": "Wikipedia service temporarily unavailable."}
 
     async def _fetch_crypto(self, query: str) -> Dict[str, Any]:
         """
@@ -0,0 +1,145 @@
+import math
+import time
+import asyncio
+from collections import Counter
+from typing import Dict, Any, List, Optional, Tuple
+from app.core.config import get_settings
+from app.core.redis_client import redis_client
+from app.services.upstream_governor import upstream_priority, Priority
+from app.utils.logger import logger
+
+settings = get_settings()
+
+class HotKeyTracker:
+    """
+    Cluster-wide request heat per asset and per (asset, chart range), kept in
+    Redis sorted sets with forward exponential decay: a request at time t adds
+    exp(λ·(t - landmark)), so recent requests weigh more and old ones fade with
+    a half-life of HOT_KEYS_HALF_LIFE. Reading divides by exp(λ·(now - landmark)).
+    Each worker buffers increments locally and flushes them in one pipeline.
+    The landmark moves forward every RENORM_HALF_LIVES half-lives (scores are
+    rescaled once, by whichever worker notices first) to keep weights bounded.
+    """
+    ASSETS_KEY = "hot:assets"
+    CHARTS_KEY = "hot:charts"
+    LANDMARK_KEY = "hot:landmark"
+    RENORM_HALF_LIVES = 8
+    MAX_MEMBERS = 1000 # Per sorted set; the coldest members are trimmed on flush
+
+    def __init__(self, half_life: float, flush_interval: float):
+        self.redis = redis_client
+        self.half_life = half_life
+        self.decay = math.log(2) / half_life
+        self.flush_interval = flush_interval
+        self.pending: Counter = Counter()
+        self.pending_landmark: Optional[float] = None
+        self._last_flush = time.monotonic()
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def _landmark(self, now: float) -> float:
+        period = self.half_life * self.RENORM_HALF_LIVES
+        return math.floor(now / period) * period
+
+    def _weight(self, now: float, landmark: float) -> float:
+        return math.exp(self.decay * (now - landmark))
+
+    # --- Recording ---
+
+    def record(self, asset: str, days: Optional[str] = None):
+        """
+        Counts one user lookup: of an asset's KPIs, or of its chart when `days` is given.
+        Scheduler and background refreshes are not demand and are ignored.
+        """
+        if upstream_priority.get() != Priority.USER:
+            return
+        now = time.time()
+        landmark = self._landmark(now)
+        if self.pending_landmark is not None and landmark != self.pending_landmark:
+            self._rebase_pending(landmark)
+        self.pending_landmark = landmark
+
+        member = (self.CHARTS_KEY, f"{asset}:{days}") if days else (self.ASSETS_KEY, asset)
+        self.pending[member] += self._weight(now, landmark)
+
+        if time.monotonic() - self._last_flush >= self.flush_interval and not (self._flush_task and not self._flush_task.done()):
+            try:
+                self._flush_task = asyncio.get_running_loop().create_task(self.flush())
+            except RuntimeError:
+                pass # No loop (sync caller): the next async record flushes
+
+    def _rebase_pending(self, landmark: float):
+        factor = math.exp(-self.decay * (landmark - self.pending_landmark))
+        for member in self.pending:
+            self.pending[member] *= factor
+
+    async def flush(self):
+        """
+        Writes buffered increments to Redis (one pipeline) and trims cold members.
+        """
+        self._last_flush = time.monotonic()
+        if not self.pending or not self.redis:
+            return
+        landmark = self._landmark(time.time())
+        if landmark != self.pending_landmark:
+            self._rebase_pending(landmark)
+            self.pending_landmark = landmark
+        pending, self.pending = self.pending, Counter()
+        try:
+            await self._renormalise(landmark)
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for (zset, member), weight in pending.items():
+                    pipe.zincrby(zset, weight, member)
+                for zset in (self.ASSETS_KEY, self.CHARTS_KEY):
+                    pipe.zremrangebyrank(zset, 0, -self.MAX_MEMBERS - 1)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"HotKeys: Flush failed ({e}). Dropping {len(pending)} increments.")
+
+    async def _renormalise(self, landmark: float):
+        # GETSET is atomic: only the first worker to see the new landmark rescales
+        previous = await self.redis.getset(self.LANDMARK_KEY, landmark)
+        if previous is None or float(previous) >= landmark:
+            if previous is not None and float(previous) > landmark:
+                # Our clock is behind a peer's; keep the newer landmark
+                await self.redis.set(self.LANDMARK_KEY, previous)
+            return
+        factor = math.exp(-self.decay * (landmark - float(previous)))
+        for zset in (self.ASSETS_KEY, self.CHARTS_KEY):
+            await self.redis.zunionstore(zset, {zset: factor})
+        logger.info(f"HotKeys: Rebased scores to a new landmark (x{factor:.3g})")
+
+    # --- Reading ---
+
+    async def top(self, kind: str = "assets", k: int = 20) -> List[Tuple[str, float]]:
+        """
+        Hottest members as (member, requests per minute), hottest first.
+        `kind` is "assets" (coin ids) or "charts" ("coin_id:days").
+        """
+        zset = self.ASSETS_KEY if kind == "assets" else self.CHARTS_KEY
+        if not self.redis:
+            return []
+        try:
+            members = await self.redis.zrevrange(zset, 0, k - 1, withscores=True)
+            landmark = await self.redis.get(self.LANDMARK_KEY)
+        except Exception as e:
+            logger.warning(f"HotKeys: Could not read {zset} ({e})")
+            return []
+        return [(member, self._rate(score, landmark)) for member, score in members]
+
+    def _rate(self, score: float, landmark: Optional[str]) -> float:
+        # A decayed count N under steady arrivals r settles at r/λ, so r ≈ N·λ
+        now = time.time()
+        base = float(landmark) if landmark is not None else self._landmark(now)
+        count = score / self._weight(now, base)
+        return round(count * self.decay * 60, 3)
+
+    async def stats(self) -> Dict[str, Any]:
+        return {
+            "half_life_seconds": self.half_life,
+            "pending_increments": len(self.pending),
+            "assets": dict(await self.top("assets", 20)),
+            "charts": dict(await self.top("charts", 20))
+        }
+
+# Shared per-process tracker
+hot_keys = HotKeyTracker(half_life=settings.HOT_KEYS_HALF_LIFE, flush_interval=settings.HOT_KEYS_FLUSH_INTERVAL)
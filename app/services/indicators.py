@@ -0,0 +1,361 @@
+import numpy as np
+from collections import deque
+from typing import Dict, Any, List, Optional
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Indicator parameters used across MarketService charts
+SMA_WINDOW = 20
+EMA_SPAN = 20
+RSI_PERIOD = 14
+MACD_FAST = 12
+MACD_SLOW = 26
+MACD_SIGNAL = 9
+
+DEFAULT_PARAMS = {
+    "sma": SMA_WINDOW, "ema": EMA_SPAN, "rsi": RSI_PERIOD,
+    "fast": MACD_FAST, "slow": MACD_SLOW, "signal": MACD_SIGNAL
+}
+
+def macd_trend(prev_macd: Optional[float], prev_signal: Optional[float], macd: Optional[float], signal: Optional[float]) -> str:
+    """
+    MACD signal classification shared by full and incremental computations.
+    """
+    if None in (prev_macd, prev_signal, macd, signal):
+        return "Neutral"
+    # Bullish: MACD crosses Signal from below
+    if macd > signal and prev_macd <= prev_signal:
+        return "Bullish Crossover"
+    # Bearish: MACD crosses Signal from above
+    if macd < signal and prev_macd >= prev_signal:
+        return "Bearish Crossover"
+    # Continuation
+    if macd > signal:
+        return "Bullish"
+    if macd < signal:
+        return "Bearish"
+    return "Neutral"
+
+# --- Vectorised engine (full series) ---
+
+def as_price_array(prices) -> np.ndarray:
+    """
+    Contiguous float64 buffer the engine works on; accepts lists or arrays.
+    """
+    return np.ascontiguousarray(prices, dtype=np.float64)
+
+def rolling_mean(x: np.ndarray, window: int) -> np.ndarray:
+    """
+    Trailing mean along the last axis; the first window-1 points are NaN.
+    """
+    out = np.full(x.shape, np.nan)
+    if x.shape[-1] >= window:
+        out[..., window - 1:] = sliding_window_view(x, window, axis=-1).mean(axis=-1)
+    return out
+
+def ema(x: np.ndarray, span: int) -> np.ndarray:
+    """
+    Recursive EMA along the last axis, equal to pandas ewm(span, adjust=False).
+    The recurrence y_k = d*y_(k-1) + a*x_k is solved in closed form per block
+    (y_k = d^k * (y_0 + a * sum x_j d^-j)); blocks keep d^-j far from overflow.
+    """
+    alpha = 2 / (span + 1)
+    decay = 1 - alpha
+    n = x.shape[-1]
+    out = np.empty(x.shape)
+    if n == 0:
+        return out
+    # Work relative to the first value: exact for flat series and better conditioned
+    base = x[..., :1]
+    centred = x - base
+    out[..., 0] = 0.0
+    block = max(1, min(n - 1, int(50 / -np.log(decay))))
+    k = np.arange(1, block + 1)
+    growth, shrink = decay ** -k, decay ** k
+    prev = np.zeros(base.shape)
+    for start in range(1, n, block):
+        chunk = centred[..., start:start + block]
+        m = chunk.shape[-1]
+        y = shrink[:m] * (prev + alpha * np.cumsum(chunk * growth[:m], axis=-1))
+        out[..., start:start + m] = y
+        prev = y[..., -1:]
+    return out + base
+
+def rsi(x: np.ndarray, period: int = RSI_PERIOD) -> np.ndarray:
+    """
+    Rolling-mean RSI (same definition as the original pandas implementation).
+    """
+    out = np.full(x.shape, np.nan)
+    if x.shape[-1] <= period:
+        return out
+    delta = np.diff(x, axis=-1)
+    avg_gain = sliding_window_view(np.clip(delta, 0, None), period, axis=-1).mean(axis=-1)
+    avg_loss = sliding_window_view(np.clip(-delta, 0, None), period, axis=-1).mean(axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out[..., period:] = 100 - (100 / (1 + avg_gain / avg_loss))
+    return out
+
+def compute_indicators(prices) -> Dict[str, Any]:
+    """
+    All chart indicators in one vectorised pass over a single price buffer.
+    Returns columnar float64 arrays (NaN where undefined) plus the MACD trend;
+    NaN -> None conversion is left to serialisation (see to_json_list).
+    """
+    x = as_price_array(prices)
+    if x.size == 0:
+        empty = np.empty(0)
+        return {"sma": empty, "ema": empty, "rsi": empty, "macd": empty, "macd_signal": empty,
+                "macd_histogram": empty, "ema_fast": empty, "ema_slow": empty, "trend": "Neutral"}
+
+    ema_fast = ema(x, MACD_FAST)
+    ema_slow = ema(x, MACD_SLOW)
+    macd = ema_fast - ema_slow
+    signal = ema(macd, MACD_SIGNAL)
+    trend = "Neutral"
+    if x.size >= 2:
+        trend = macd_trend(macd[-2], signal[-2], macd[-1], signal[-1])
+
+    return {
+        "sma": rolling_mean(x, SMA_WINDOW),
+        "ema": ema(x, EMA_SPAN),
+        "rsi": rsi(x, RSI_PERIOD),
+        "macd": macd,
+        "macd_signal": signal,
+        "macd_histogram": macd - signal,
+        "ema_fast": ema_fast,
+        "ema_slow": ema_slow,
+        "trend": trend
+    }
+
+def to_json_list(values: np.ndarray) -> List[Optional[float]]:
+    """
+    Serialises a float array for JSON, with NaN replaced by None.
+    """
+    result = values.tolist()
+    for i in np.flatnonzero(np.isnan(values)):
+        result[i] = None
+    return result
+
+def volatility(prices) -> float:
+    """
+    Standard deviation of point-to-point returns, in percent.
+    """
+    x = as_price_array(prices)
+    if x.size < 2:
+        return 0.0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = x[1:] / x[:-1] - 1
+    if returns.size < 2:
+        return float("nan") # Sample std of a single return is undefined (as in pandas)
+    return float(np.std(returns, ddof=1) * 100)
+
+# --- Incremental state (appending to a series) ---
+
+def _ema_step(prev: Optional[float], value: float, span: int) -> float:
+    # Matches pandas ewm(span=span, adjust=False): seeded with the first value
+    if prev is None:
+        return value
+    alpha = 2 / (span + 1)
+    return prev + alpha * (value - prev)
+
+class IndicatorState:
+    """
+    Carried state for appending prices to a series without recomputing it.
+    Produces the same values as the full-series calculations (SMA, EMA,
+    rolling-mean RSI, MACD and its crossover trend) one point at a time, in
+    constant time per point: SMA and RSI keep running sums over the window,
+    re-summed from the window once per window length to bound float drift
+    (amortised O(1)). Serialisable so it can be checkpointed to Redis.
+    """
+    def __init__(self, params: Optional[Dict[str, int]] = None):
+        self.params = {**DEFAULT_PARAMS, **(params or {})}
+        self.window: deque = deque(maxlen=max(self.params["sma"], self.params["rsi"] + 1))
+        self.count = 0
+        self.ema: Optional[float] = None
+        self.ema_fast: Optional[float] = None
+        self.ema_slow: Optional[float] = None
+        self.signal: Optional[float] = None
+        self.macd: Optional[float] = None
+        self.prev_macd: Optional[float] = None
+        self.prev_signal: Optional[float] = None
+        self.last_ts: Optional[int] = None
+        self._resync()
+
+    def _resync(self):
+        """
+        Running sums recomputed from the window (after restore, and periodically).
+        """
+        values = list(self.window)
+        self._sma_sum = sum(values[-self.params["sma"]:])
+        recent = values[-(self.params["rsi"] + 1):]
+        deltas = [b - a for a, b in zip(recent, recent[1:])]
+        self._gain_sum = sum(d for d in deltas if d > 0)
+        self._loss_sum = -sum(d for d in deltas if d < 0)
+        # Counts keep "no losses in the window" exact despite float residue in the sums
+        self._gains = sum(1 for d in deltas if d > 0)
+        self._losses = sum(1 for d in deltas if d < 0)
+        self._since_resync = 0
+
+    def _add_delta(self, delta: float, sign: int):
+        if delta > 0:
+            self._gain_sum += sign * delta
+            self._gains += sign
+        elif delta < 0:
+            self._loss_sum -= sign * delta
+            self._losses += sign
+
+    @property
+    def params_id(self) -> str:
+        return "-".join(str(self.params[name]) for name in sorted(self.params))
+
+    def _sma(self) -> Optional[float]:
+        window = self.params["sma"]
+        if self.count < window:
+            return None
+        return self._sma_sum / window
+
+    def _rsi(self) -> Optional[float]:
+        period = self.params["rsi"]
+        if self.count < period + 1:
+            return None
+        avg_gain = self._gain_sum / period if self._gains else 0.0
+        avg_loss = self._loss_sum / period if self._losses else 0.0
+        if avg_loss == 0:
+            return None if avg_gain == 0 else 100.0
+        return 100 - (100 / (1 + avg_gain / avg_loss))
+
+    def trend(self) -> str:
+        return macd_trend(self.prev_macd, self.prev_signal, self.macd, self.signal)
+
+    def update(self, price: float, ts: Optional[int] = None) -> Dict[str, Optional[float]]:
+        """
+        Appends one price and returns the indicator values for that point.
+        """
+        window, sma, period = self.window, self.params["sma"], self.params["rsi"]
+        if len(window) >= sma:
+            self._sma_sum -= window[-sma] # Leaves the SMA window
+        self._sma_sum += price
+        if window:
+            if len(window) >= period + 1:
+                self._add_delta(window[-period] - window[-period - 1], -1) # Oldest RSI move
+            self._add_delta(price - window[-1], 1)
+        window.append(price)
+        self.count += 1
+        self._since_resync += 1
+        if self._since_resync >= window.maxlen:
+            self._resync()
+        self.prev_macd, self.prev_signal = self.macd, self.signal
+        self.ema = _ema_step(self.ema, price, self.params["ema"])
+        self.ema_fast = _ema_step(self.ema_fast, price, self.params["fast"])
+        self.ema_slow = _ema_step(self.ema_slow, price, self.params["slow"])
+        self.macd = self.ema_fast - self.ema_slow
+        self.signal = _ema_step(self.signal, self.macd, self.params["signal"])
+        if ts is not None:
+            self.last_ts = ts
+
+        return {
+            "sma": self._sma(),
+            "ema": self.ema,
+            "rsi": self._rsi(),
+            "macd": self.macd,
+            "macd_signal": self.signal,
+            "macd_histogram": self.macd - self.signal
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Current indicator values plus the MACD crossover state, without appending.
+        """
+        return {
+            "sma": self._sma(),
+            "ema": self.ema,
+            "rsi": self._rsi(),
+            "macd": self.macd,
+            "macd_signal": self.signal,
+            "macd_histogram": None if self.macd is None else self.macd - self.signal,
+            "trend": self.trend()
+        }
+
+    @classmethod
+    def seed(cls, values: List[float], ema: float, ema_fast: float, ema_slow: float, signal: float,
+             last_ts: Optional[int] = None, prev_macd: Optional[float] = None, prev_signal: Optional[float] = None) -> "IndicatorState":
+        """
+        Rebuilds the (default-parameter) state at the end of an already computed series.
+        """
+        state = cls()
+        state.window.extend(values[-state.window.maxlen:])
+        state.count = len(values)
+        state.ema, state.ema_fast, state.ema_slow, state.signal = ema, ema_fast, ema_slow, signal
+        state.macd = ema_fast - ema_slow
+        state.prev_macd, state.prev_signal = prev_macd, prev_signal
+        state.last_ts = last_ts
+        state._resync()
+        return state
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "params": self.params,
+            "window": list(self.window),
+            "count": self.count,
+            "ema": self.ema,
+            "ema_fast": self.ema_fast,
+            "ema_slow": self.ema_slow,
+            "signal": self.signal,
+            "macd": self.macd,
+            "prev_macd": self.prev_macd,
+            "prev_signal": self.prev_signal,
+            "last_ts": self.last_ts
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "IndicatorState":
+        state = cls(data.get("params"))
+        state.window.extend(data.get("window", []))
+        state.count = data.get("count", 0)
+        state.ema = data.get("ema")
+        state.ema_fast = data.get("ema_fast")
+        state.ema_slow = data.get("ema_slow")
+        state.signal = data.get("signal")
+        state.macd = data.get("macd")
+        state.prev_macd = data.get("prev_macd")
+        state.prev_signal = data.get("prev_signal")
+        state.last_ts = data.get("last_ts")
+        state._resync()
+        return state
+
+def chart_granularity_ms(days: str) -> int:
+    """
+    CoinGecko auto-granularity for /market_chart: 5-minute data for 1 day,
+    hourly from 1 to 90 days, daily beyond (and for 'max').
+    """
+    try:
+        span = float(days)
+    except (TypeError, ValueError):
+        return 86_400_000
+    if span <= 1:
+        return 300_000
+    if span <= 90:
+        return 3_600_000
+    return 86_400_000
+
+def chart_range_ms(days: str) -> Optional[int]:
+    """
+    Length of a chart range in milliseconds, or None for 'max'.
+    """
+    try:
+        return int(float(days) * 86_400_000)
+    except (TypeError, ValueError):
+        return None
+
+def thin_points(points: List[List[float]], after_ts: float, step_ms: int) -> List[List[float]]:
+    """
+    Keeps [ts, price] points newer than after_ts, spaced at least ~one step apart,
+    so a finer-grained upstream window lines up with the cached series.
+    """
+    kept = []
+    last = after_ts
+    for ts, price in points:
+        if ts - last >= step_ms * 0.9:
+            kept.append([ts, price])
+            last = ts
+    return kept
+
@@ -0,0 +1,154 @@
+import time
+import json
+import uuid
+import asyncio
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from app.core.config import get_settings
+from app.utils.logger import logger
+
+settings = get_settings()
+
+INVALIDATION_CHANNEL = "cache:invalidate"
+
+def _namespace(key: str) -> str:
+    return ":".join(key.split(":")[:2])
+
+class L1Cache:
+    """
+    Bounded in-process cache of decoded values in front of Redis.
+    Entries are evicted least-recently-used once the summed payload size exceeds
+    `max_bytes`, and expire after a short TTL that is capped by the key's Redis TTL.
+    Writes on any worker are broadcast over Redis pub/sub so peers drop their copy.
+
+    Cached objects are shared between callers: treat them as read-only.
+    """
+    def __init__(self, max_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.instance_id = uuid.uuid4().hex
+        self.entries: "OrderedDict[str, Tuple[Any, float, int]]" = OrderedDict()
+        self.size = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.counters: Dict[str, Dict[str, int]] = {}
+        self._listener: Optional[asyncio.Task] = None
+
+    def _count(self, key: str, outcome: str):
+        ns = self.counters.setdefault(_namespace(key), {"hits": 0, "misses": 0})
+        ns[outcome] += 1
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        entry = self.entries.get(key)
+        if entry is None:
+            self._count(key, "misses")
+            return False, None
+        value, expires_at, _ = entry
+        if expires_at <= time.monotonic():
+            self._drop(key)
+            self._count(key, "misses")
+            return False, None
+        self.entries.move_to_end(key)
+        self._count(key, "hits")
+        return True, value
+
+    def set(self, key: str, value: Any, size: int, redis_ttl: Optional[float] = None):
+        """
+        Stores a decoded value. `size` is its encoded payload length in bytes;
+        `redis_ttl` (seconds) caps how long the entry may live here.
+        """
+        ttl = self.ttl if redis_ttl is None or redis_ttl < 0 else min(self.ttl, redis_ttl)
+        if ttl <= 0 or size > self.max_bytes // 8:
+            self._drop(key)
+            return
+        self._drop(key)
+        self.entries[key] = (value, time.monotonic() + ttl, size)
+        self.size += size
+        while self.size > self.max_bytes and self.entries:
+            oldest = next(iter(self.entries))
+            self._drop(oldest)
+            self.evictions += 1
+
+    def _drop(self, key: str):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry[2]
+
+    def invalidate(self, key: str):
+        self._drop(key)
+
+    def clear(self):
+        self.entries.clear()
+        self.size = 0
+
+    # --- Cross-worker invalidation ---
+
+    def invalidation_message(self, keys: List[str]) -> str:
+        return json.dumps({"origin": self.instance_id, "keys": keys})
+
+    def _on_message(self, data: Any):
+        try:
+            message = json.loads(data)
+        except (TypeError, ValueError):
+            return
+        # Our own writes already updated the local entry
+        if message.get("origin") != self.instance_id:
+            for key in message.get("keys", []):
+                self._drop(key)
+                self.invalidations += 1
+
+    async def _listen(self, redis):
+        while True:
+            pubsub = redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                async for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        self._on_message(message.get("data"))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Entries written while we were disconnected may be stale: start clean
+                logger.warning(f"L1 Cache: Invalidation listener error ({e}). Reconnecting.")
+                self.clear()
+                await asyncio.sleep(1)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+    def start_listener(self, redis):
+        if redis is None or (self._listener and not self._listener.done()):
+            return
+        self._listener = asyncio.create_task(self._listen(redis))
+        logger.info("L1 Cache: Invalidation listener started")
+
+    async def stop_listener(self):
+        if self._listener:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self.entries),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl,
+            "evictions": self.evictions,
+            "invalidations_received": self.invalidations,
+            "listening": bool(self._listener and not self._listener.done()),
+            "namespaces": {
+                name: {
+                    **c,
+                    "hit_rate": round(c["hits"] / (c["hits"] + c["misses"]), 3) if c["hits"] + c["misses"] else 0.0
+                } for name, c in sorted(self.counters.items())
+            }
+        }
+
+# Shared per-process L1 (all CacheService instances read through it)
+l1_cache = L1Cache(max_bytes=settings.CACHE_L1_MAX_BYTES, ttl=settings.CACHE_L1_TTL)
@@ -0,0 +1,126 @@
+import os
+import time
+import uuid
+import socket
+import asyncio
+from typing import Dict, Any, Optional
+from redis.exceptions import WatchError
+from app.core.redis_client import redis_client
+from app.utils.logger import logger
+
+class LeaderElection:
+    """
+    Redis-lease leader election: the instance holding `key` is the leader.
+    The lease is taken with SET NX PX and renewed every ttl/3; renewal and
+    release are check-and-set transactions, so an instance can never extend or
+    delete a lease another instance owns. If the leader dies its lease expires
+    within `ttl`; on a clean shutdown it releases at once and a follower takes
+    over on its next attempt.
+    Without Redis there is no cluster to coordinate, so the process leads.
+    """
+    def __init__(self, key: str, ttl: float):
+        self.key = key
+        self.ttl = ttl
+        self.renew_interval = ttl / 3
+        self.instance_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.redis = redis_client
+        self.is_leader = False
+        self.leader_since: Optional[float] = None
+        self.transitions = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def _acquire(self) -> bool:
+        return bool(await self.redis.set(self.key, self.instance_id, nx=True, px=int(self.ttl * 1000)))
+
+    async def _renew(self) -> bool:
+        async with self.redis.pipeline(transaction=True) as pipe:
+            try:
+                await pipe.watch(self.key)
+                if await pipe.get(self.key) != self.instance_id:
+                    return False
+                pipe.multi()
+                pipe.pexpire(self.key, int(self.ttl * 1000))
+                await pipe.execute()
+                return True
+            except WatchError:
+                return False
+
+    async def _release(self):
+        async with self.redis.pipeline(transaction=True) as pipe:
+            try:
+                await pipe.watch(self.key)
+                if await pipe.get(self.key) == self.instance_id:
+                    pipe.multi()
+                    pipe.delete(self.key)
+                    await pipe.execute()
+            except WatchError:
+                pass
+
+    async def campaign(self) -> bool:
+        """
+        One election round: renew our lease, or try to take a free one.
+        Redis errors cost the lead: better no refresh sweep than two.
+        """
+        if not self.redis:
+            self._set_leader(True)
+            return True
+        try:
+            leading = await (self._renew() if self.is_leader else self._acquire())
+        except Exception as e:
+            logger.warning(f"Leader: Election round failed ({e})")
+            leading = False
+        self._set_leader(leading)
+        return leading
+
+    def _set_leader(self, leading: bool):
+        if leading == self.is_leader:
+            return
+        self.is_leader = leading
+        self.transitions += 1
+        self.leader_since = time.time() if leading else None
+        logger.info(f"Leader: {self.instance_id} {'acquired' if leading else 'lost'} {self.key}")
+
+    async def _run(self):
+        while True:
+            await self.campaign()
+            await asyncio.sleep(self.renew_interval)
+
+    async def start(self):
+        """
+        Runs the first round inline (so startup knows its role), then keeps campaigning.
+        """
+        await self.campaign()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.is_leader and self.redis:
+            try:
+                await self._release()
+            except Exception as e:
+                logger.warning(f"Leader: Could not release {self.key} ({e})")
+        self._set_leader(False)
+
+    async def status(self) -> Dict[str, Any]:
+        leader, ttl_ms = None if self.redis else self.instance_id, None
+        if self.redis:
+            try:
+                leader = await self.redis.get(self.key)
+                ttl_ms = await self.redis.pttl(self.key)
+            except Exception as e:
+                logger.warning(f"Leader: Could not read {self.key} ({e})")
+        return {
+            "instance": self.instance_id,
+            "is_leader": self.is_leader,
+            "leader": leader,
+            "lease_ttl_ms": ttl_ms if ttl_ms is None or ttl_ms >= 0 else None,
+            "leader_since": self.leader_since,
+            "transitions": self.transitions
+        }
@@ -0,0 +1,108 @@
+import datetime
+from typing import Dict, Any, List, Optional
+from app.services.cache import CacheService
+from app.services.market import MarketService
+from app.services.indicators import IndicatorState, compute_indicators
+from app.utils.logger import logger
+
+class LiveIndicatorService:
+    """
+    Streaming SMA/EMA/RSI/MACD per (symbol, params) for live price ticks.
+    Each tick is an O(1) update of a carried IndicatorState instead of a
+    full-series recompute. State is checkpointed to Redis so it survives
+    restarts, and is seeded from the cached chart the first time a symbol is seen.
+    """
+    CHECKPOINT_TTL = 86400 # 1 day
+    SEED_RANGE = "1" # 5-minute history, closest to live tick spacing
+    RSI_OVERBOUGHT = 70 # Same bands as the Market Health RSI component
+    RSI_OVERSOLD = 30
+
+    def __init__(self):
+        self.cache = CacheService()
+        self.market = MarketService()
+        self.states: Dict[str, IndicatorState] = {}
+
+    def _key(self, symbol: str, params_id: str) -> str:
+        return f"indicator:live:{symbol}:{params_id}"
+
+    async def _load(self, symbol: str, params: Optional[Dict[str, int]]) -> IndicatorState:
+        state = IndicatorState(params)
+        key = self._key(symbol, state.params_id)
+        if key in self.states:
+            return self.states[key]
+
+        # 1. Checkpoint from a previous run (or another worker)
+        checkpoint = await self.cache.get(key)
+        if checkpoint:
+            state = IndicatorState.from_dict(checkpoint)
+        else:
+            # 2. Seed from cached chart history
+            chart = await self.market.get_market_chart(symbol, days=self.SEED_RANGE, axis="epoch")
+            values = (chart or {}).get("values") or []
+            timestamps = (chart or {}).get("timestamps") or []
+            if values and params is None:
+                result = compute_indicators(values)
+                state = IndicatorState.seed(
+                    values,
+                    ema=float(result["ema"][-1]),
+                    ema_fast=float(result["ema_fast"][-1]),
+                    ema_slow=float(result["ema_slow"][-1]),
+                    signal=float(result["macd_signal"][-1]),
+                    last_ts=timestamps[-1] if timestamps else None,
+                    prev_macd=float(result["macd"][-2]) if len(values) >= 2 else None,
+                    prev_signal=float(result["macd_signal"][-2]) if len(values) >= 2 else None
+                )
+            else:
+                # Custom parameters: replay the history through the state once
+                for ts, value in zip(timestamps, values):
+                    state.update(value, ts=ts)
+            logger.info(f"LiveIndicators: Seeded {symbol} from {len(values)} cached points")
+
+        self.states[key] = state
+        return state
+
+    async def on_tick(self, symbol: str, price: float, last_updated: Optional[str] = None, params: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+        """
+        Applies a price tick and returns the current indicators with crossover state.
+        A tick is only applied once per upstream update, however many callers see it.
+        `events` lists what this tick triggered (MACD crossovers, RSI entering the
+        overbought/oversold bands); it is empty for a repeated tick.
+        """
+        symbol = await self.market.resolve_symbol(symbol)
+        state = await self._load(symbol, params)
+        tick_ts = self._tick_ts(last_updated)
+
+        events = []
+        if state.last_ts is None or tick_ts > state.last_ts:
+            prev_rsi = state.snapshot()["rsi"]
+            state.update(price, ts=tick_ts)
+            events = self._events(state.snapshot(), prev_rsi)
+            await self.cache.set(self._key(symbol, state.params_id), state.to_dict(), ttl=self.CHECKPOINT_TTL)
+
+        return {**state.snapshot(), "events": events}
+
+    def _events(self, snapshot: Dict[str, Any], prev_rsi: Optional[float]) -> List[str]:
+        events = []
+        if snapshot["trend"] == "Bullish Crossover":
+            events.append("macd_bullish_crossover")
+        elif snapshot["trend"] == "Bearish Crossover":
+            events.append("macd_bearish_crossover")
+        rsi = snapshot["rsi"]
+        if rsi is not None and prev_rsi is not None:
+            if prev_rsi < self.RSI_OVERBOUGHT <= rsi:
+                events.append("rsi_overbought")
+            elif prev_rsi > self.RSI_OVERSOLD >= rsi:
+                events.append("rsi_oversold")
+        return events
+
+    def _tick_ts(self, last_updated: Optional[str]) -> int:
+        # CoinGecko reports ISO timestamps ("2024-05-01T12:00:00.000Z")
+        if last_updated:
+            try:
+                return int(datetime.datetime.fromisoformat(last_updated.replace("Z", "+00:00")).timestamp() * 1000)
+            except ValueError:
+                pass
+        return int(datetime.datetime.now().timestamp() * 1000)
+
+# Shared per-process registry
+live_indicators = LiveIndicatorService()
@@ -1,64 +1,175 @@
 
 import httpx
+import asyncio
 import datetime
+import numpy as np
 import random
-from typing import Dict, Any, List, Optional
+import time
+from typing import Dict, Any, List, NamedTuple, Optional, Tuple
+from app.core.config import get_settings
 from app.utils.logger import logger
 from app.services.cache import CacheService
+from app.services.singleflight import SingleFlight
+from app.services import indicators
+from app.services.indicators import (
+    IndicatorState, compute_indicators, to_json_list,
+    chart_granularity_ms, chart_range_ms, thin_points
+)
+from app.services.coin_index import coin_index
+from app.services.hot_keys import hot_keys
+from app.services.comparison import align_series, normalised_returns
+from app.services import screener
+from app.services.upstream_governor import coingecko_governor, priority_scope, Priority, UpstreamBudgetExceeded
+from app.core.http_client import http_clients
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 from app.data.mock_data import get_mock_data
 
+settings = get_settings()
+
+# Retry policy for upstream calls.
+# We catch ConnectionError (which we will raise for 429/5xx explicitly)
+upstream_retry = retry(
+    stop=stop_after_attempt(3), 
+    wait=wait_exponential(multiplier=1, min=2, max=10),
+    retry=retry_if_exception_type((httpx.RequestError, httpx.TimeoutException, ConnectionError))
+)
+
+class Derived(NamedTuple):
+    """
+    A fetch result built from other cached data rather than upstream. It is
+    stored as of the source's fetch time, so it is never fresher than its source.
+    """
+    data: Any
+    fetched_at: float
+
 class MarketService:
     BASE_URL = "https://api.coingecko.com/api/v3"
+    MARKETS_BATCH_SIZE = 250 # CoinGecko /coins/markets per_page ceiling
+    INCREMENTAL_MAX_GAP = 0.25 # Refetch fully once the missing tail exceeds this share of the range
+    CHART_RANGES = ["1", "7", "14", "30", "90", "180", "365", "max"] # Shortest first
+    DERIVE_WARMUP = 100 # Extra points before a derived slice so EMA/MACD start converged
+    SOFT_TTL_RATIO = 0.5 # Entries older than this share of their TTL are served stale and refreshed
+    HEATMAP_SORTS = ["market_cap", "gainers", "losers", "volume"]
+    SCREENER_SORTS = ["score", "rsi", "volatility", "change_24h", "market_cap"]
+    SCREENER_TRENDS = ["Bullish", "Bearish", "Neutral"]
+    SCREENER_FEATURES_TTL = 120 # Cached screener features; soft-expire after half, like the charts
+
+    # Shared by every MarketService instance in the process (chat, market, scheduler, ...)
+    inflight = SingleFlight()
+    _refresh_tasks: set = set() # Strong refs to detached stale refreshes
+    _refreshing: set = set() # Keys with a background refresh scheduled or running
     
     def __init__(self):
         self.cache = CacheService()
 
+    async def _coingecko_get(self, url: str, **kwargs) -> httpx.Response:
+        """
+        Every CoinGecko call draws a token from the shared upstream budget first.
+        """
+        if not await coingecko_governor.acquire():
+            raise UpstreamBudgetExceeded("CoinGecko request budget exhausted")
+        return await http_clients.get("coingecko").get(url, **kwargs)
+
     async def _background_refresh(self, key, fetch_func, ttl):
         """
         Background task to refresh cache without blocking response.
         """
+        await self._background_run(key, lambda: self._fetch_and_store(key, fetch_func, ttl, force_refresh=True))
+
+    async def _background_run(self, key: str, func):
         try:
             logger.info(f"Background refreshing cache for key: {key}")
-            data = await fetch_func()
-            if data and isinstance(data, dict) and "error" not in data:
-                await self.cache.set(key, data, ttl)
+            with priority_scope(Priority.BACKGROUND):
+                await self.inflight.do(key, func)
         except Exception as e:
             logger.warn(f"Background refresh failed for {key}: {e}")
+        finally:
+            self._refreshing.discard(key)
+
+    def _claim_refresh(self, key: str) -> bool:
+        """
+        Marks a key as being refreshed, synchronously, so concurrent stale hits
+        schedule exactly one refresh (a new task only counts as running once it starts).
+        """
+        if key in self._refreshing or self.inflight.is_running(key):
+            return False
+        self._refreshing.add(key)
+        return True
+
+    def _refresh_detached(self, key: str, func):
+        """
+        Starts a background refresh outside any request, unless one is already scheduled.
+        """
+        if not self._claim_refresh(key):
+            return
+        task = asyncio.create_task(self._background_run(key, func))
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+        # Also released if the task is cancelled before it starts
+        task.add_done_callback(lambda _: self._refreshing.discard(key))
 
     async def _get_cached_or_fetch(self, key: str, fetch_func, ttl: int = 600, force_refresh: bool = False, background_tasks = None):
         # 1. Cache Check
         if not force_refresh:
+            entry = await self.cache.get_entry(key)
+            if entry and entry["data"]:
+                # Stale-While-Revalidate: freshness comes from the entry's envelope,
+                # so a hit costs no extra Redis call. Past the soft TTL the stale
+                # value is served while one refresh runs.
+                if self.cache.is_stale(entry):
+                    if background_tasks:
+                        if self._claim_refresh(key):
+                            background_tasks.add_task(self._background_refresh, key, fetch_func, ttl)
+                    else:
+                        self._refresh_detached(key, lambda: self._fetch_and_store(key, fetch_func, ttl, force_refresh=True))
+
+                return entry["data"]
+        
+        # 2. Single-Flight: concurrent misses for the same key share one upstream fetch
+        return await self.inflight.do(key, lambda: self._fetch_and_store(key, fetch_func, ttl, force_refresh))
+
+    async def _wait_for_peer(self, key: str) -> Optional[Any]:
+        """
+        Another worker holds the fetch lock for this key. Poll the cache until it
+        publishes the value, the lock disappears, or we give up and fetch ourselves.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.SINGLEFLIGHT_WAIT_SECONDS
+        while loop.time() < deadline:
+            await asyncio.sleep(0.1)
             cached = await self.cache.get(key)
             if cached:
-                # Stale-While-Revalidate Logic
-                # Check if we should background refresh (e.g., if cache is > 50% aged)
-                # Need timestamp in cache or heuristic. Redis TTL is simpler.
-                # Since we don't store timestamp inside the value easily without wrapper,
-                # we can check remaining TTL.
-                if background_tasks and self.cache.redis:
-                   remaining = await self.cache.redis.ttl(key)
-                   # If less than 50% of TTL remains, refresh in background
-                   if remaining > 0 and remaining < (ttl / 2):
-                       background_tasks.add_task(self._background_refresh, key, fetch_func, ttl)
-                
                 return cached
-        
-        # 2. Define Retry Logic for Network Calls
-        # We catch ConnectionError (which we will raise for 429/5xx explicitly)
-        @retry(
-            stop=stop_after_attempt(3), 
-            wait=wait_exponential(multiplier=1, min=2, max=10),
-            retry=retry_if_exception_type((httpx.RequestError, httpx.TimeoutException, ConnectionError))
-        )
+            if not await self.cache.is_locked(key):
+                break
+        return None
+
+    async def _fetch_and_store(self, key: str, fetch_func, ttl: int, force_refresh: bool = False):
+        # Cross-worker coalescing: only the lock holder calls upstream
+        token = await self.cache.acquire_lock(key, ttl=settings.SINGLEFLIGHT_LOCK_TTL)
+        if token is None:
+            if force_refresh:
+                # A peer is already refreshing this key; keep serving what we have
+                cached = await self.cache.get(key)
+                if cached:
+                    return cached
+            else:
+                cached = await self._wait_for_peer(key)
+                if cached:
+                    return cached
+
+        @upstream_retry
         async def robust_fetch():
             return await fetch_func()
 
-        # 3. Execute Fetch
+        # Execute Fetch
         try:
             data = await robust_fetch()
+            fetched_at = None
+            if isinstance(data, Derived):
+                data, fetched_at = data
             
-            # 4. Cache Store (if valid)
+            # Cache Store (if valid)
             should_cache = False
             if isinstance(data, dict) and "error" not in data:
                 should_cache = True
@@ -66,27 +177,67 @@ class MarketService:
                 should_cache = True
 
             if should_cache:
-                await self.cache.set(key, data, ttl)
+                await self.cache.set(key, data, ttl, soft_ttl=ttl * self.SOFT_TTL_RATIO, fetched_at=fetched_at)
                 
             return data
         except Exception as e:
             logger.error(f"MarketService: Final failure for {key}: {e}")
             return {"error": "External API Unavailable (Max Retries Exceeded)"}
+        finally:
+            if token:
+                await self.cache.release_lock(key, token)
 
     async def resolve_symbol(self, symbol: str) -> str:
-        symbol_map = {
-            "btc": "bitcoin", "eth": "ethereum", "sol": "solana",
-            "doge": "dogecoin", "dot": "polkadot", "ada": "cardano",
-            "xrp": "ripple", "matic": "polygon", "link": "chainlink", 
-            "ltc": "litecoin", "uni": "uniswap", "atom": "cosmos",
-            "avax": "avalanche-2", "shib": "shiba-inu", "pepe": "pepe",
-            "near": "near", "apt": "aptos", "arb": "arbitrum", "op": "optimism"
-        }
-        return symbol_map.get(symbol.lower(), symbol.lower())
+        """
+        Maps a symbol, name or id onto a CoinGecko id through the local coin index
+        (curated aliases first, then exact id/symbol/name by market cap). No network.
+        """
+        await coin_index.ensure_loaded()
+        return coin_index.exact(symbol) or symbol.lower()
+
+    def _record_demand(self, resolved_id: str, days: Optional[str] = None):
+        """
+        Counts a user lookup towards the scheduler's hot keys, only for known coin
+        ids and standard chart ranges, so client input cannot steer refreshes.
+        """
+        if days is not None and days not in self.CHART_RANGES:
+            return
+        if coin_index.is_id(resolved_id):
+            hot_keys.record(resolved_id, days)
+
+    COIN_INDEX_RANK_PAGES = 4 # Market-cap ranks for the top 1000 coins
+
+    async def refresh_coin_index(self, force: bool = False) -> int:
+        """
+        Rebuilds the coin index from /coins/list plus market-cap ranks, at most
+        once a day unless forced. Returns the number of coins indexed.
+        """
+        if not force and await coin_index.ensure_loaded() and coin_index.is_fresh():
+            return len(coin_index)
+
+        async def fetch():
+            resp = await self._coingecko_get(f"{self.BASE_URL}/coins/list")
+            resp.raise_for_status()
+            coins = {c["id"]: {"id": c["id"], "symbol": c.get("symbol"), "name": c.get("name"), "rank": None} for c in resp.json()}
+
+            for page in range(1, self.COIN_INDEX_RANK_PAGES + 1):
+                params = {"vs_currency": "usd", "order": "market_cap_desc", "per_page": self.MARKETS_BATCH_SIZE, "page": page}
+                resp = await self._coingecko_get(f"{self.BASE_URL}/coins/markets", params=params)
+                if resp.status_code != 200:
+                    break
+                for row in resp.json():
+                    if row.get("id") in coins:
+                        coins[row["id"]]["rank"] = row.get("market_cap_rank")
+
+            await coin_index.load(list(coins.values()))
+            return len(coins)
+
+        return await self.inflight.do(coin_index.CACHE_KEY, fetch)
 
     async def get_coin_data(self, coin_id: str, force_refresh: bool = False, background_tasks = None) -> Dict[str, Any]:
         resolved_id = await self.resolve_symbol(coin_id)
         cache_key = f"market:kpi:{resolved_id}"
+        self._record_demand(resolved_id)
         
         async def fetch():
             url = f"{self.BASE_URL}/coins/{resolved_id}"
@@ -94,163 +245,414 @@ class MarketService:
                 "localization": "false", "tickers": "false", "market_data": "true",
                 "community_data": "false", "developer_data": "false", "sparkline": "false"
             }
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                resp = await client.get(url, params=params)
-                
-                # Explicit Retry Triggers
-                if resp.status_code == 429 or resp.status_code >= 500:
-                    raise ConnectionError(f"Retryable Error: {resp.status_code}") 
-                
-                resp.raise_for_status()
-                
-                data = resp.json()
-                market = data.get("market_data", {})
-                return {
-                    "name": data.get("name"),
-                    "symbol": data.get("symbol"),
-                    "current_price_usd": market.get("current_price", {}).get("usd"),
-                    "market_cap_usd": market.get("market_cap", {}).get("usd"),
-                    "price_change_percentage_24h": market.get("price_change_percentage_24h"),
-                    "total_volume_usd": market.get("total_volume", {}).get("usd"),
-                    "high_24h": market.get("high_24h", {}).get("usd"),
-                    "low_24h": market.get("low_24h", {}).get("usd"),
-                    "last_updated": market.get("last_updated")
-                }
+            resp = await self._coingecko_get(url, params=params)
+            
+            # Explicit Retry Triggers
+            if resp.status_code == 429 or resp.status_code >= 500:
+                raise ConnectionError(f"Retryable Error: {resp.status_code}") 
+            
+            resp.raise_for_status()
+            
+            data = resp.json()
+            market = data.get("market_data", {})
+            return {
+                "name": data.get("name"),
+                "symbol": data.get("symbol"),
+                "current_price_usd": market.get("current_price", {}).get("usd"),
+                "market_cap_usd": market.get("market_cap", {}).get("usd"),
+                "price_change_percentage_24h": market.get("price_change_percentage_24h"),
+                "total_volume_usd": market.get("total_volume", {}).get("usd"),
+                "high_24h": market.get("high_24h", {}).get("usd"),
+                "low_24h": market.get("low_24h", {}).get("usd"),
+                "last_updated": market.get("last_updated")
+            }
 
         return await self._get_cached_or_fetch(cache_key, fetch, force_refresh=force_refresh, background_tasks=background_tasks)
 
+    def _kpi_from_markets_row(self, coin: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Maps a /coins/markets row onto the same KPI shape get_coin_data caches.
+        """
+        return {
+            "name": coin.get("name"),
+            "symbol": coin.get("symbol"),
+            "current_price_usd": coin.get("current_price"),
+            "market_cap_usd": coin.get("market_cap"),
+            "price_change_percentage_24h": coin.get("price_change_percentage_24h"),
+            "total_volume_usd": coin.get("total_volume"),
+            "high_24h": coin.get("high_24h"),
+            "low_24h": coin.get("low_24h"),
+            "last_updated": coin.get("last_updated")
+        }
+
+    async def _fetch_kpi_batch(self, coin_ids: List[str], ttl: int = 600) -> Dict[str, Dict[str, Any]]:
+        """
+        One /coins/markets?ids= call for up to 250 ids, fanned out into market:kpi:{id}.
+        """
+        @upstream_retry
+        async def fetch():
+            url = f"{self.BASE_URL}/coins/markets"
+            params = {
+                "vs_currency": "usd",
+                "ids": ",".join(coin_ids),
+                "per_page": self.MARKETS_BATCH_SIZE,
+                "page": 1,
+                "sparkline": "false"
+            }
+            resp = await self._coingecko_get(url, params=params)
+            
+            # Explicit Retry Triggers
+            if resp.status_code == 429 or resp.status_code >= 500:
+                raise ConnectionError(f"Retryable Error: {resp.status_code}")
+            
+            resp.raise_for_status()
+            return resp.json()
+
+        try:
+            rows = await fetch()
+        except Exception as e:
+            logger.error(f"MarketService: Batch KPI fetch failed for {len(coin_ids)} ids: {e}")
+            return {coin_id: {"error": "External API Unavailable (Max Retries Exceeded)"} for coin_id in coin_ids}
+
+        results = {}
+        for coin in rows:
+            results[coin.get("id")] = self._kpi_from_markets_row(coin)
+        await self.cache.set_many(
+            {f"market:kpi:{coin_id}": kpi for coin_id, kpi in results.items()},
+            ttl, soft_ttl=ttl * self.SOFT_TTL_RATIO
+        )
+
+        for coin_id in coin_ids:
+            if coin_id not in results:
+                results[coin_id] = {"error": "Asset not found"}
+        return results
+
+    async def get_coin_data_many(self, coin_ids: List[str], force_refresh: bool = False) -> Dict[str, Dict[str, Any]]:
+        """
+        Batched KPI lookup keyed by the requested ids.
+        Cache hits are served from market:kpi:{id}; only the misses go upstream,
+        in one /coins/markets call per 250 ids instead of one /coins/{id} call each.
+        """
+        resolved = {coin_id: await self.resolve_symbol(coin_id) for coin_id in coin_ids}
+        unique_ids = list(dict.fromkeys(resolved.values()))
+        for resolved_id in unique_ids:
+            self._record_demand(resolved_id)
+
+        found: Dict[str, Dict[str, Any]] = {}
+        stale = []
+        entries = {} if force_refresh else await self.cache.get_many_entries([f"market:kpi:{i}" for i in unique_ids])
+        for resolved_id in unique_ids:
+            entry = entries.get(f"market:kpi:{resolved_id}")
+            if entry and entry["data"]:
+                found[resolved_id] = entry["data"]
+                if self.cache.is_stale(entry):
+                    stale.append(resolved_id)
+        missing = [resolved_id for resolved_id in unique_ids if resolved_id not in found]
+
+        # Stale hits are served now and refreshed together in the background
+        for start in range(0, len(stale), self.MARKETS_BATCH_SIZE):
+            chunk = stale[start:start + self.MARKETS_BATCH_SIZE]
+            self._refresh_detached("market:kpi-batch:" + ",".join(sorted(chunk)), lambda chunk=chunk: self._fetch_kpi_batch(chunk))
+
+        for start in range(0, len(missing), self.MARKETS_BATCH_SIZE):
+            chunk = missing[start:start + self.MARKETS_BATCH_SIZE]
+            flight_key = "market:kpi-batch:" + ",".join(sorted(chunk))
+            found.update(await self.inflight.do(flight_key, lambda chunk=chunk: self._fetch_kpi_batch(chunk)))
+
+        return {coin_id: found[resolved_id] for coin_id, resolved_id in resolved.items()}
+
+    # Indicator helpers (single-series wrappers around app.services.indicators)
     def calculate_sma(self, prices: List[float], window: int = 20) -> List[Optional[float]]:
         if not prices:
             return []
-        import pandas as pd
-        series = pd.Series(prices)
-        sma = series.rolling(window=window).mean()
-        # Replace NaN with None for JSON compatibility
-        return [None if pd.isna(x) else x for x in sma.tolist()]
+        return to_json_list(indicators.rolling_mean(indicators.as_price_array(prices), window))
 
     def calculate_rsi(self, prices: List[float], period: int = 14) -> List[Optional[float]]:
         if not prices:
             return []
-        import pandas as pd
-        
-        series = pd.Series(prices)
-        delta = series.diff()
-        
-        gain = delta.clip(lower=0)
-        loss = -delta.clip(upper=0)
-        
-        avg_gain = gain.rolling(window=period).mean()
-        avg_loss = loss.rolling(window=period).mean()
-        
-        rs = avg_gain / avg_loss
-        rsi = 100 - (100 / (1 + rs))
-        
-        # Replace NaN with None for JSON compatibility
-        return [None if pd.isna(x) else x for x in rsi.tolist()]
+        return to_json_list(indicators.rsi(indicators.as_price_array(prices), period))
 
     def calculate_ema(self, prices: List[float], span: int = 20) -> List[Optional[float]]:
         if not prices:
             return []
-        import pandas as pd
-        series = pd.Series(prices)
-        ema = series.ewm(span=span, adjust=False).mean()
-        # Replace NaN with None for JSON compatibility
-        return [None if pd.isna(x) else x for x in ema.tolist()]
+        return to_json_list(indicators.ema(indicators.as_price_array(prices), span))
 
     def calculate_macd(self, prices: List[float]) -> Dict[str, Any]:
         if not prices: 
             return {"macd": [], "signal": [], "histogram": [], "trend": "Neutral"}
-        import pandas as pd
-        series = pd.Series(prices)
+        result = compute_indicators(prices)
+        return {
+            "macd": to_json_list(result["macd"]),
+            "signal": to_json_list(result["macd_signal"]),
+            "histogram": to_json_list(result["macd_histogram"]),
+            "trend": result["trend"]
+        }
+
+    # Parallel per-point series stored in a cached chart payload
+    INDICATOR_SERIES = ["sma", "ema", "rsi", "macd", "macd_signal", "macd_histogram"]
+    CHART_SERIES = ["timestamps", "values"] + INDICATOR_SERIES
+    CHART_AXES = ["labels", "epoch"]
+
+    def _chart_labels(self, timestamps: List[int], days: str) -> List[str]:
+        """
+        Display labels ('%b %d', or '%b %Y' for long ranges) for epoch-ms timestamps, in UTC.
+        Each distinct day is formatted once and broadcast back over the points.
+        """
+        if not timestamps:
+            return []
+        fmt = '%b %d' if days in ["1", "7", "30", "90"] else '%b %Y'
+        day_index = np.asarray(timestamps, dtype=np.int64) // 86_400_000
+        unique_days, inverse = np.unique(day_index, return_inverse=True)
+        formatted = np.array([
+            datetime.datetime.fromtimestamp(int(d) * 86_400, tz=datetime.timezone.utc).strftime(fmt)
+            for d in unique_days
+        ])
+        return formatted[inverse].tolist()
+
+    def _with_axis(self, chart: Optional[Dict[str, Any]], days: str, axis: str) -> Optional[Dict[str, Any]]:
+        """
+        Cached charts carry only epoch-ms `timestamps`; string labels are added on request.
+        """
+        if axis != "labels" or not isinstance(chart, dict) or "timestamps" not in chart:
+            return chart
+        return {**chart, "labels": self._chart_labels(chart["timestamps"], days)}
+
+    def _build_chart(self, prices: List[List[float]], days: str) -> Tuple[Dict[str, Any], IndicatorState]:
+        """
+        Full computation of a chart payload from [ts, price] points,
+        plus the indicator state needed to extend it incrementally later.
+        """
+        timestamps = [int(p[0]) for p in prices]
+        values = [p[1] for p in prices]
         
-        ema12 = series.ewm(span=12, adjust=False).mean()
-        ema26 = series.ewm(span=26, adjust=False).mean()
+        # Calculate all indicators in one pass over the price buffer
+        result = compute_indicators(values)
+
+        state = IndicatorState.seed(
+            values,
+            ema=float(result["ema"][-1]),
+            ema_fast=float(result["ema_fast"][-1]),
+            ema_slow=float(result["ema_slow"][-1]),
+            signal=float(result["macd_signal"][-1]),
+            last_ts=timestamps[-1],
+            prev_macd=float(result["macd"][-2]) if len(values) >= 2 else None,
+            prev_signal=float(result["macd_signal"][-2]) if len(values) >= 2 else None
+        )
+        
+        chart = {
+            "timestamps": timestamps,
+            "values": values,
+            **{key: to_json_list(result[key]) for key in self.INDICATOR_SERIES},
+            "signal_type": result["trend"]
+        }
+        return chart, state
+
+    async def _extend_chart(self, resolved_id: str, days: str, cached: Dict[str, Any], state: IndicatorState) -> Optional[Dict[str, Any]]:
+        """
+        Incremental refresh: fetches only the window since the last cached point,
+        appends it using the carried indicator state and evicts points that fell
+        out of the range. Like a full fetch, the chart ends with the latest price:
+        when it is newer than the last step-aligned point it is added as a
+        provisional point, computed on a copy of the state and replaced by the
+        next refresh. Returns None when a full refetch is needed instead.
+        """
+        timestamps = cached.get("timestamps") or []
+        committed = len(timestamps)
+        if committed >= 2 and timestamps[-1] != state.last_ts and timestamps[-2] == state.last_ts:
+            committed -= 1 # Drop the previous provisional point
+        if not timestamps or timestamps[committed - 1] != state.last_ts:
+            return None
+
+        now_ms = int(time.time() * 1000)
+        step_ms = chart_granularity_ms(days)
+        range_ms = chart_range_ms(days)
+        last_ts = timestamps[committed - 1]
+
+        # Too far behind (e.g. after downtime): a full fetch is cheaper than a huge window
+        if now_ms - last_ts > (range_ms or 30 * 86_400_000) * self.INCREMENTAL_MAX_GAP:
+            return None
+
+        url = f"{self.BASE_URL}/coins/{resolved_id}/market_chart/range"
+        params = {"vs_currency": "usd", "from": last_ts // 1000 + 1, "to": now_ms // 1000}
+        resp = await self._coingecko_get(url, params=params)
         
-        macd = ema12 - ema26
-        signal = macd.ewm(span=9, adjust=False).mean()
-        histogram = macd - signal
+        # Explicit Retry Triggers
+        if resp.status_code == 429 or resp.status_code >= 500:
+            raise ConnectionError(f"Retryable Error: {resp.status_code}")
         
-        # Signal Detection
-        trend = "Neutral"
-        if len(macd) >= 2 and len(signal) >= 2:
-            # Check last completed candle logic or current? Using -1 as current.
-            # Bullish: MACD crosses Signal form below
-            if macd.iloc[-1] > signal.iloc[-1] and macd.iloc[-2] <= signal.iloc[-2]:
-                trend = "Bullish Crossover"
-            # Bearish: MACD crosses Signal from above
-            elif macd.iloc[-1] < signal.iloc[-1] and macd.iloc[-2] >= signal.iloc[-2]:
-                trend = "Bearish Crossover"
-            # Continuation
-            elif macd.iloc[-1] > signal.iloc[-1]:
-                trend = "Bullish"
-            elif macd.iloc[-1] < signal.iloc[-1]:
-                trend = "Bearish"
+        resp.raise_for_status()
 
-        return {
-            "macd": [None if pd.isna(x) else x for x in macd.tolist()],
-            "signal": [None if pd.isna(x) else x for x in signal.tolist()],
-            "histogram": [None if pd.isna(x) else x for x in histogram.tolist()],
-            "trend": trend
-        }
+        # The window may come back finer-grained than the cached series
+        prices = resp.json().get("prices", [])
+        new_points = thin_points(prices, last_ts, step_ms)
+        latest = prices[-1] if prices and prices[-1][0] > (new_points[-1][0] if new_points else last_ts) else None
+        if not new_points and latest is None:
+            return cached
+
+        chart = {key: list(cached.get(key, []))[:committed] for key in self.CHART_SERIES}
+
+        def append(ts, price, row):
+            chart["timestamps"].append(int(ts))
+            chart["values"].append(price)
+            for key, value in row.items():
+                chart[key].append(value)
+
+        for ts, price in new_points:
+            append(ts, price, state.update(price, ts=int(ts)))
+        trend = state.trend()
+        if latest is not None:
+            provisional = IndicatorState.from_dict(state.to_dict())
+            append(latest[0], latest[1], provisional.update(latest[1]))
+            trend = provisional.trend()
+
+        # Evict points older than the range so the window stays fixed
+        if range_ms:
+            cutoff = now_ms - range_ms
+            first = next((i for i, ts in enumerate(chart["timestamps"]) if ts >= cutoff), 0)
+            if first:
+                chart = {key: values[first:] for key, values in chart.items()}
+
+        chart["signal_type"] = trend
+        logger.info(f"MarketService: Appended {len(new_points)} points to {resolved_id}:{days} chart")
+        return chart
+
+    def _chart_key(self, resolved_id: str, days: str) -> str:
+        # v5: labels are no longer stored, only epoch-ms timestamps
+        return f"market:chart:{resolved_id}:{days}:v5"
+
+    async def _derive_chart(self, resolved_id: str, days: str) -> Optional[Tuple[Dict[str, Any], IndicatorState, float]]:
+        """
+        Serves a shorter range from a cached longer one instead of calling CoinGecko.
+        The source must be fresh (within its soft TTL), at least as fine-grained as
+        CoinGecko would return for `days` (5-minute / hourly / daily) and must cover
+        the whole requested range. Indicators are recomputed over the slice plus
+        warm-up points; the source's fetch time is returned with the chart.
+        """
+        range_ms = chart_range_ms(days)
+        if range_ms is None:
+            return None # 'max' has nothing longer to derive from
+        step_ms = chart_granularity_ms(days)
+
+        candidates = [
+            source_days for source_days in self.CHART_RANGES
+            if (chart_range_ms(source_days) is None or chart_range_ms(source_days) > range_ms)
+            and chart_granularity_ms(source_days) <= step_ms
+        ]
+        # Every candidate range in one round-trip
+        entries = await self.cache.get_many_entries([self._chart_key(resolved_id, d) for d in candidates])
 
-    async def get_market_chart(self, coin_id: str, days: str = "30", force_refresh: bool = False, background_tasks = None) -> Optional[Dict[str, Any]]:
+        for source_days in candidates:
+            source_step = chart_granularity_ms(source_days)
+            entry = entries.get(self._chart_key(resolved_id, source_days))
+            if not entry or entry["fetched_at"] is None or self.cache.is_stale(entry):
+                continue # Only as fresh as the source: a stale one needs its own refresh
+            source = entry["data"]
+            timestamps = (source or {}).get("timestamps")
+            if not timestamps:
+                continue
+            cutoff = timestamps[-1] - range_ms
+            if timestamps[0] > cutoff + step_ms:
+                continue # Source does not reach back far enough
+
+            start = next(i for i, ts in enumerate(timestamps) if ts >= cutoff)
+            warm = max(0, start - self.DERIVE_WARMUP * (step_ms // source_step))
+            points = [[ts, price] for ts, price in zip(timestamps[warm:], source["values"][warm:])]
+            if source_step < step_ms:
+                points = [points[0]] + thin_points(points[1:], points[0][0], step_ms)
+
+            chart, state = self._build_chart(points, days)
+            first = next(i for i, ts in enumerate(chart["timestamps"]) if ts >= cutoff)
+            chart = {key: (value[first:] if key in self.CHART_SERIES else value) for key, value in chart.items()}
+            logger.info(f"MarketService: Derived {resolved_id}:{days} chart from cached {source_days}-day range")
+            return chart, state, entry["fetched_at"]
+
+        return None
+
+    async def get_market_chart(self, coin_id: str, days: str = "30", force_refresh: bool = False, background_tasks = None, axis: str = "labels") -> Optional[Dict[str, Any]]:
+        """
+        Price chart with indicators. `axis="labels"` adds formatted date labels
+        next to the epoch-ms `timestamps`; `axis="epoch"` returns timestamps only.
+        """
         resolved_id = await self.resolve_symbol(coin_id)
-        # Updated cache key version to v4 to support MACD
-        cache_key = f"market:chart:{resolved_id}:{days}:v4"
+        cache_key = self._chart_key(resolved_id, days)
+        state_key = f"{cache_key}:state"
+        ttl = 600
+        self._record_demand(resolved_id, days)
         
         async def fetch():
+            # Shorter ranges are sliced from a fresh cached longer range when possible;
+            # forced refreshes (scheduler) always go upstream
+            derived = None if force_refresh else await self._derive_chart(resolved_id, days)
+            if derived:
+                chart, state, fetched_at = derived
+                await self.cache.set(state_key, state.to_dict(), ttl)
+                return Derived(chart, fetched_at)
+
+            # Refreshes of a cached chart only fetch the new tail
+            stored = await self.cache.get_many([cache_key, state_key])
+            cached, state_data = stored.get(cache_key), stored.get(state_key)
+            if cached and state_data:
+                state = IndicatorState.from_dict(state_data)
+                chart = await self._extend_chart(resolved_id, days, cached, state)
+                if chart is not None:
+                    await self.cache.set(state_key, state.to_dict(), ttl)
+                    return chart
+
             url = f"{self.BASE_URL}/coins/{resolved_id}/market_chart"
             params = {"vs_currency": "usd", "days": days}
             
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                resp = await client.get(url, params=params)
-                
-                # Explicit Retry Triggers
-                if resp.status_code == 429 or resp.status_code >= 500:
-                    raise ConnectionError(f"Retryable Error: {resp.status_code}")
-                
-                resp.raise_for_status()
-                
-                data = resp.json()
-                prices = data.get("prices", [])
-                
-                if not prices: 
-                    return {"labels": [], "values": [], "sma": [], "rsi": [], "ema": [], "macd": []}
-                    
-                labels, values = [], []
-                for p in prices:
-                    ts = p[0] / 1000 
-                    dt = datetime.datetime.fromtimestamp(ts)
-                    date_str = dt.strftime('%b %d') if days in ["1", "7", "30", "90"] else dt.strftime('%b %Y')
-                    labels.append(date_str)
-                    values.append(p[1])
-                
-                # Calculate Indicators
-                sma = self.calculate_sma(values)
-                ema = self.calculate_ema(values)
-                rsi = self.calculate_rsi(values)
-                macd_data = self.calculate_macd(values)
-                
-                return {
-                    "labels": labels, 
-                    "values": values,
-                    "sma": sma,
-                    "ema": ema,
-                    "rsi": rsi,
-                    "macd": macd_data["macd"],
-                    "macd_signal": macd_data["signal"],
-                    "macd_histogram": macd_data["histogram"],
-                    "signal_type": macd_data["trend"]
-                }
+            resp = await self._coingecko_get(url, params=params)
+            
+            # Explicit Retry Triggers
+            if resp.status_code == 429 or resp.status_code >= 500:
+                raise ConnectionError(f"Retryable Error: {resp.status_code}")
+            
+            resp.raise_for_status()
+            
+            data = resp.json()
+            prices = data.get("prices", [])
+            
+            if not prices: 
+                return {"timestamps": [], "values": [], "sma": [], "rsi": [], "ema": [], "macd": []}
 
-        return await self._get_cached_or_fetch(cache_key, fetch, force_refresh=force_refresh, background_tasks=background_tasks)
+            chart, state = self._build_chart(prices, days)
+            await self.cache.set(state_key, state.to_dict(), ttl)
+            return chart
+
+        chart = await self._get_cached_or_fetch(cache_key, fetch, ttl=ttl, force_refresh=force_refresh, background_tasks=background_tasks)
+        return self._with_axis(chart, days, axis)
+
+    async def get_market_charts(self, coin_ids: List[str], days: str = "30", axis: str = "labels") -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Charts for several assets keyed by the requested ids. Cached charts are
+        read in one MGET; only the misses go through get_market_chart, concurrently
+        (bounded by COMPARISON_CONCURRENCY).
+        """
+        resolved = {coin_id: await self.resolve_symbol(coin_id) for coin_id in coin_ids}
+        keys = {resolved_id: self._chart_key(resolved_id, days) for resolved_id in set(resolved.values())}
+        entries = await self.cache.get_many_entries(list(keys.values()))
+
+        charts: Dict[str, Optional[Dict[str, Any]]] = {}
+        for resolved_id, key in keys.items():
+            entry = entries.get(key)
+            if entry and entry["data"]:
+                self._record_demand(resolved_id, days) # Misses are counted by get_market_chart below
+                charts[resolved_id] = self._with_axis(entry["data"], days, axis)
+                if self.cache.is_stale(entry):
+                    self._refresh_detached(f"{key}:batch-refresh", lambda resolved_id=resolved_id: self.get_market_chart(resolved_id, days, force_refresh=True, axis="epoch"))
+        semaphore = asyncio.Semaphore(settings.COMPARISON_CONCURRENCY)
+
+        async def fetch_missing(resolved_id: str):
+            async with semaphore:
+                charts[resolved_id] = await self.get_market_chart(resolved_id, days, axis=axis)
+
+        await asyncio.gather(*(fetch_missing(resolved_id) for resolved_id in keys if resolved_id not in charts))
+
+        return {coin_id: charts[resolved_id] for coin_id, resolved_id in resolved.items()}
 
     def calculate_volatility(self, prices: List[float]) -> float:
         if not prices or len(prices) < 2: return 0.0
-        import pandas as pd
-        series = pd.Series(prices)
-        pct_change = series.pct_change()
-        return pct_change.std() * 100 # percentage
+        return indicators.volatility(prices) # percentage
 
     def calculate_market_health(self, chart_data: Dict, kpi_data: Dict, heatmap_data: List[Dict]) -> Dict[str, Any]:
         """
@@ -330,7 +732,7 @@ class MarketService:
             }
         }
 
-    async def get_market_data(self, symbol: str, days: str = "30", force_refresh: bool = False, background_tasks = None):
+    async def get_market_data(self, symbol: str, days: str = "30", force_refresh: bool = False, background_tasks = None, axis: str = "labels"):
         """
         Coordinates fetching KPI, Chart, and Health Score.
         """
@@ -338,31 +740,9 @@ class MarketService:
         if symbol.startswith("demo-"):
             mock_base, mock_prices = get_mock_data(symbol)
             if mock_base and mock_prices:
-                # Process Chart
-                values = [p[1] for p in mock_prices] # prices
-                labels = []
-                for p in mock_prices:
-                    ts = p[0] / 1000
-                    dt = datetime.datetime.fromtimestamp(ts)
-                    labels.append(dt.strftime('%b %d'))
-                
-                # Calculate Indicators
-                sma = self.calculate_sma(values)
-                ema = self.calculate_ema(values)
-                rsi = self.calculate_rsi(values)
-                macd_data = self.calculate_macd(values)
-                
-                chart_data = {
-                    "labels": labels,
-                    "values": values,
-                    "sma": sma,
-                    "ema": ema,
-                    "rsi": rsi,
-                    "macd": macd_data["macd"],
-                    "macd_signal": macd_data["signal"],
-                    "macd_histogram": macd_data["histogram"],
-                    "signal_type": macd_data["trend"]
-                }
+                # Process Chart (demo labels are always day-formatted)
+                chart_data, _ = self._build_chart(mock_prices, "30")
+                chart_data = self._with_axis(chart_data, "30", axis)
                 
                 return {
                     "kpi": mock_base["kpi"],
@@ -374,7 +754,7 @@ class MarketService:
         
         # 1. Fetch Core Data
         kpi_task = self.get_coin_data(symbol, force_refresh, background_tasks)
-        chart_task = self.get_market_chart(symbol, days, force_refresh, background_tasks)
+        chart_task = self.get_market_chart(symbol, days, force_refresh, background_tasks, axis=axis)
         heatmap_task = self.get_market_heatmap(limit=50, background_tasks=background_tasks)
         
         kpi, chart, heatmap = await asyncio.gather(kpi_task, chart_task, heatmap_task)
@@ -388,17 +768,59 @@ class MarketService:
             "market_score": health
         }
 
+    BATCH_FIELDS = ["kpi", "chart", "score"]
+
+    async def get_market_batch(self, coin_ids: List[str], days: str = "30", fields: List[str] = None, axis: str = "labels") -> Dict[str, Any]:
+        """
+        Market data for several assets in one pass, keyed by the requested ids.
+        KPIs come from one MGET plus one /coins/markets call for the misses; charts
+        and the shared heatmap are only read when `chart` or `score` is requested.
+        """
+        fields = [f for f in (fields or ["kpi"]) if f in self.BATCH_FIELDS]
+        coin_ids = list(dict.fromkeys(coin_ids))
+
+        kpis = await self.get_coin_data_many(coin_ids)
+        charts: Dict[str, Any] = {}
+        heatmap: List[Dict[str, Any]] = []
+        if "chart" in fields or "score" in fields:
+            charts = await self.get_market_charts(coin_ids, days, axis=axis)
+        if "score" in fields:
+            heatmap = await self.get_market_heatmap(limit=50)
+
+        assets = {}
+        for coin_id in coin_ids:
+            kpi = kpis.get(coin_id) or {"error": "Market data unavailable"}
+            if "error" in kpi:
+                assets[coin_id] = {"error": kpi["error"]}
+                continue
+            chart = charts.get(coin_id)
+            asset = {}
+            if "kpi" in fields:
+                asset["kpi"] = kpi
+            if "chart" in fields:
+                asset["chart_data"] = chart
+            if "score" in fields:
+                asset["market_score"] = self.calculate_market_health(chart, kpi, heatmap)
+            assets[coin_id] = asset
+
+        return {"days": days, "fields": fields, "assets": assets}
+
     async def search_coin(self, search_term: str) -> Optional[str]:
+        # Local index first: exact, prefix, then typo-tolerant
+        if await coin_index.ensure_loaded():
+            found = coin_index.lookup(search_term)
+            if found:
+                return found
+
         cache_key = f"market:search:{search_term.lower()}"
         
         async def fetch():
             url = f"{self.BASE_URL}/search"
             params = {"query": search_term}
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                resp = await client.get(url, params=params)
-                if resp.status_code == 200:
-                    coins = resp.json().get("coins", [])
-                    if coins: return coins[0]["id"]
+            resp = await self._coingecko_get(url, params=params, timeout=5.0)
+            if resp.status_code == 200:
+                coins = resp.json().get("coins", [])
+                if coins: return coins[0]["id"]
             return None
 
         # Search results cached for 1 hour
@@ -410,18 +832,18 @@ class MarketService:
         
         async def fetch():
             url = f"https://api.exchangerate-api.com/v4/latest/{base.upper()}"
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                resp = await client.get(url)
-                if resp.status_code == 200:
-                    data = resp.json()
-                    rate = data.get("rates", {}).get(target.upper())
-                    if rate:
-                        return {
-                            "base": base.upper(),
-                            "target": target.upper(),
-                            "rate": rate,
-                            "timestamp": data.get("time_last_updated")
-                        }
+            client = http_clients.get("exchangerate")
+            resp = await client.get(url)
+            if resp.status_code == 200:
+                data = resp.json()
+                rate = data.get("rates", {}).get(target.upper())
+                if rate:
+                    return {
+                        "base": base.upper(),
+                        "target": target.upper(),
+                        "rate": rate,
+                        "timestamp": data.get("time_last_updated")
+                    }
             return None
             
         return await self._get_cached_or_fetch(cache_key, fetch, ttl=3600)
@@ -452,80 +874,240 @@ class MarketService:
     async def get_comparison_data(self, symbols: List[str], range_days: str = "30", background_tasks = None) -> Dict[str, Any]:
         """
         Fetches and normalizes market data for multiple assets for comparison.
+        Charts are fetched concurrently, resampled onto one shared time grid and
+        normalised to percent returns from the first grid point.
         """
+        symbols = list(dict.fromkeys(symbols))
+        if len(symbols) > settings.COMPARISON_MAX_SYMBOLS:
+            raise ValueError(f"At most {settings.COMPARISON_MAX_SYMBOLS} symbols can be compared")
+
+        charts = await self.get_market_charts(symbols, days=range_days, axis="epoch")
+        usable = {symbol: chart for symbol, chart in charts.items() if isinstance(chart, dict) and chart.get("values")}
+        names, grid, prices = align_series(usable, chart_granularity_ms(range_days))
+        normalized = normalised_returns(prices)
+
+        timestamps = grid.tolist()
+        labels = self._chart_labels(timestamps, range_days)
         datasets = []
-        for symbol in symbols:
-            # We reuse get_market_chart but without force_refresh to leverage cache
-            # We rely on stale-while-revalidate within get_market_chart if passed background_tasks
-            # But get_market_chart signature needs to update to accept background_tasks to fully utilize it.
-            # For now, we just call it.
-            chart = await self.get_market_chart(symbol, days=range_days)
-            if not chart or not chart.get("values"):
-                continue
-            
-            prices = chart["values"]
-            labels = chart["labels"]
-            
-            # Normalize: (price / start_price - 1) * 100
-            if not prices: continue
-            start_price = prices[0]
-            if start_price == 0: continue # Avoid div by zero
-            
-            normalized = [((p / start_price) - 1) * 100 for p in prices]
-            
+        for row, symbol in enumerate(names):
+            if np.isnan(normalized[row]).all() and normalized.shape[1]:
+                continue # Zero starting price
             datasets.append({
                 "name": symbol.upper(),
-                "values": normalized,
-                "original_values": prices,
+                "values": to_json_list(normalized[row]),
+                "original_values": prices[row].tolist(),
                 "labels": labels
             })
             
         return {
             "mode": "comparison",
             "range": range_days,
+            "timestamps": timestamps,
+            "labels": labels,
             "datasets": datasets
         }
 
-    async def get_market_heatmap(self, limit: int = 10, background_tasks = None) -> List[Dict[str, Any]]:
+    def _universe_key(self) -> str:
+        return f"market:universe:{settings.MARKET_UNIVERSE_SIZE}"
+
+    async def get_market_universe(self, force_refresh: bool = False, background_tasks = None) -> Dict[str, List[Any]]:
         """
-        Fetches top coins for heatmap visualization.
+        Top MARKET_UNIVERSE_SIZE coins by market cap as columns
+        ({"id": [...], "price": [...], ...}, market-cap order), fetched as
+        concurrent /coins/markets pages and cached as one entry. Every heatmap
+        size, sort and filter is served from it.
         """
-        cache_key = f"market:heatmap:{limit}"
-        
-        async def fetch():
+        size = settings.MARKET_UNIVERSE_SIZE
+        pages = -(-size // self.MARKETS_BATCH_SIZE)
+
+        async def fetch_page(page: int) -> List[Dict[str, Any]]:
             url = f"{self.BASE_URL}/coins/markets"
             params = {
                 "vs_currency": "usd",
                 "order": "market_cap_desc",
-                "per_page": limit,
-                "page": 1,
+                "per_page": min(size, self.MARKETS_BATCH_SIZE),
+                "page": page,
                 "sparkline": "false"
             }
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                resp = await client.get(url, params=params)
-                
-                # Explicit Retry Triggers
-                if resp.status_code == 429 or resp.status_code >= 500:
-                    raise ConnectionError(f"Retryable Error: {resp.status_code}")
-                
-                if resp.status_code != 200:
-                    return []
+            resp = await self._coingecko_get(url, params=params)
 
-                data = resp.json()
-                return [
-                    {
-                        "id": coin.get("id"),
-                        "symbol": coin.get("symbol", "").upper(),
-                        "name": coin.get("name"),
-                        "price": coin.get("current_price"),
-                        "change_24h": coin.get("price_change_percentage_24h"),
-                        "market_cap": coin.get("market_cap"),
-                        "volume": coin.get("total_volume")
-                    } for coin in data
-                ]
-
-        # Heatmap cached for 5 minutes (300s)
-        return await self._get_cached_or_fetch(cache_key, fetch, ttl=300, background_tasks=background_tasks)
+            # Explicit Retry Triggers
+            if resp.status_code == 429 or resp.status_code >= 500:
+                raise ConnectionError(f"Retryable Error: {resp.status_code}")
+
+            if resp.status_code != 200:
+                return []
+            return resp.json()
+
+        async def fetch():
+            rows = [coin for page in await asyncio.gather(*(fetch_page(p) for p in range(1, pages + 1))) for coin in page][:size]
+            if not rows:
+                # Every page refused (401/403/404...): an error dict is not cached
+                return {"error": "Market universe unavailable"}
+            return {
+                "id": [coin.get("id") for coin in rows],
+                "symbol": [(coin.get("symbol") or "").upper() for coin in rows],
+                "name": [coin.get("name") for coin in rows],
+                "price": [coin.get("current_price") for coin in rows],
+                "change_24h": [coin.get("price_change_percentage_24h") for coin in rows],
+                "market_cap": [coin.get("market_cap") for coin in rows],
+                "volume": [coin.get("total_volume") for coin in rows]
+            }
+
+        # Universe cached for 5 minutes (300s)
+        return await self._get_cached_or_fetch(self._universe_key(), fetch, ttl=300, force_refresh=force_refresh, background_tasks=background_tasks)
+
+    async def get_market_heatmap(self, limit: int = 10, background_tasks = None, sort: str = "market_cap",
+                                 min_volume: Optional[float] = None, min_market_cap: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Fetches top coins for heatmap visualization.
+        Sliced from the cached market universe: `sort` is one of HEATMAP_SORTS,
+        and coins below `min_volume` / `min_market_cap` (USD) are left out.
+        """
+        universe = await self.get_market_universe(background_tasks=background_tasks)
+        if not isinstance(universe, dict) or not universe.get("id"):
+            return []
+
+        cap = np.array(universe["market_cap"], dtype=np.float64)
+        volume = np.array(universe["volume"], dtype=np.float64)
+        change = np.array(universe["change_24h"], dtype=np.float64)
+        order = np.arange(cap.size)
+        if sort == "gainers":
+            order = np.argsort(np.where(np.isnan(change), np.inf, -change), kind="stable")
+        elif sort == "losers":
+            order = np.argsort(np.where(np.isnan(change), np.inf, change), kind="stable")
+        elif sort == "volume":
+            order = np.argsort(np.where(np.isnan(volume), np.inf, -volume), kind="stable")
+
+        keep = np.ones(cap.size, dtype=bool)
+        if min_volume is not None:
+            keep &= volume >= min_volume
+        if min_market_cap is not None:
+            keep &= cap >= min_market_cap
+        if sort in ("gainers", "losers"):
+            keep &= ~np.isnan(change)
+        selected = order[keep[order]][:max(limit, 0)]
+
+        return [
+            {
+                "id": universe["id"][i],
+                "symbol": universe["symbol"][i],
+                "name": universe["name"][i],
+                "price": universe["price"][i],
+                "change_24h": universe["change_24h"][i],
+                "market_cap": universe["market_cap"][i],
+                "volume": universe["volume"][i]
+            } for i in selected.tolist()
+        ]
+
+    async def _screener_features(self, ids: List[str], days: str, background_tasks = None) -> Dict[str, Any]:
+        """
+        Screener features (last RSI, MACD trend, volatility) of every universe
+        asset with a cached `days` chart, as columns keyed by "id". Computed from
+        one MGET of the charts and cached, so requests re-score them against the
+        live 24h changes without decoding hundreds of charts each time.
+        """
+        async def fetch():
+            keys = [self._chart_key(coin_id, days) for coin_id in ids]
+            entries = await self.cache.get_many_entries(keys)
+            rows = [i for i, key in enumerate(keys) if entries.get(key) and entries[key]["data"]]
+            series = [entries[keys[i]]["data"].get("values") or [] for i in rows]
+            feats = screener.features(screener.price_matrix(series))
+            return {
+                "id": [ids[i] for i in rows],
+                "rsi": to_json_list(feats["rsi"]),
+                "trend": feats["trend"].tolist(),
+                "volatility": to_json_list(feats["volatility"])
+            }
+
+        return await self._get_cached_or_fetch(f"market:screener:{days}:v1", fetch,
+                                               ttl=self.SCREENER_FEATURES_TTL, background_tasks=background_tasks)
+
+    async def get_screener(self, days: str = "30", limit: int = 50, sort: str = "score", ascending: bool = False,
+                           min_score: Optional[int] = None, max_score: Optional[int] = None,
+                           min_rsi: Optional[float] = None, max_rsi: Optional[float] = None,
+                           trend: Optional[str] = None, min_volume: Optional[float] = None,
+                           background_tasks = None) -> Dict[str, Any]:
+        """
+        Market Health for the whole cached universe in one vectorised pass
+        (see services/screener.py), ranked by `sort` and filtered.
+        Only charts already in the cache are screened (no upstream calls; the
+        scheduler keeps just the hot assets warm): assets without a cached `days`
+        chart are counted in `missing`, and `coverage` is the screened share.
+        """
+        universe = await self.get_market_universe(background_tasks=background_tasks)
+        if not isinstance(universe, dict) or not universe.get("id"):
+            return {"days": days, "screened": 0, "missing": 0, "coverage": 0.0, "results": []}
+
+        ids = universe["id"]
+        cached = await self._screener_features(ids, days, background_tasks=background_tasks)
+        if not isinstance(cached, dict) or "error" in cached:
+            cached = {"id": [], "rsi": [], "trend": [], "volatility": []}
+        position = {coin_id: j for j, coin_id in enumerate(cached["id"])}
+        rows = [i for i, coin_id in enumerate(ids) if coin_id in position]
+        picked = [position[ids[i]] for i in rows]
+        feats = {
+            "rsi": np.array(cached["rsi"], dtype=np.float64)[picked],
+            "trend": np.array(cached["trend"], dtype=int)[picked],
+            "volatility": np.array(cached["volatility"], dtype=np.float64)[picked]
+        }
+
+        change = np.array(universe["change_24h"], dtype=np.float64)
+        top = change[:50] # Same market backdrop as the per-asset panel (top-50 heatmap)
+        market_change = float(np.nanmean(top)) if np.any(~np.isnan(top)) else 0.0
+        result = screener.score(feats, change[rows], market_change)
+
+        score, rsi, vol = result["score"], result["rsi"], result["volatility"]
+        keep = np.ones(len(rows), dtype=bool)
+        if min_score is not None:
+            keep &= score >= min_score
+        if max_score is not None:
+            keep &= score <= max_score
+        if min_rsi is not None:
+            keep &= rsi >= min_rsi
+        if max_rsi is not None:
+            keep &= rsi <= max_rsi
+        if trend is not None:
+            keep &= result["trend"] == trend
+        if min_volume is not None:
+            keep &= np.array(universe["volume"], dtype=np.float64)[rows] >= min_volume
+
+        columns = {
+            "score": score.astype(np.float64), "rsi": rsi, "volatility": vol, "change_24h": change[rows],
+            "market_cap": np.array(universe["market_cap"], dtype=np.float64)[rows]
+        }
+        key = columns.get(sort, columns["score"])
+        order = np.argsort(np.where(np.isnan(key), np.inf, key if ascending else -key), kind="stable")
+        selected = order[keep[order]][:max(limit, 0)]
+
+        components = np.round(result["components"], 1).tolist()
+        results = []
+        for j in selected.tolist():
+            i = rows[j]
+            results.append({
+                "id": ids[i],
+                "symbol": universe["symbol"][i],
+                "name": universe["name"][i],
+                "price": universe["price"][i],
+                "change_24h": universe["change_24h"][i],
+                "market_cap": universe["market_cap"][i],
+                "volume": universe["volume"][i],
+                "rsi": None if np.isnan(rsi[j]) else round(float(rsi[j]), 2),
+                "trend": str(result["trend"][j]),
+                "volatility": None if np.isnan(vol[j]) else round(float(vol[j]), 2),
+                "score": int(score[j]),
+                "status": str(result["status"][j]),
+                "components": dict(zip(["heatmap", "rsi", "macd", "volatility", "sentiment"], components[j]))
+            })
+
+        return {
+            "days": days,
+            "screened": len(rows),
+            "missing": len(ids) - len(rows),
+            "coverage": round(len(rows) / len(ids), 3),
+            "matched": int(keep.sum()),
+            "results": results
+        }
 
     async def get_chart_explanation(self, symbol: str, days: str = "30", background_tasks = None) -> Dict[str, Any]:
         """
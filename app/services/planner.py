@@ -1,19 +1,17 @@
 import json
 import asyncio
 from typing import Dict, Any
-import google.generativeai as genai
 from app.core.config import get_settings
+from app.core.gemini import genai, generative_model
 from app.utils.logger import logger
 from app.models.schemas import ExecutionPlan, SubTask
 
 settings = get_settings()
-genai.configure(api_key=settings.GEMINI_API_KEY)
 
 class PlannerService:
     def __init__(self):
-        self.model = genai.GenerativeModel(
-            model_name=settings.GEMINI_MODEL,
-            system_instruction="""
+        self._model = None
+        self.system_instruction = """
             You are an expert AI planner.
             Classify user queries to either fetch market data OR general concepts.
             
@@ -40,7 +38,13 @@ class PlannerService:
                 ]
             }
             """
-        )
+
+    @property
+    def model(self):
+        # Built on first use, keeping the Gemini SDK import off the boot path
+        if self._model is None:
+            self._model = generative_model(system_instruction=self.system_instruction)
+        return self._model
 
     async def get_query_intent(self, query: str) -> Dict[str, Any]:
         """
@@ -72,7 +76,7 @@ class PlannerService:
             response = await asyncio.wait_for(
                 self.model.generate_content_async(
                     prompt,
-                    generation_config=genai.GenerationConfig(
+                    generation_config=genai().GenerationConfig(
                         response_mime_type="application/json",
                         temperature=0.1
                     )
@@ -139,7 +143,7 @@ class PlannerService:
             response = await asyncio.wait_for(
                 self.model.generate_content_async(
                     prompt,
-                    generation_config=genai.GenerationConfig(
+                    generation_config=genai().GenerationConfig(
                         response_mime_type="application/json",
                         temperature=0.2
                     )
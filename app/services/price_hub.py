@@ -0,0 +1,292 @@
+import asyncio
+from typing import Dict, Any, List, Optional, Set
+from app.core.config import get_settings
+from app.services.market import MarketService
+from app.services.live_indicators import live_indicators
+from app.utils.logger import logger
+
+try:
+    import msgpack
+except ImportError:  # Optional: JSON frames are always available
+    msgpack = None
+
+settings = get_settings()
+
+# A poll only becomes an update when one of these moved
+CHANGE_FIELDS = ("price", "change_24h")
+# What a multiplexed client receives per coin (full on first sight, then deltas)
+STREAM_FIELDS = ("price", "change_24h", "indicators")
+
+def diff(previous: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Keys of `current` whose values differ from `previous`; nested dicts are diffed too.
+    """
+    changed = {}
+    for key, value in current.items():
+        old = previous.get(key)
+        if isinstance(value, dict) and isinstance(old, dict):
+            nested = diff(old, value)
+            if nested:
+                changed[key] = nested
+        elif value != old:
+            changed[key] = value
+    return changed
+
+def binary_frames_available() -> bool:
+    return msgpack is not None
+
+def encode_frame(frame: Dict[str, Any]) -> bytes:
+    """
+    Compact binary (msgpack) frame for clients that asked for one.
+    """
+    return msgpack.packb(frame, use_bin_type=True)
+
+def decode_frame(data: bytes) -> Any:
+    return msgpack.unpackb(data, raw=False)
+
+class Subscription:
+    """
+    One client's mailbox of pending price updates.
+    The mailbox is bounded: when the client falls behind, the oldest pending
+    update is discarded so the producer never waits and the client always
+    receives the newest price next.
+    """
+    def __init__(self, symbol: str, maxsize: int):
+        self.symbol = symbol
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, maxsize))
+        self.conflated = 0
+
+    def offer(self, update: Dict[str, Any]):
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.conflated += 1
+        self.queue.put_nowait(update)
+
+    async def get(self) -> Dict[str, Any]:
+        return await self.queue.get()
+
+class StreamSession:
+    """
+    A multiplexed client: many symbols over one connection.
+    Pending updates are kept per coin (newest wins), and each batch carries
+    every coin that changed since the last one, so a slow client is
+    conflated rather than queued. Batches are at most `max_rate` per second
+    and carry only the fields that changed since the client last saw the coin.
+    """
+    def __init__(self, hub: "PriceHub", max_symbols: int, batch_window: float, max_rate: float):
+        self.hub = hub
+        self.max_symbols = max_symbols
+        self.batch_window = batch_window
+        self.min_interval = 1.0 / max_rate if max_rate > 0 else 0.0
+        # coin_id -> requested symbols resolving to it ("btc", "bitcoin"): the coin
+        # is released only when the last of its aliases is unsubscribed
+        self.coins: Dict[str, Set[str]] = {}
+        self.pending: Dict[str, Dict[str, Any]] = {}
+        self.sent: Dict[str, Dict[str, Any]] = {}
+        self.conflated = 0
+        self._last_batch = float("-inf")
+        self._ready = asyncio.Event()
+
+    def offer(self, update: Dict[str, Any]):
+        if update["symbol"] in self.pending:
+            self.conflated += 1
+        self.pending[update["symbol"]] = update
+        self._ready.set()
+
+    async def next_batch(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Waits for the next non-empty batch: {coin_id: changed fields}.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._ready.wait()
+            # Pollers tick together; give the other symbols of this tick a moment to land,
+            # and hold bursts back to the client's max rate (newer updates replace pending ones)
+            wait = max(self.batch_window, self._last_batch + self.min_interval - loop.time())
+            if wait > 0:
+                await asyncio.sleep(wait)
+            pending, self.pending = self.pending, {}
+            self._ready.clear()
+
+            batch = {}
+            for coin_id, update in pending.items():
+                fields = {key: update[key] for key in STREAM_FIELDS}
+                delta = diff(self.sent[coin_id], fields) if coin_id in self.sent else fields
+                self.sent[coin_id] = fields
+                if delta:
+                    batch[coin_id] = delta
+            if batch:
+                self._last_batch = loop.time()
+                return batch
+
+    async def subscribe(self, symbols: List[str]) -> Dict[str, str]:
+        """
+        Subscribes to symbols (ids or tickers). Returns {requested: coin_id}.
+        Raises ValueError when the session would exceed max_symbols.
+        """
+        coin_ids = await asyncio.gather(*(self.hub.market.resolve_symbol(s) for s in symbols))
+        resolved = dict(zip(symbols, coin_ids))
+        if len(self.coins.keys() | set(coin_ids)) > self.max_symbols:
+            raise ValueError(f"At most {self.max_symbols} symbols per connection")
+        for symbol, coin_id in resolved.items():
+            if coin_id not in self.coins:
+                self.coins[coin_id] = set()
+                self.hub.attach(coin_id, self)
+            self.coins[coin_id].add(symbol.lower())
+        return resolved
+
+    async def unsubscribe(self, symbols: List[str]) -> List[str]:
+        """
+        Drops symbols; returns the coin ids released (no alias left subscribed).
+        """
+        coin_ids = await asyncio.gather(*(self.hub.market.resolve_symbol(s) for s in symbols))
+        removed = []
+        for symbol, coin_id in zip(symbols, coin_ids):
+            aliases = self.coins.get(coin_id)
+            if aliases is None:
+                continue
+            aliases.discard(symbol.lower())
+            if not aliases:
+                del self.coins[coin_id]
+                self.pending.pop(coin_id, None)
+                self.sent.pop(coin_id, None)
+                self.hub.detach(coin_id, self)
+                removed.append(coin_id)
+        return removed
+
+    def close(self):
+        for coin_id in self.coins:
+            self.hub.detach(coin_id, self)
+        self.coins.clear()
+        self.pending.clear()
+        self.sent.clear()
+
+class PriceHub:
+    """
+    Per-symbol broadcaster for the live price stream.
+    The first subscriber to a symbol starts a single poller task; every update
+    it produces (price plus live indicators, computed once) is pushed to all
+    subscribers of that symbol, but only when the price or 24h change moved.
+    The poller stops when the last subscriber leaves.
+    """
+    def __init__(self, interval: float, queue_size: int):
+        self.interval = interval
+        self.queue_size = queue_size
+        self.market = MarketService()
+        self.subscribers: Dict[str, Set[Any]] = {}
+        self.pollers: Dict[str, asyncio.Task] = {}
+        self.latest: Dict[str, Dict[str, Any]] = {}
+        self.ticks = 0
+        self.unchanged = 0
+
+    async def subscribe(self, symbol: str) -> Subscription:
+        # Aliases ("btc", "bitcoin") share one poller
+        coin_id = await self.market.resolve_symbol(symbol)
+        sub = Subscription(coin_id, self.queue_size)
+        self.attach(coin_id, sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        self.detach(sub.symbol, sub)
+
+    def attach(self, coin_id: str, sub):
+        """
+        Registers any object with an `offer(update)` method for a coin's updates.
+        """
+        self.subscribers.setdefault(coin_id, set()).add(sub)
+
+        # Late joiners get the last update straight away instead of waiting a full interval
+        if coin_id in self.latest:
+            sub.offer(self.latest[coin_id])
+
+        poller = self.pollers.get(coin_id)
+        if poller is None or poller.done():
+            self.pollers[coin_id] = asyncio.create_task(self._poll(coin_id))
+            logger.info(f"PriceHub: Started poller for {coin_id}")
+
+    def detach(self, coin_id: str, sub):
+        subs = self.subscribers.get(coin_id)
+        if subs is None:
+            return
+        subs.discard(sub)
+        if not subs:
+            del self.subscribers[coin_id]
+            self.latest.pop(coin_id, None)
+            poller = self.pollers.pop(coin_id, None)
+            if poller:
+                poller.cancel()
+            logger.info(f"PriceHub: Stopped poller for {coin_id}")
+
+    async def _poll(self, coin_id: str):
+        while True:
+            try:
+                update = await self._fetch(coin_id)
+                previous = self.latest.get(coin_id)
+                # The KPI cache outlives many polls: repeats are not news
+                if update and previous and all(update[f] == previous[f] for f in CHANGE_FIELDS):
+                    self.unchanged += 1
+                elif update:
+                    self.publish(coin_id, update)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Keep the stream alive; the next poll may succeed
+                logger.warning(f"PriceHub: Poll failed for {coin_id}: {e}")
+            # Ticks are aligned to the interval so every symbol updates together
+            # and multiplexed sessions can send them in one frame
+            await asyncio.sleep(self.interval - asyncio.get_running_loop().time() % self.interval)
+
+    async def _fetch(self, coin_id: str) -> Optional[Dict[str, Any]]:
+        # Reads through the cache (SWR + single-flight protect the upstream)
+        data = await self.market.get_coin_data(coin_id)
+        if not data or "current_price_usd" not in data:
+            return None
+        # O(1) indicator update per upstream tick (no full-series recompute)
+        indicators = await live_indicators.on_tick(coin_id, data["current_price_usd"], data.get("last_updated"))
+        return {
+            "symbol": coin_id,
+            "price": data.get("current_price_usd"),
+            "change_24h": data.get("price_change_percentage_24h"),
+            "indicators": indicators,
+            "timestamp": asyncio.get_event_loop().time()
+        }
+
+    def publish(self, coin_id: str, update: Dict[str, Any]):
+        self.latest[coin_id] = update
+        self.ticks += 1
+        for sub in self.subscribers.get(coin_id, ()):
+            sub.offer(update)
+
+    def session(self, max_rate: Optional[float] = None) -> StreamSession:
+        """
+        New multiplexed session. `max_rate` (frames per second) may lower, never
+        raise, the server-wide PRICE_STREAM_MAX_RATE.
+        """
+        rate = settings.PRICE_STREAM_MAX_RATE
+        if max_rate and max_rate > 0:
+            rate = min(rate, max_rate)
+        return StreamSession(self, settings.PRICE_STREAM_MAX_SYMBOLS, settings.PRICE_STREAM_BATCH_WINDOW, rate)
+
+    async def stop(self):
+        pollers = list(self.pollers.values())
+        for poller in pollers:
+            poller.cancel()
+        await asyncio.gather(*pollers, return_exceptions=True)
+        self.pollers.clear()
+        self.subscribers.clear()
+        self.latest.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        clients = set().union(*self.subscribers.values()) if self.subscribers else set()
+        return {
+            "symbols": len(self.pollers),
+            "subscribers": len(clients),
+            "sessions": sum(1 for c in clients if isinstance(c, StreamSession)),
+            "ticks": self.ticks,
+            "unchanged_polls": self.unchanged,
+            "conflated": sum(c.conflated for c in clients),
+            "per_symbol": {coin_id: len(subs) for coin_id, subs in sorted(self.subscribers.items())}
+        }
+
+# Shared per-process hub
+price_hub = PriceHub(interval=settings.PRICE_STREAM_INTERVAL, queue_size=settings.PRICE_STREAM_QUEUE_SIZE)
@@ -0,0 +1,100 @@
+import numpy as np
+from typing import Dict, List
+from app.services.indicators import ema, rsi, MACD_FAST, MACD_SLOW, MACD_SIGNAL, RSI_PERIOD
+
+STATUSES = np.array(["Strong Sell", "Bearish", "Neutral", "Bullish", "Strong Buy"])
+TRENDS = np.array(["Bearish", "Neutral", "Bullish"])
+
+def price_matrix(series: List[List[float]]) -> np.ndarray:
+    """
+    Right-aligned (assets x points) matrix of price series of different lengths,
+    NaN-padded on the left so the latest point of every asset shares a column.
+    """
+    length = max((len(s) for s in series), default=0)
+    matrix = np.full((len(series), length), np.nan)
+    for row, values in enumerate(series):
+        if len(values):
+            matrix[row, length - len(values):] = np.asarray(values, dtype=np.float64)
+    return matrix
+
+def _edge_filled(matrix: np.ndarray) -> np.ndarray:
+    """
+    Left padding replaced by each row's first price. The EMA recurrence starts
+    from the first value, so a flat prefix leaves EMA/MACD exactly as computed
+    on the unpadded series; RSI only looks at the last RSI_PERIOD moves.
+    """
+    if matrix.size == 0:
+        return matrix
+    first = np.argmax(~np.isnan(matrix), axis=1)
+    firsts = matrix[np.arange(matrix.shape[0]), first]
+    return np.where(np.isnan(matrix), firsts[:, None], matrix)
+
+def features(matrix: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Per-row chart features the score is built from: last RSI, MACD trend
+    (-1 / 0 / 1) and volatility. These only change when the charts do, so
+    callers can cache them and re-score against fresh 24h changes.
+    """
+    n = matrix.shape[0]
+    lengths = np.sum(~np.isnan(matrix), axis=1)
+    filled = _edge_filled(matrix)
+
+    # RSI: only the last value is needed, i.e. the last RSI_PERIOD moves
+    last_rsi = np.full(n, np.nan)
+    if filled.shape[1] > RSI_PERIOD:
+        last_rsi = rsi(filled[:, -(RSI_PERIOD + 1):], RSI_PERIOD)[:, -1]
+    last_rsi = np.where(lengths > RSI_PERIOD, last_rsi, np.nan)
+
+    # MACD state: crossovers and continuations collapse to Bullish / Bearish
+    if filled.shape[1] >= 2:
+        macd = ema(filled, MACD_FAST) - ema(filled, MACD_SLOW)
+        signal = ema(macd, MACD_SIGNAL)
+        diff = macd[:, -1] - signal[:, -1]
+    else:
+        diff = np.full(n, np.nan)
+    trend = np.where(lengths >= 2, np.sign(np.nan_to_num(diff)), 0).astype(int)
+
+    # Volatility: sample std of point-to-point returns (padding excluded)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = matrix[:, 1:] / matrix[:, :-1] - 1 if matrix.shape[1] >= 2 else np.empty((n, 0))
+        counts = np.sum(~np.isnan(returns), axis=1)
+        mean = np.nansum(returns, axis=1) / counts
+        vol = np.sqrt(np.nansum((returns - mean[:, None]) ** 2, axis=1) / (counts - 1)) * 100
+    vol = np.where(lengths < 2, 0.0, np.where(counts < 2, np.nan, vol))
+
+    return {"rsi": last_rsi, "trend": trend, "volatility": vol}
+
+def score(feats: Dict[str, np.ndarray], change_24h: np.ndarray, market_change: float) -> Dict[str, np.ndarray]:
+    """
+    Market Health score for every row from its features. Mirrors
+    MarketService.calculate_market_health component by component.
+    """
+    last_rsi, trend, vol = feats["rsi"], feats["trend"], feats["volatility"]
+    n = len(trend)
+
+    # Composite score (0-100), same thresholds as the per-asset panel
+    heatmap_score = np.full(n, max(0.0, min(20.0, 10 + market_change)))
+    r = np.nan_to_num(last_rsi, nan=50.0)
+    rsi_score = np.select([(r >= 40) & (r <= 70), r > 70, r < 30], [20, 15, 5], default=10).astype(float)
+    macd_score = np.select([trend > 0, trend < 0], [20, 0], default=10).astype(float)
+    vol_score = np.select([vol > 5, vol < 1], [5, 10], default=20).astype(float)
+    sentiment_score = np.clip(10 + np.nan_to_num(change_24h), 0, 20)
+
+    total = heatmap_score + rsi_score + macd_score + vol_score + sentiment_score
+    scores = np.clip(total, 0, 100).astype(int)
+    status = STATUSES[np.select([scores >= 75, scores >= 60, scores <= 25, scores <= 40], [4, 3, 0, 1], default=2)]
+
+    return {
+        "rsi": last_rsi,
+        "trend": TRENDS[trend + 1],
+        "volatility": vol,
+        "score": scores,
+        "status": status,
+        "components": np.stack([heatmap_score, rsi_score, macd_score, vol_score, sentiment_score], axis=1)
+    }
+
+def screen(matrix: np.ndarray, change_24h: np.ndarray, market_change: float) -> Dict[str, np.ndarray]:
+    """
+    Last RSI, MACD state, volatility and the Market Health score for every row at once.
+    """
+    return score(features(matrix), change_24h, market_change)
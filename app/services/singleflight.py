@@ -0,0 +1,31 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into one execution.
+    The first caller starts the work as a task; everyone else awaits that task.
+    The task is shielded so a cancelled caller (e.g. a client disconnect)
+    does not abort the fetch for the remaining waiters.
+    """
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Task] = {}
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._calls.get(key)
+        if task is None or task.done():
+            task = asyncio.ensure_future(func())
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+
+    def is_running(self, key: str) -> bool:
+        task = self._calls.get(key)
+        return task is not None and not task.done()
+
+    def in_flight(self) -> int:
+        return len(self._calls)
@@ -1,21 +1,20 @@
 import json
 import asyncio
-import google.generativeai as genai
 from typing import Dict, Any
 from app.core.config import get_settings
+from app.core.gemini import genai, generative_model
 from app.models.schemas import ChatResponse, ChartData, DeepDiveSection, ConceptKPI
 from app.utils.logger import logger
 
 from app.services.ai_provider import MockAIProvider
+from app.services.coin_index import coin_index
 
 settings = get_settings()
-genai.configure(api_key=settings.GEMINI_API_KEY)
 
 class SummarizerService:
     def __init__(self):
-        self.model = genai.GenerativeModel(
-            model_name=settings.GEMINI_MODEL,
-            system_instruction="""
+        self._model = None
+        self.system_instruction = """
             You are a senior multi-source analyst.
             Synthesize a comprehensive report using Market, News, and Social data.
             
@@ -39,9 +38,15 @@ class SummarizerService:
             - "chart_data": Create only if numerical history exists.
             - If the user query is conceptual (e.g., "What is DSA?"), set "asset" to null.
             """
-        )
         self.mock_provider = MockAIProvider()
 
+    @property
+    def model(self):
+        # Built on first use, keeping the Gemini SDK import off the boot path
+        if self._model is None:
+            self._model = generative_model(system_instruction=self.system_instruction)
+        return self._model
+
     async def summarize(self, query: str, analysis: Dict[str, Any]) -> ChatResponse:
         """
         Generates the final response with explanation, insights, and optional chart (Async).
@@ -68,7 +73,7 @@ class SummarizerService:
                     response = await asyncio.wait_for(
                         self.model.generate_content_async(
                             user_content,
-                            generation_config=genai.GenerationConfig(
+                            generation_config=genai().GenerationConfig(
                                 response_mime_type="application/json",
                                 temperature=0.3
                             )
@@ -103,26 +108,9 @@ class SummarizerService:
             fallback_asset = None
             q_lower = query.lower()
             
-            # 1. Detect Asset for Chart
-            common_coins = {
-                "bitcoin": "bitcoin", "btc": "bitcoin",
-                "ethereum": "ethereum", "eth": "ethereum",
-                "solana": "solana", "sol": "solana",
-                "dogecoin": "dogecoin", "doge": "dogecoin",
-                "cardano": "cardano", "ada": "cardano",
-                "ripple": "ripple", "xrp": "ripple",
-                "polkadot": "polkadot", "dot": "polkadot",
-                "polygon": "polygon", "matic": "polygon",
-                "chainlink": "chainlink", "link": "chainlink",
-                "litecoin": "litecoin", "ltc": "litecoin",
-                "shiba": "shiba-inu", "shib": "shiba-inu",
-                "pepe": "pepe", "avax": "avalanche-2"
-            }
-            
-            for key, val in common_coins.items():
-                if key in q_lower:
-                    fallback_asset = val
-                    break
+            # 1. Detect Asset for Chart (local coin index, no network)
+            await coin_index.ensure_loaded()
+            fallback_asset = coin_index.find_in_text(q_lower)
             
             # 2. Construct Explanation (User-Friendly Fallback)
             raw_summary = analysis.get("text_summary", "")
@@ -194,7 +182,7 @@ class SummarizerService:
             response = await asyncio.wait_for(
                 self.model.generate_content_async(
                     full_prompt,
-                    generation_config=genai.GenerationConfig(
+                    generation_config=genai().GenerationConfig(
                         response_mime_type="application/json",
                         temperature=0.2
                     )
@@ -279,7 +267,7 @@ class SummarizerService:
              response = await asyncio.wait_for(
                 self.model.generate_content_async(
                     prompt,
-                    generation_config=genai.GenerationConfig(
+                    generation_config=genai().GenerationConfig(
                         response_mime_type="application/json",
                         temperature=0.3
                     )
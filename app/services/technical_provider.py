@@ -1,11 +1,10 @@
 import asyncio
 from typing import Dict, Any, List
-import google.generativeai as genai
 from app.core.config import get_settings
+from app.core.gemini import genai, generative_model
 from app.utils.logger import logger
 
 settings = get_settings()
-genai.configure(api_key=settings.GEMINI_API_KEY)
 
 class TechnicalProvider:
     """
@@ -13,9 +12,14 @@ class TechnicalProvider:
     Role: Senior Technical Writer / Architecture Extractor
     """
     def __init__(self):
-        self.model = genai.GenerativeModel(
-            model_name=settings.GEMINI_MODEL,
-        )
+        self._model = None
+
+    @property
+    def model(self):
+        # Built on first use, keeping the Gemini SDK import off the boot path
+        if self._model is None:
+            self._model = generative_model()
+        return self._model
 
     async def fetch_technical_details(self, topic: str) -> Dict[str, Any]:
         """
@@ -63,7 +67,7 @@ class TechnicalProvider:
             response = await asyncio.wait_for(
                 self.model.generate_content_async(
                     prompt,
-                    generation_config=genai.GenerationConfig(
+                    generation_config=genai().GenerationConfig(
                         response_mime_type="application/json",
                         temperature=0.4 # Slightly creative for good examples
                     )
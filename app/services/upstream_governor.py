@@ -0,0 +1,181 @@
+import time
+import math
+import asyncio
+from enum import IntEnum
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, Optional, Tuple
+from app.core.config import get_settings
+from app.core.redis_client import redis_client, redis_manager
+from app.utils.logger import logger
+
+settings = get_settings()
+
+class Priority(IntEnum):
+    USER = 0        # Request/response path
+    SCHEDULER = 1   # Periodic cache warming
+    BACKGROUND = 2  # Stale-while-revalidate refreshes
+
+# Fraction of the bucket a class must leave untouched, so user traffic always finds tokens.
+PRIORITY_RESERVE = {
+    Priority.USER: 0.0,
+    Priority.SCHEDULER: 0.3,
+    Priority.BACKGROUND: 0.5,
+}
+
+# Longest a caller of each class will queue for a token before giving up.
+PRIORITY_MAX_WAIT = {
+    Priority.USER: 5.0,
+    Priority.SCHEDULER: 120.0,
+    Priority.BACKGROUND: 30.0,
+}
+
+upstream_priority: ContextVar[Priority] = ContextVar("upstream_priority", default=Priority.USER)
+
+@contextmanager
+def priority_scope(priority: Priority):
+    """
+    Tags every upstream call made inside the block with a priority class.
+    """
+    token = upstream_priority.set(priority)
+    try:
+        yield
+    finally:
+        upstream_priority.reset(token)
+
+class UpstreamBudgetExceeded(Exception):
+    """Raised when no upstream token could be acquired within the caller's wait budget."""
+
+# Token bucket refilled continuously from Redis server time; same arithmetic as take_token().
+# Returns {allowed, tokens_remaining, wait_ms}.
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local floor = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate / 1000)
+local allowed = 0
+local wait_ms = 0
+if tokens - 1 >= floor then
+    tokens = tokens - 1
+    allowed = 1
+else
+    wait_ms = math.ceil((floor + 1 - tokens) * 1000 / rate)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity * 1000 / rate) + 1000)
+return {allowed, tostring(tokens), wait_ms}
+"""
+
+def take_token(tokens: float, elapsed_ms: float, capacity: float, rate: float, floor: float) -> Tuple[bool, float, int]:
+    """
+    One bucket step, mirroring TOKEN_BUCKET_LUA: refill for `elapsed_ms` at `rate`
+    tokens/s, then take a token if that leaves at least `floor`.
+    Returns (allowed, tokens_remaining, wait_ms until a token would be available).
+    """
+    tokens = min(capacity, tokens + max(0.0, elapsed_ms) * rate / 1000)
+    if tokens - 1 >= floor:
+        return True, tokens - 1, 0
+    return False, tokens, math.ceil((floor + 1 - tokens) * 1000 / rate)
+
+class TokenBucketGovernor:
+    """
+    Cluster-wide rate governor for an upstream API.
+    Every worker and the scheduler draw from one Redis-backed bucket; on FakeRedis
+    (or if the script fails) the bucket lives in-process instead.
+    """
+    def __init__(self, name: str, rate_per_minute: float, burst: int):
+        self.key = f"governor:{name}"
+        self.capacity = float(burst)
+        self.rate = rate_per_minute / 60.0
+        self.redis = redis_client
+        self._script = None
+        self.use_redis: Optional[bool] = None # Decided on first use, once Redis is initialised
+
+        # In-memory bucket (fallback)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+        self.last_tokens = self.capacity
+        self.metrics: Dict[str, Dict[str, float]] = {
+            p.name.lower(): {"acquired": 0, "denied": 0, "wait_ms_total": 0.0, "wait_ms_max": 0.0}
+            for p in Priority
+        }
+
+    def _take_local(self, floor: float) -> Tuple[bool, float, int]:
+        now = time.monotonic()
+        allowed, self._tokens, wait_ms = take_token(
+            self._tokens, (now - self._updated) * 1000, self.capacity, self.rate, floor
+        )
+        self._updated = now
+        return allowed, self._tokens, wait_ms
+
+    def _redis_backed(self) -> bool:
+        if self.use_redis is None:
+            self.use_redis = bool(self.redis) and not redis_manager.fake
+        return self.use_redis
+
+    async def _take(self, floor: float) -> Tuple[bool, float, int]:
+        if self._redis_backed():
+            try:
+                if self._script is None:
+                    self._script = self.redis.register_script(TOKEN_BUCKET_LUA)
+                allowed, tokens, wait_ms = await self._script(
+                    keys=[self.key], args=[self.capacity, self.rate, floor]
+                )
+                return bool(int(allowed)), float(tokens), int(wait_ms)
+            except Exception as e:
+                logger.warning(f"Governor: Redis token bucket unavailable ({e}). Using in-memory bucket.")
+                self.use_redis = False
+        return self._take_local(floor)
+
+    async def acquire(self, priority: Priority = None) -> bool:
+        """
+        Takes one token, queueing up to the priority's wait budget.
+        Lower-priority classes stop short of their reserve so user requests win.
+        """
+        priority = upstream_priority.get() if priority is None else priority
+        floor = self.capacity * PRIORITY_RESERVE[priority]
+        metrics = self.metrics[priority.name.lower()]
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        deadline = started + PRIORITY_MAX_WAIT[priority]
+        while True:
+            allowed, tokens, wait_ms = await self._take(floor)
+            self.last_tokens = tokens
+            if allowed:
+                waited = (loop.time() - started) * 1000
+                metrics["acquired"] += 1
+                metrics["wait_ms_total"] += waited
+                metrics["wait_ms_max"] = max(metrics["wait_ms_max"], waited)
+                return True
+            if loop.time() + wait_ms / 1000 > deadline:
+                metrics["denied"] += 1
+                return False
+            await asyncio.sleep(wait_ms / 1000)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "redis" if self._redis_backed() else "memory",
+            "capacity": self.capacity,
+            "refill_per_minute": round(self.rate * 60, 2),
+            "tokens": round(self.last_tokens, 2),
+            "priorities": {
+                name: {
+                    **m,
+                    "wait_ms_avg": round(m["wait_ms_total"] / m["acquired"], 2) if m["acquired"] else 0.0
+                } for name, m in self.metrics.items()
+            }
+        }
+
+# Shared CoinGecko budget (free tier allows roughly 30 calls/minute)
+coingecko_governor = TokenBucketGovernor(
+    "coingecko",
+    rate_per_minute=settings.COINGECKO_RATE_PER_MINUTE,
+    burst=settings.COINGECKO_BURST
+)
@@ -10,7 +10,7 @@ class WatchlistService:
 
     async def get_watchlist(self) -> List[str]:
         data = await self.cache.get(self.key)
-        return data if data else []
+        return list(data) if data else [] # Copy: cached values are shared
 
     async def add_asset(self, asset_id: str) -> List[str]:
         current = await self.get_watchlist()
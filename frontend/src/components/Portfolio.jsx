@@ -34,15 +34,16 @@ const Portfolio = ({ active }) => {
             const symbols = holdings.map(h => h.symbol);
             if (symbols.length === 0) return;
 
-            const checks = symbols.map(sym => market.fetchMarketData(sym, "1"));
             try {
-                const results = await Promise.all(checks);
+                // Batched quotes for every holding (chunked by the service)
+                const { assets = {} } = await market.fetchMarketBatch(symbols, "1", ["kpi"]);
                 const priceMap = {};
-                results.forEach((res, idx) => {
-                    if (res && res.kpi) {
-                        priceMap[holdings[idx].symbol] = {
-                            price: res.kpi.current_price_usd,
-                            change_24h: res.kpi.price_change_percentage_24h
+                symbols.forEach(sym => {
+                    const kpi = assets[sym.toLowerCase()]?.kpi;
+                    if (kpi) {
+                        priceMap[sym] = {
+                            price: kpi.current_price_usd,
+                            change_24h: kpi.price_change_percentage_24h
                         };
                     }
                 });
@@ -1,57 +1,24 @@
-import { useState, useEffect, useRef } from "react";
+import { useState, useEffect } from "react";
+import { priceStream } from "../services/priceStream";
 
+/**
+ * Live price for one symbol, served over the shared multiplexed socket.
+ */
 const useCryptoWebSocket = (symbol) => {
     const [priceData, setPriceData] = useState(null);
-    const [status, setStatus] = useState("DISCONNECTED");
-    const ws = useRef(null);
-    const retryTimeout = useRef(null);
+    const [status, setStatus] = useState(priceStream.status);
+
+    useEffect(() => priceStream.onStatus(setStatus), []);
 
     useEffect(() => {
         if (!symbol) return;
+        setPriceData(null);
 
-        const connect = () => {
-            const PROD_WS = "wss://insightai-gchi.onrender.com/api/v1/ws";
-            const wsBase = import.meta.env.MODE === 'production'
-                ? PROD_WS
-                : "ws://127.0.0.1:8000/api/v1/ws";
-            const url = `${wsBase}/${symbol}`;
-
-            ws.current = new WebSocket(url);
-
-            ws.current.onopen = () => {
-                setStatus("CONNECTED");
-                if (retryTimeout.current) clearTimeout(retryTimeout.current);
-            };
-
-            ws.current.onmessage = (event) => {
-                try {
-                    const data = JSON.parse(event.data);
-                    if (data && data.price) {
-                        setPriceData(data);
-                    }
-                } catch (e) {
-                    console.error("WS Parse Error", e);
-                }
-            };
-
-            ws.current.onclose = () => {
-                setStatus("DISCONNECTED");
-                // Retry after 5s
-                retryTimeout.current = setTimeout(connect, 5000);
-            };
-
-            ws.current.onerror = (e) => {
-                console.warn("WS Error", e); // Don't spam error logs
-                ws.current.close();
-            };
-        };
-
-        connect();
-
-        return () => {
-            if (ws.current) ws.current.close();
-            if (retryTimeout.current) clearTimeout(retryTimeout.current);
-        };
+        return priceStream.subscribe(symbol, (data) => {
+            if (data && data.price) {
+                setPriceData(data);
+            }
+        });
     }, [symbol]);
 
     return { priceData, status };
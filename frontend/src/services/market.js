@@ -3,6 +3,9 @@ const API_BASE_URL = import.meta.env.MODE === 'production'
     ? PROD_API
     : "http://localhost:8000/api/v1";
 
+// Server-side cap on ids per /market/batch request
+const MAX_BATCH_IDS = 50;
+
 export const market = {
     /**
      * Fetches market data for a specific coin.
@@ -33,6 +36,35 @@ export const market = {
         }
     },
 
+    /**
+     * Fetches market data for several coins, in requests of at most MAX_BATCH_IDS ids.
+     * @param {string[]} coinIds - CoinGecko ids or symbols.
+     * @param {string} days - Chart range (only used for the chart/score fields).
+     * @param {string[]} fields - Any of 'kpi', 'chart', 'score'.
+     * @returns {Promise<Object>} - { days, fields, assets: { [id]: { kpi?, chart_data?, market_score? } | { error } } }
+     */
+    fetchMarketBatch: async (coinIds = [], days = "1", fields = ["kpi"]) => {
+        try {
+            const ids = [...new Set(coinIds)];
+            const chunks = [];
+            for (let i = 0; i < ids.length; i += MAX_BATCH_IDS) chunks.push(ids.slice(i, i + MAX_BATCH_IDS));
+
+            const results = await Promise.all(chunks.map(async (chunk) => {
+                const params = new URLSearchParams({ ids: chunk.join(","), days, fields: fields.join(",") });
+                const response = await fetch(`${API_BASE_URL}/market/batch?${params}`);
+                if (!response.ok) throw new Error(`Market Batch API Error: ${response.statusText}`);
+                return response.json();
+            }));
+            return results.reduce(
+                (merged, result) => ({ ...merged, ...result, assets: { ...merged.assets, ...result.assets } }),
+                { days, fields, assets: {} }
+            );
+        } catch (error) {
+            console.error("Market Batch Error:", error);
+            throw error;
+        }
+    },
+
     fetchComparison: async (symbols = [], range = "30") => {
         try {
             const symbolsStr = symbols.join(",");
@@ -0,0 +1,152 @@
+const PROD_WS = "wss://insightai-gchi.onrender.com/api/v1/ws";
+const WS_URL = import.meta.env.MODE === 'production'
+    ? PROD_WS
+    : "ws://127.0.0.1:8000/api/v1/ws";
+
+const RETRY_MS = 5000;
+const PING_MS = 20000;
+
+/**
+ * One shared, multiplexed websocket for every live price on the page.
+ * Components subscribe to symbols; the stream reference-counts them so the
+ * server only sees one subscription per coin, and re-subscribes after reconnects.
+ */
+class PriceStream {
+    constructor() {
+        this.ws = null;
+        this.status = "DISCONNECTED";
+        this.refs = new Map();          // requested symbol -> listener count
+        this.aliases = new Map();       // requested symbol -> coin id
+        this.listeners = new Map();     // requested symbol -> Set<callback>
+        this.latest = new Map();        // coin id -> full update (frames only carry changes)
+        this.statusListeners = new Set();
+        this.retryTimeout = null;
+        this.pingInterval = null;
+    }
+
+    connect() {
+        if (this.ws && this.ws.readyState <= WebSocket.OPEN) return;
+
+        this.ws = new WebSocket(WS_URL);
+
+        this.ws.onopen = () => {
+            this.latest.clear(); // A new session starts with full updates
+            this.setStatus("CONNECTED");
+            if (this.refs.size) this.send({ action: "subscribe", symbols: [...this.refs.keys()] });
+            this.pingInterval = setInterval(() => this.send({ action: "ping" }), PING_MS);
+        };
+
+        this.ws.onmessage = (event) => {
+            try {
+                this.handle(JSON.parse(event.data));
+            } catch (e) {
+                console.error("WS Parse Error", e);
+            }
+        };
+
+        this.ws.onclose = () => {
+            this.setStatus("DISCONNECTED");
+            clearInterval(this.pingInterval);
+            this.ws = null;
+            // Retry while anyone is still listening
+            if (this.refs.size) this.retryTimeout = setTimeout(() => this.connect(), RETRY_MS);
+        };
+
+        this.ws.onerror = (e) => {
+            console.warn("WS Error", e); // Don't spam error logs
+            this.ws.close();
+        };
+    }
+
+    handle(message) {
+        if (message.type === "subscribed") {
+            Object.entries(message.symbols).forEach(([symbol, coinId]) => this.aliases.set(symbol, coinId));
+        } else if (message.type === "prices") {
+            // One frame carries every coin that changed, and only the fields that changed
+            Object.entries(message.data).forEach(([coinId, delta]) => {
+                const previous = this.latest.get(coinId) || {};
+                this.latest.set(coinId, {
+                    ...previous,
+                    ...delta,
+                    indicators: { ...previous.indicators, ...delta.indicators },
+                    timestamp: message.timestamp
+                });
+            });
+            this.aliases.forEach((coinId, symbol) => {
+                if (message.data[coinId]) this.listeners.get(symbol)?.forEach(cb => cb({ ...this.latest.get(coinId), symbol }));
+            });
+        } else if (message.type === "error") {
+            console.warn("Price stream:", message.message);
+        }
+    }
+
+    coinRefs(coinId) {
+        let count = 0;
+        this.aliases.forEach((id, symbol) => { if (id === coinId) count += this.refs.get(symbol) || 0; });
+        return count;
+    }
+
+    send(message) {
+        if (this.ws && this.ws.readyState === WebSocket.OPEN) this.ws.send(JSON.stringify(message));
+    }
+
+    setStatus(status) {
+        this.status = status;
+        this.statusListeners.forEach(cb => cb(status));
+    }
+
+    onStatus(callback) {
+        this.statusListeners.add(callback);
+        callback(this.status);
+        return () => this.statusListeners.delete(callback);
+    }
+
+    /**
+     * Listens to live updates for a symbol (id or ticker).
+     * @returns {Function} unsubscribe
+     */
+    subscribe(symbol, callback) {
+        symbol = symbol.toLowerCase();
+        if (!this.listeners.has(symbol)) this.listeners.set(symbol, new Set());
+        this.listeners.get(symbol).add(callback);
+
+        const count = this.refs.get(symbol) || 0;
+        this.refs.set(symbol, count + 1);
+        if (count === 0) this.send({ action: "subscribe", symbols: [symbol] });
+        this.connect();
+
+        // Already streaming: hand over the last known state instead of waiting for a change
+        const known = this.latest.get(this.aliases.get(symbol));
+        if (known) callback({ ...known, symbol });
+
+        return () => {
+            this.listeners.get(symbol)?.delete(callback);
+            const remaining = (this.refs.get(symbol) || 1) - 1;
+            if (remaining > 0) {
+                this.refs.set(symbol, remaining);
+                return;
+            }
+            const coinId = this.aliases.get(symbol);
+            this.refs.delete(symbol);
+            this.listeners.delete(symbol);
+            this.aliases.delete(symbol);
+            // Another alias ("btc" vs "bitcoin") may still stream the same coin
+            if (this.coinRefs(coinId) === 0) this.latest.delete(coinId);
+            this.send({ action: "unsubscribe", symbols: [symbol] });
+            if (!this.refs.size) this.close();
+        };
+    }
+
+    close() {
+        clearTimeout(this.retryTimeout);
+        clearInterval(this.pingInterval);
+        if (this.ws) {
+            this.ws.onclose = null;
+            this.ws.close();
+            this.ws = null;
+        }
+        this.setStatus("DISCONNECTED");
+    }
+}
+
+export const priceStream = new PriceStream();
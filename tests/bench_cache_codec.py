@@ -0,0 +1,55 @@
+"""
+Benchmark: columnar cache codec vs JSON for representative cached payloads,
+reporting stored size and decode time per namespace.
+
+    python tests/bench_cache_codec.py
+"""
+import sys
+import os
+import json
+import timeit
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GEMINI_API_KEY", "mock-key-for-testing")
+
+import numpy as np
+from app.services.cache_codec import ColumnarCodec
+from app.services.market import MarketService
+
+def chart(days, n, step_ms):
+    rng = np.random.default_rng(7)
+    prices = (60_000 + np.cumsum(rng.normal(0, 150, n))).tolist()
+    points = [[1_700_000_000_000 + i * step_ms, p] for i, p in enumerate(prices)]
+    return MarketService()._build_chart(points, days)[0]
+
+def payloads():
+    kpi = {"id": "bitcoin", "symbol": "btc", "price": 64000.12, "change_24h": 1.2, "market_cap": 1.2e12}
+    return [
+        ("market:chart (1d, 5m)", chart("1", 288, 300_000)),
+        ("market:chart (30d, 1h)", chart("30", 720, 3_600_000)),
+        ("market:chart (365d, 1d)", chart("365", 365, 86_400_000)),
+        ("market:chart (max, 1d)", chart("max", 4_000, 86_400_000)),
+        ("market:kpi", kpi),
+    ]
+
+def main():
+    codecs = {
+        "zlib/f64": ColumnarCodec("zlib", "float64"),
+        "zlib/f32": ColumnarCodec("zlib", "float32"),
+        "none/f64": ColumnarCodec("none", "float64"),
+    }
+    print(f"{'namespace':<24} | {'codec':<9} | {'JSON B':>8} | {'stored B':>8} | {'saved':>6} | {'JSON ms':>8} | {'decode ms':>9} | {'speedup':>7}")
+    print("-" * 100)
+    for name, value in payloads():
+        text = json.dumps(value)
+        json_ms = min(timeit.repeat(lambda: json.loads(text), number=200, repeat=3)) / 200 * 1000
+        for label, codec in codecs.items():
+            encoded = codec.encode(value)
+            if encoded is None:
+                print(f"{name:<24} | {'json':<9} | {len(text):>8} | {len(text):>8} | {'0%':>6} | {json_ms:>8.3f} | {json_ms:>9.3f} | {'1.0x':>7}")
+                break
+            decode_ms = min(timeit.repeat(lambda: codec.decode(encoded), number=200, repeat=3)) / 200 * 1000
+            saved = 100 * (1 - len(encoded) / len(text))
+            print(f"{name:<24} | {label:<9} | {len(text):>8} | {len(encoded):>8} | {saved:>5.0f}% | {json_ms:>8.3f} | {decode_ms:>9.3f} | {json_ms / decode_ms:>6.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark: cold start of the API, each run in a fresh interpreter.
+Reports the `import app.main` time, the lifespan startup breakdown, and the
+latency of the first (and second) request once the app reports ready.
+
+    python tests/bench_cold_start.py [runs]
+
+The scheduler warm-up is disabled (SCHEDULER_WARMUP_TIMEOUT=0) so upstream
+latency does not blur the numbers.
+"""
+import sys
+import os
+import json
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = r"""
+import time, json, asyncio
+started = time.perf_counter()
+import app.main
+import_ms = (time.perf_counter() - started) * 1000
+
+import httpx
+from app.core.config import get_settings
+
+async def main():
+    app = app_module.app
+    async with app.router.lifespan_context(app):
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+        timings = {}
+        for name, path in [("first_request", "/"), ("second_request", "/"),
+                           ("first_api_request", get_settings().API_PREFIX + "/system/startup")]:
+            t = time.perf_counter()
+            resp = await client.get(path)
+            resp.raise_for_status()
+            timings[name] = (time.perf_counter() - t) * 1000
+        await client.aclose()
+        return {"import": import_ms, "startup": app.state.startup_timings, **timings}
+
+app_module = app.main
+print("BENCH " + json.dumps(asyncio.run(main())))
+"""
+
+def run_once():
+    env = {**os.environ, "SCHEDULER_WARMUP_TIMEOUT": "0"}
+    env.setdefault("GEMINI_API_KEY", "mock-key-for-testing")
+    out = subprocess.run([sys.executable, "-c", CHILD], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    line = next(l for l in out.stdout.splitlines() if l.startswith("BENCH "))
+    return json.loads(line[len("BENCH "):])
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    results = [run_once() for _ in range(runs)]
+
+    rows = [("import app.main", [r["import"] for r in results])]
+    for step in results[0]["startup"]:
+        rows.append((f"startup: {step}", [r["startup"][step] for r in results]))
+    for name in ("first_request", "second_request", "first_api_request"):
+        rows.append((name.replace("_", " "), [r[name] for r in results]))
+
+    print(f"{'phase':<28} | {'median ms':>9} | {'min ms':>8} | {'max ms':>8}   ({runs} cold starts)")
+    print("-" * 66)
+    for name, values in rows:
+        print(f"{name:<28} | {statistics.median(values):>9.1f} | {min(values):>8.1f} | {max(values):>8.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Benchmark: single-pass NumPy indicator engine vs the previous per-indicator
+pandas implementation (one Series per indicator + NaN->None list comprehensions).
+
+    python tests/bench_indicators.py
+"""
+import sys
+import os
+import timeit
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+from app.services.indicators import compute_indicators, to_json_list
+
+def legacy_indicators(prices):
+    def clean(series):
+        return [None if pd.isna(x) else x for x in series.tolist()]
+
+    series = pd.Series(prices)
+    sma = clean(pd.Series(prices).rolling(window=20).mean())
+    ema = clean(pd.Series(prices).ewm(span=20, adjust=False).mean())
+
+    delta = pd.Series(prices).diff()
+    avg_gain = delta.clip(lower=0).rolling(window=14).mean()
+    avg_loss = (-delta.clip(upper=0)).rolling(window=14).mean()
+    rsi = clean(100 - (100 / (1 + avg_gain / avg_loss)))
+
+    macd = series.ewm(span=12, adjust=False).mean() - series.ewm(span=26, adjust=False).mean()
+    signal = macd.ewm(span=9, adjust=False).mean()
+    return sma, ema, rsi, clean(macd), clean(signal), clean(macd - signal)
+
+def engine_indicators(prices):
+    result = compute_indicators(prices)
+    return [to_json_list(result[key]) for key in ["sma", "ema", "rsi", "macd", "macd_signal", "macd_histogram"]]
+
+def main():
+    rng = np.random.default_rng(42)
+    print(f"{'points':>8} | {'pandas (ms)':>12} | {'engine (ms)':>12} | {'speedup':>8}")
+    print("-" * 50)
+    for n in [30, 720, 10_000]:
+        prices = (60_000 + np.cumsum(rng.normal(0, 150, n))).tolist()
+        runs = 200 if n < 10_000 else 30
+        legacy = min(timeit.repeat(lambda: legacy_indicators(prices), number=runs, repeat=3)) / runs * 1000
+        engine = min(timeit.repeat(lambda: engine_indicators(prices), number=runs, repeat=3)) / runs * 1000
+        print(f"{n:>8} | {legacy:>12.3f} | {engine:>12.3f} | {legacy / engine:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
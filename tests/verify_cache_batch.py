@@ -0,0 +1,67 @@
+import unittest
+from unittest.mock import patch
+
+# Adjust path
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GEMINI_API_KEY", "mock-key-for-testing")
+
+from app.services.l1_cache import l1_cache
+from app.services.coin_index import coin_index
+from app.services.market import MarketService
+
+ASSETS = ["bitcoin", "ethereum", "solana", "cardano", "ripple", "dogecoin", "polkadot", "litecoin", "chainlink", "uniswap"]
+
+class TestCacheBatch(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.market = MarketService()
+        self.cache = self.market.cache
+        await self.cache.redis.flushall()
+        l1_cache.clear()
+
+    async def test_get_many_set_many(self):
+        print("\n🔹 Testing MGET / pipelined SET EX")
+        await self.cache.set_many({"a:1": {"v": 1}, "a:2": [1, 2]}, ttl=60)
+        l1_cache.clear()
+        self.assertEqual(await self.cache.get_many(["a:1", "a:2", "a:3"]), {"a:1": {"v": 1}, "a:2": [1, 2]})
+        self.assertGreater(await self.cache.redis.ttl("a:2"), 0)
+        print("✅ Hits returned, missing keys left out")
+
+    async def test_undecodable_value_is_a_miss(self):
+        print("\n🔹 Testing per-key decode fallback")
+        await self.cache.set("a:1", {"v": 1}, ttl=60)
+        await self.cache.redis.set("a:2", "not json")
+        l1_cache.clear()
+        self.assertEqual(await self.cache.get_many(["a:1", "a:2"]), {"a:1": {"v": 1}})
+        print("✅ Corrupt key skipped, others served")
+
+    async def test_comparison_round_trips(self):
+        print("\n🔹 Testing a 10-asset comparison reads in one round-trip per key family")
+        chart = {"timestamps": [0, 3_600_000, 7_200_000], "values": [1.0, 2.0, 4.0], "sma": [None] * 3}
+        await self.cache.set_many({self.market._chart_key(a, "30"): chart for a in ASSETS}, ttl=600, soft_ttl=300)
+        await self.cache.set_many({f"market:kpi:{a}": {"name": a, "symbol": a[:3]} for a in ASSETS}, ttl=600, soft_ttl=300)
+        l1_cache.clear()
+        coin_index.build([{"id": a, "symbol": a[:4], "name": a.title(), "rank": i + 1} for i, a in enumerate(ASSETS)])
+
+        pipeline = self.cache.raw.pipeline
+        executed = []
+        def counting_pipeline(*args, **kwargs):
+            executed.append(1)
+            return pipeline(*args, **kwargs)
+
+        with patch.object(self.cache.raw, "pipeline", side_effect=counting_pipeline), \
+             patch.object(self.cache.raw, "get", side_effect=AssertionError("single-key GET")):
+            kpis = await self.market.get_coin_data_many(ASSETS)
+            comparison = await self.market.get_comparison_data(ASSETS)
+
+        # One MGET for the KPIs and one for the charts; the second chart read hits the L1
+        self.assertEqual(len(executed), 2)
+        self.assertEqual(len(kpis), 10)
+        self.assertEqual(len(comparison["datasets"]), 10)
+        self.assertEqual(comparison["datasets"][0]["values"][-1], 300.0)
+        print("✅ 20 keys read in 2 round-trips")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import unittest
+
+# Adjust path
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GEMINI_API_KEY", "mock-key-for-testing")
+
+import numpy as np
+from app.services.l1_cache import l1_cache
+from app.services.cache import CacheService, codec_stats
+from app.services.cache_codec import ColumnarCodec
+from app.services.market import MarketService
+
+def sample_chart(n=720):
+    rng = np.random.default_rng(1)
+    prices = (60_000 + np.cumsum(rng.normal(0, 150, n))).tolist()
+    chart, _ = MarketService()._build_chart([[1_700_000_000_000 + i * 3_600_000, p] for i, p in enumerate(prices)], "30")
+    return chart
+
+class TestCacheCodec(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.cache = CacheService()
+        await self.cache.redis.flushall()
+        l1_cache.clear()
+        codec_stats.namespaces.clear()
+
+    def test_round_trip(self):
+        print("\n🔹 Testing columnar round trip")
+        chart = sample_chart()
+        codec = ColumnarCodec()
+        encoded = codec.encode(chart)
+        self.assertTrue(ColumnarCodec.is_encoded(encoded))
+        self.assertEqual(codec.decode(encoded), chart)
+        self.assertEqual(list(codec.decode(encoded).keys()), list(chart.keys()))
+        print(f"✅ {len(encoded)} bytes vs {len(str(chart))} chars of JSON-ish text")
+
+    def test_none_and_int_columns(self):
+        print("\n🔹 Testing None bitmap and int64 columns")
+        value = {"timestamps": list(range(1_700_000_000_000, 1_700_000_000_100)),
+                 "values": [None if i % 7 == 0 else i * 0.5 for i in range(100)],
+                 "signal_type": "Bullish"}
+        decoded = ColumnarCodec(compression="none").decode(ColumnarCodec(compression="none").encode(value))
+        self.assertEqual(decoded, value)
+        self.assertIsInstance(decoded["timestamps"][0], int)
+        print("✅ None positions and exact integers preserved")
+
+    def test_small_values_stay_json(self):
+        print("\n🔹 Testing small values skip the codec")
+        codec = ColumnarCodec(min_points=64)
+        self.assertIsNone(codec.encode({"price": 1.0, "values": [1.0, 2.0]}))
+        self.assertIsNone(codec.encode([1.0] * 500))
+        self.assertIsNone(codec.encode({"labels": ["Jan 01"] * 500}))
+        print("✅ JSON path kept")
+
+    async def test_cache_service_stats(self):
+        print("\n🔹 Testing CacheService codec path and stats")
+        chart = sample_chart()
+        await self.cache.set("market:chart:bitcoin:30:v4", chart, ttl=60)
+        await self.cache.set("market:kpi:bitcoin", {"price": 1.0}, ttl=60)
+
+        self.assertTrue(ColumnarCodec.is_encoded(await self.cache.raw.get("market:chart:bitcoin:30:v4")))
+        self.assertEqual(await self.cache.get("market:chart:bitcoin:30:v4"), chart)
+        self.assertEqual(await self.cache.get("market:kpi:bitcoin"), {"price": 1.0})
+
+        report = codec_stats.report()
+        self.assertEqual(report["market:chart"]["columnar_writes"], 1)
+        self.assertLess(report["market:chart"]["stored_bytes"], report["market:chart"]["json_bytes"])
+        self.assertEqual(report["market:kpi"]["columnar_writes"], 0)
+        print(f"✅ market:chart saved {report['market:chart']['memory_saved_pct']}% memory")
+
+    async def test_json_reference_is_sampled(self):
+        print("\n🔹 Testing JSON reference sampling on columnar writes")
+        chart = sample_chart()
+        sample_every, codec_stats.sample_every = codec_stats.sample_every, 3
+        try:
+            for i in range(7):
+                await self.cache.set(f"market:chart:bitcoin:{i}:v4", chart, ttl=60)
+        finally:
+            codec_stats.sample_every = sample_every
+
+        ns = codec_stats.namespaces["market:chart"]
+        self.assertEqual(ns["columnar_writes"], 7)
+        # Writes 1, 4 and 7 are measured against JSON
+        self.assertEqual(ns["json_reference_reads"], 3)
+        report = codec_stats.report()["market:chart"]
+        self.assertLess(report["stored_bytes"], report["json_bytes"])
+        print(f"✅ {ns['json_reference_reads']} of 7 writes measured, {report['memory_saved_pct']}% saved")
+
+    async def test_legacy_json_entries(self):
+        print("\n🔹 Testing JSON entries written before the codec")
+        await self.cache.redis.set("market:chart:legacy", '{"values": [1.0, 2.0]}')
+        self.assertEqual(await self.cache.get("market:chart:legacy"), {"values": [1.0, 2.0]})
+        print("✅ Legacy JSON still decodes")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+import asyncio
+import time
+from unittest.mock import patch
+
+# Adjust path
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GEMINI_API_KEY", "mock-key-for-testing")
+
+from app.services.l1_cache import l1_cache
+from app.services.cache import CacheService
+from app.services.cache_codec import ColumnarCodec
+from app.services.market import MarketService
+
+class TestCacheFreshness(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.market = MarketService()
+        self.cache = self.market.cache
+        await self.cache.redis.flushall()
+        l1_cache.clear()
+
+    async def test_envelope_round_trip(self):
+        print("\n🔹 Testing freshness envelope")
+        chart = {"timestamps": list(range(100)), "values": [float(i) for i in range(100)]}
+        await self.cache.set("market:chart:x", chart, ttl=600, soft_ttl=300)
+        await self.cache.set("market:kpi:x", {"price": 1.0}, ttl=600)
+        l1_cache.clear()
+
+        self.assertTrue(ColumnarCodec.is_encoded(await self.cache.raw.get("market:chart:x")))
+        entry = await self.cache.get_entry("market:chart:x")
+        self.assertEqual(entry["data"], chart)
+        self.assertEqual((entry["soft_ttl"], entry["hard_ttl"]), (300, 600))
+        self.assertAlmostEqual(entry["fetched_at"], time.time(), delta=5)
+        self.assertEqual(await self.cache.get("market:kpi:x"), {"price": 1.0})
+        self.assertFalse(self.cache.is_stale(await self.cache.get_entry("market:kpi:x")))
+        print("✅ Metadata stored next to JSON and columnar values")
+
+    async def test_legacy_keys_are_fresh(self):
+        print("\n🔹 Testing keys written before envelopes")
+        await self.cache.redis.set("market:kpi:legacy", '{"price": 2.0}', ex=600)
+        entry = await self.cache.get_entry("market:kpi:legacy")
+        self.assertEqual(entry["data"], {"price": 2.0})
+        self.assertIsNone(entry["fetched_at"])
+        self.assertFalse(self.cache.is_stale(entry))
+        print("✅ Legacy value served as fresh")
+
+    async def test_stale_served_while_one_refresh_runs(self):
+        print("\n🔹 Testing stale-while-revalidate without a TTL call")
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return {"price": 2.0}
+
+        await self.cache.set("market:kpi:y", {"price": 1.0}, ttl=600, soft_ttl=0)
+        with patch.object(self.cache.redis, "ttl", side_effect=AssertionError("TTL round-trip")):
+            results = await asyncio.gather(*[self.market._get_cached_or_fetch("market:kpi:y", fetch, ttl=600) for _ in range(20)])
+            self.assertEqual(results, [{"price": 1.0}] * 20)
+            self.assertEqual(len(self.market._refresh_tasks), 1) # One task scheduled, not one per hit
+            await asyncio.gather(*self.market._refresh_tasks)
+
+        self.assertEqual(calls, 1)
+        entry = await self.cache.get_entry("market:kpi:y")
+        self.assertEqual(entry["data"], {"price": 2.0})
+        self.assertEqual(entry["soft_ttl"], 300)
+        self.assertNotIn("market:kpi:y", self.market._refreshing)
+        print("✅ 20 stale hits, one background refresh")
+
+    async def test_request_scoped_refresh_scheduled_once(self):
+        print("\n🔹 Testing stale hits with BackgroundTasks")
+        from fastapi import BackgroundTasks
+
+        async def fetch():
+            return {"price": 3.0}
+
+        await self.cache.set("market:kpi:z", {"price": 1.0}, ttl=600, soft_ttl=0)
+        requests = [BackgroundTasks() for _ in range(10)]
+        await asyncio.gather(*[self.market._get_cached_or_fetch("market:kpi:z", fetch, ttl=600, background_tasks=b) for b in requests])
+        self.assertEqual(sum(len(b.tasks) for b in requests), 1)
+
+        for b in requests:
+            await b()
+        self.assertNotIn("market:kpi:z", self.market._refreshing)
+        self.assertEqual(await self.cache.get("market:kpi:z"), {"price": 3.0})
+        print("✅ One refresh across 10 requests; key released once it ran")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+import asyncio
+import time
+from unittest.mock import patch
+
+# Adjust path
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GEMINI_API_KEY", "mock-key-for-testing")
+
+from app.services.l1_cache import L1Cache, l1_cache
+from app.services.cache import CacheService
+from app.services.watchlist import WatchlistService
+
+class TestL1Cache(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.cache = CacheService()
+        await self.cache.redis.flushall()
+        l1_cache.clear()
+        l1_cache.counters.clear()
+
+    async def test_hits_skip_redis(self):
+        print("\n🔹 Testing L1 hits avoid Redis")
+        await self.cache.set("market:heatmap:50", [{"id": "bitcoin"}], ttl=60)
+        with patch.object(self.cache.raw, "pipeline", side_effect=AssertionError("Redis was called")):
+            for _ in range(100):
+                self.assertEqual(await self.cache.get("market:heatmap:50"), [{"id": "bitcoin"}])
+        self.assertEqual(l1_cache.stats()["namespaces"]["market:heatmap"]["hits"], 100)
+        print("✅ 100 reads served from process memory")
+
+    async def test_ttl_capped_by_redis(self):
+        print("\n🔹 Testing L1 TTL never outlives Redis")
+        await self.cache.raw.set("market:kpi:bitcoin", '{"price": 1}', px=50)
+        self.assertEqual(await self.cache.get("market:kpi:bitcoin"), {"price": 1})
+        _, expires_at, _ = l1_cache.entries["market:kpi:bitcoin"]
+        self.assertLessEqual(expires_at - time.monotonic(), 0.05)
+        await asyncio.sleep(0.1)
+        self.assertIsNone(await self.cache.get("market:kpi:bitcoin"))
+        print("✅ Entry expired with its Redis key")
+
+    def test_size_aware_lru(self):
+        print("\n🔹 Testing size-aware LRU eviction")
+        l1 = L1Cache(max_bytes=8000, ttl=60)
+        for key in "abcdefg":
+            l1.set(key, key, size=1000)
+        l1.get("a") # b is now least recently used
+        l1.set("h", "h", size=1000)
+        l1.set("i", "i", size=1000)
+        self.assertEqual(list(l1.entries), ["c", "d", "e", "f", "g", "a", "h", "i"])
+        self.assertLessEqual(l1.size, 8000)
+        l1.set("huge", 4, size=1001) # Over max_bytes/8: never cached
+        self.assertNotIn("huge", l1.entries)
+        print("✅ Evicted by size, oldest first")
+
+    async def test_pubsub_invalidation(self):
+        print("\n🔹 Testing cross-worker invalidation")
+        peer = L1Cache(max_bytes=1 << 20, ttl=60)
+        peer.start_listener(self.cache.redis)
+        await asyncio.sleep(0.05)
+        try:
+            peer.set("market:kpi:bitcoin", {"price": 1}, size=10)
+            await self.cache.set("market:kpi:bitcoin", {"price": 2}, ttl=60)
+            for _ in range(50):
+                if "market:kpi:bitcoin" not in peer.entries:
+                    break
+                await asyncio.sleep(0.01)
+            self.assertNotIn("market:kpi:bitcoin", peer.entries)
+            # The writer keeps its fresh copy
+            self.assertEqual(l1_cache.entries["market:kpi:bitcoin"][0]["data"], {"price": 2})
+        finally:
+            await peer.stop_listener()
+        print("✅ Peer dropped its copy on write")
+
+    async def test_watchlist_does_not_mutate_cached_value(self):
+        print("\n🔹 Testing cached lists are not mutated in place")
+        watchlist = WatchlistService()
+        await watchlist.add_asset("bitcoin")
+        cached = await self.cache.get(watchlist.key)
+        await watchlist.add_asset("ethereum")
+        self.assertEqual(cached, ["bitcoin"])
+        self.assertEqual(await watchlist.get_watchlist(), ["bitcoin", "ethereum"])
+        print("✅ Watchlist copies before editing")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,156 @@
+import unittest
+import time
+import random
+from unittest.mock import patch
+
+# Adjust path
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GEMINI_API_KEY", "mock-key-for-testing")
+
+import httpx
+from app.services.l1_cache import l1_cache
+from app.services.market import MarketService
+from app.core.http_client import http_clients
+
+HOUR_MS = 3_600_000
+
+class TestIncrementalChart(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.market = MarketService()
+        self.paths = []
+        now = int(time.time() * 1000)
+        random.seed(7)
+        # 30 days of hourly history ending two hours ago
+        self.history = [[now - 2 * HOUR_MS - i * HOUR_MS, 100 + random.gauss(0, 1)] for i in range(719, -1, -1)]
+        # The range endpoint answers short windows at 5-minute granularity
+        self.tail = [[now - 2 * HOUR_MS + i * 300_000, 101 + random.gauss(0, 1)] for i in range(1, 21)]
+
+        async def handler(request):
+            self.paths.append(request.url.path)
+            if request.url.path.endswith("/market_chart/range"):
+                return httpx.Response(200, json={"prices": self.tail})
+            return httpx.Response(200, json={"prices": self.history})
+
+        self.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        await self.market.cache.redis.flushall()
+        l1_cache.clear()
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+
+    async def test_refresh_appends_tail_only(self):
+        print("\n🔹 Testing incremental chart refresh")
+        with patch.object(http_clients, "get", return_value=self.client):
+            first = await self.market.get_market_chart("bitcoin", days="30")
+            refreshed = await self.market.get_market_chart("bitcoin", days="30", force_refresh=True)
+
+        self.assertEqual(self.paths, ["/api/v3/coins/bitcoin/market_chart", "/api/v3/coins/bitcoin/market_chart/range"])
+
+        # 5-minute tail thinned to the hourly granularity of the cached series,
+        # then the latest price as a provisional point (as a full fetch ends)
+        appended = [ts for ts in refreshed["timestamps"] if ts > first["timestamps"][-1]]
+        self.assertEqual(appended, [self.tail[10][0], self.tail[-1][0]])
+
+        # Range stays fixed: points older than 30 days were evicted
+        self.assertGreaterEqual(refreshed["timestamps"][0], int(time.time() * 1000) - 30 * 24 * HOUR_MS - 1000)
+
+        # Carried state reproduces a full recompute over the extended series
+        values = [p[1] for p in self.history] + [self.tail[10][1], self.tail[-1][1]]
+        self.assertAlmostEqual(refreshed["values"][-1], values[-1])
+        self.assertAlmostEqual(refreshed["ema"][-1], self.market.calculate_ema(values)[-1], places=9)
+        self.assertAlmostEqual(refreshed["sma"][-1], self.market.calculate_sma(values)[-1], places=9)
+        self.assertAlmostEqual(refreshed["rsi"][-1], self.market.calculate_rsi(values)[-1], places=9)
+        macd = self.market.calculate_macd(values)
+        self.assertAlmostEqual(refreshed["macd_signal"][-1], macd["signal"][-1], places=9)
+        self.assertEqual(refreshed["signal_type"], macd["trend"])
+        print("✅ Only the tail was fetched and indicators match a full recompute.")
+
+    async def test_live_price_replaced_within_a_step(self):
+        print("\n🔹 Testing daily chart keeps its last point live between steps")
+        now = int(time.time() * 1000)
+        self.history = [[now - 2 * HOUR_MS - i * 24 * HOUR_MS, 100 + random.gauss(0, 1)] for i in range(364, -1, -1)]
+        with patch.object(http_clients, "get", return_value=self.client):
+            first = await self.market.get_market_chart("bitcoin", days="365", axis="epoch")
+            refreshed = await self.market.get_market_chart("bitcoin", days="365", force_refresh=True, axis="epoch")
+            self.tail = self.tail + [[now, 105.0]]
+            again = await self.market.get_market_chart("bitcoin", days="365", force_refresh=True, axis="epoch")
+
+        # Less than a day since the last daily point: nothing is committed,
+        # the latest price is appended and then replaced by the next refresh
+        self.assertEqual(refreshed["timestamps"], first["timestamps"] + [self.tail[-2][0]])
+        self.assertEqual(again["timestamps"], first["timestamps"] + [now])
+        self.assertEqual(again["values"][-1], 105.0)
+
+        values = [p[1] for p in self.history] + [105.0]
+        self.assertAlmostEqual(again["ema"][-1], self.market.calculate_ema(values)[-1], places=9)
+        self.assertAlmostEqual(again["rsi"][-1], self.market.calculate_rsi(values)[-1], places=9)
+        self.assertEqual(again["signal_type"], self.market.calculate_macd(values)["trend"])
+        print("✅ Live price refreshed without freezing or committing it.")
+
+    async def test_shorter_range_derived_from_cache(self):
+        print("\n🔹 Testing 7-day chart derived from a cached 30-day chart")
+        with patch.object(http_clients, "get", return_value=self.client):
+            month = await self.market.get_market_chart("bitcoin", days="30")
+            week = await self.market.get_market_chart("bitcoin", days="7")
+            day = await self.market.get_market_chart("bitcoin", days="1")
+
+        # 7 days is hourly like 30 days, so it is sliced; 1 day needs 5-minute data
+        self.assertEqual(self.paths, ["/api/v3/coins/bitcoin/market_chart"] * 2)
+        self.assertEqual(day["timestamps"], month["timestamps"]) # Mock upstream ignores `days`
+
+        self.assertEqual(len(week["values"]), 169)
+        self.assertEqual(week["timestamps"][-1], month["timestamps"][-1])
+        self.assertGreaterEqual(week["timestamps"][0], month["timestamps"][-1] - 7 * 24 * HOUR_MS)
+        self.assertTrue(all(len(week[key]) == 169 for key in ["labels", "sma", "ema", "rsi", "macd"]))
+        # Warm-up points mean the slice starts with converged indicators
+        self.assertIsNotNone(week["sma"][0])
+        self.assertAlmostEqual(week["ema"][-1], month["ema"][-1], places=3)
+        print("✅ Week sliced from the cached month without an upstream call.")
+
+    async def test_derived_chart_keeps_source_freshness(self):
+        print("\n🔹 Testing derived charts are never fresher than their source")
+        month_key, week_key = self.market._chart_key("bitcoin", "30"), self.market._chart_key("bitcoin", "7")
+        with patch.object(http_clients, "get", return_value=self.client):
+            month = await self.market.get_market_chart("bitcoin", days="30", axis="epoch")
+            fetched_at = time.time() - 200 # Still within the 300s soft TTL
+            await self.market.cache.set(month_key, month, 600, soft_ttl=300, fetched_at=fetched_at)
+
+            await self.market.get_market_chart("bitcoin", days="7")
+            self.assertEqual(len(self.paths), 1)
+            self.assertAlmostEqual((await self.market.cache.get_entry(week_key))["fetched_at"], fetched_at, places=3)
+
+            # Forced refreshes go upstream instead of re-slicing the cache
+            await self.market.get_market_chart("bitcoin", days="7", force_refresh=True)
+            self.assertEqual(len(self.paths), 2)
+
+            # A stale source is not derived from
+            await self.market.cache.set(month_key, month, 600, soft_ttl=300, fetched_at=time.time() - 400)
+            await self.market.cache.redis.delete(week_key, f"{week_key}:state")
+            l1_cache.clear()
+            await self.market.get_market_chart("bitcoin", days="7")
+            self.assertEqual(self.paths[-1], "/api/v3/coins/bitcoin/market_chart")
+            self.assertEqual(len(self.paths), 3)
+        print("✅ Derived entries carry the source's fetch time; stale sources and forced refreshes go upstream.")
+
+    async def test_epoch_axis(self):
+        print("\n🔹 Testing epoch axis and on-demand labels")
+        with patch.object(http_clients, "get", return_value=self.client):
+            labelled = await self.market.get_market_chart("bitcoin", days="30")
+            epoch = await self.market.get_market_chart("bitcoin", days="30", axis="epoch")
+
+        # Labels are formatted per request, never stored
+        cached = await self.market.cache.get(self.market._chart_key("bitcoin", "30"))
+        self.assertNotIn("labels", cached)
+        self.assertNotIn("labels", epoch)
+        self.assertEqual(epoch["timestamps"], labelled["timestamps"])
+
+        expected = [time.strftime('%b %d', time.gmtime(ts / 1000)) for ts in labelled["timestamps"]]
+        self.assertEqual(labelled["labels"], expected)
+        self.assertEqual(self.market._chart_labels([0, 400 * 86_400_000], "365"), ["Jan 1970", "Feb 1971"])
+        print("✅ Epoch timestamps by default in cache, labels only when requested.")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import unittest
+import time
+from unittest.mock import patch
+
+# Adjust path
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GEMINI_API_KEY", "mock-key-for-testing")
+
+import httpx
+from app.services.l1_cache import l1_cache
+from app.services.coin_index import CoinIndex, coin_index
+from app.services.market import MarketService
+from app.core.http_client import http_clients
+
+COINS = [
+    {"id": "bitcoin", "symbol": "btc", "name": "Bitcoin", "rank": 1},
+    {"id": "ethereum", "symbol": "eth", "name": "Ethereum", "rank": 2},
+    {"id": "solana", "symbol": "sol", "name": "Solana", "rank": 5},
+    {"id": "the-open-network", "symbol": "ton", "name": "Toncoin", "rank": 9},
+    {"id": "bitcoin-cash", "symbol": "bch", "name": "Bitcoin Cash", "rank": 15},
+    {"id": "render-token", "symbol": "render", "name": "Render", "rank": 40},
+    {"id": "ton-scam", "symbol": "ton", "name": "TON Scam", "rank": None},
+    {"id": "the", "symbol": "the", "name": "The", "rank": None},
+]
+
+class TestCoinIndex(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.index = CoinIndex()
+        self.index.build(COINS)
+
+    def test_exact_lookups(self):
+        print("\n🔹 Testing exact id / symbol / name lookups")
+        self.assertEqual(self.index.exact("Bitcoin"), "bitcoin")
+        self.assertEqual(self.index.exact("ton"), "the-open-network") # Larger market cap wins the symbol
+        self.assertEqual(self.index.exact("toncoin"), "the-open-network")
+        self.assertEqual(self.index.exact("matic"), "polygon") # Curated alias
+        self.assertIsNone(self.index.exact("nope"))
+        print("✅ Exact matches ranked by market cap")
+
+    def test_prefix_and_typos(self):
+        print("\n🔹 Testing prefix and typo-tolerant lookups")
+        self.assertEqual([c["id"] for c in self.index.prefix("bitc")], ["bitcoin", "bitcoin-cash"])
+        self.assertEqual(self.index.lookup("rend"), "render-token")
+        self.assertEqual(self.index.lookup("etherium"), "ethereum")
+        self.assertEqual(self.index.lookup("solanna"), "solana")
+        self.assertIsNone(self.index.lookup("zzzz"))
+        print("✅ Prefixes via bisect, typos via trigrams")
+
+    def test_find_in_text(self):
+        print("\n🔹 Testing free-text detection")
+        self.assertEqual(self.index.find_in_text("what is the price of bitcoin cash today"), "bitcoin-cash")
+        self.assertEqual(self.index.find_in_text("show me eth"), "ethereum")
+        self.assertIsNone(self.index.find_in_text("what is the meaning of life")) # Unranked "the" ignored
+        self.assertEqual(CoinIndex().find_in_text("how is solana doing"), "solana") # Curated before first load
+        print("✅ Names, ids and well-known symbols detected")
+
+    async def test_market_service_resolves_without_network(self):
+        print("\n🔹 Testing resolve_symbol / search_coin use the index")
+        market = MarketService()
+        await market.cache.redis.flushall()
+        l1_cache.clear()
+        await coin_index.load(COINS)
+
+        with patch.object(http_clients, "get", side_effect=AssertionError("network call")):
+            self.assertEqual(await market.resolve_symbol("TON"), "the-open-network")
+            self.assertEqual(await market.search_coin("bitcoin csh"), "bitcoin-cash")
+
+        # Another worker picks the persisted list up from Redis
+        peer = CoinIndex()
+        self.assertTrue(await peer.ensure_loaded())
+        self.assertEqual(len(peer), len(COINS))
+        print("✅ Resolved in-process; persisted for peers")
+
+    async def test_refresh_from_upstream(self):
+        print("\n🔹 Testing the daily rebuild")
+        market = MarketService()
+        await market.cache.redis.flushall()
+        l1_cache.clear()
+        paths = []
+
+        async def handler(request):
+            paths.append(request.url.path)
+            if request.url.path.endswith("/coins/list"):
+                return httpx.Response(200, json=[{k: c[k] for k in ("id", "symbol", "name")} for c in COINS])
+            if request.url.params.get("page") == "1":
+                return httpx.Response(200, json=[{"id": c["id"], "market_cap_rank": c["rank"]} for c in COINS if c["rank"]])
+            return httpx.Response(200, json=[])
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        coin_index.fetched_at = None
+        with patch.object(http_clients, "get", return_value=client):
+            self.assertEqual(await market.refresh_coin_index(force=True), len(COINS))
+            await market.refresh_coin_index() # Fresh: no upstream calls
+        await client.aclose()
+
+        self.assertEqual(paths.count("/api/v3/coins/list"), 1)
+        self.assertEqual(coin_index.exact("ton"), "the-open-network")
+        self.assertLess(time.time() - coin_index.fetched_at, 5)
+        print("✅ Coin list and ranks fetched once")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+import unittest
+import time
+from unittest.mock import patch, AsyncMock
+
+# Adjust path
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GEMINI_API_KEY", "mock-key-for-testing")
+
+from app.core import scheduler
+from app.core.config import get_settings
+from app.services.l1_cache import l1_cache
+from app.services.hot_keys import HotKeyTracker
+from app.services import market as market_module
+from app.services.market import MarketService
+from app.services.upstream_governor import priority_scope, Priority
+
+settings = get_settings()
+HALF_LIFE = 1800.0
+
+class TestHotKeys(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tracker = HotKeyTracker(half_life=HALF_LIFE, flush_interval=3600)
+        await self.tracker.redis.flushall()
+        l1_cache.clear()
+        scheduler._last_refresh.clear()
+
+    async def test_ranking_and_rate(self):
+        print("\n🔹 Testing decayed request rates")
+        for _ in range(30):
+            self.tracker.record("toncoin")
+        for _ in range(3):
+            self.tracker.record("bitcoin")
+        self.tracker.record("bitcoin", "7")
+        with priority_scope(Priority.SCHEDULER):
+            self.tracker.record("dogecoin") # Not demand
+        await self.tracker.flush()
+
+        top = await self.tracker.top("assets")
+        self.assertEqual([member for member, _ in top], ["toncoin", "bitcoin"])
+        # 30 fresh requests with a 30 min half-life ~ 30 * ln2 / 1800 per second
+        self.assertAlmostEqual(top[0][1], 30 * 0.693147 / HALF_LIFE * 60, places=2)
+        self.assertEqual([member for member, _ in await self.tracker.top("charts")], ["bitcoin:7"])
+        print(f"✅ Ranked by demand ({top[0][1]} req/min for toncoin)")
+
+    async def test_old_requests_decay(self):
+        print("\n🔹 Testing forward decay")
+        now = time.time()
+        with patch("app.services.hot_keys.time.time", return_value=now - HALF_LIFE):
+            for _ in range(10):
+                self.tracker.record("old-favourite")
+        for _ in range(6):
+            self.tracker.record("trending")
+        await self.tracker.flush()
+
+        rates = dict(await self.tracker.top("assets"))
+        self.assertGreater(rates["trending"], rates["old-favourite"]) # 10 requests one half-life ago count as ~5
+        self.assertAlmostEqual(rates["old-favourite"] / rates["trending"], 5 / 6, places=2)
+        print("✅ A request one half-life old weighs half")
+
+    async def test_landmark_rebase_keeps_rates(self):
+        print("\n🔹 Testing landmark renormalisation")
+        for _ in range(10):
+            self.tracker.record("bitcoin")
+        await self.tracker.flush()
+        before = dict(await self.tracker.top("assets"))["bitcoin"]
+
+        period = HALF_LIFE * HotKeyTracker.RENORM_HALF_LIVES
+        later = time.time() + period
+        with patch("app.services.hot_keys.time.time", return_value=later):
+            self.tracker.record("ethereum")
+            await self.tracker.flush()
+            rates = dict(await self.tracker.top("assets"))
+
+        self.assertEqual(float(await self.tracker.redis.get(HotKeyTracker.LANDMARK_KEY)), self.tracker._landmark(later))
+        self.assertAlmostEqual(rates["bitcoin"], before / 2 ** HotKeyTracker.RENORM_HALF_LIVES, places=3) # 8 half-lives later
+        self.assertLess(await self.tracker.redis.zscore(HotKeyTracker.ASSETS_KEY, "bitcoin"), 10)
+        print("✅ Scores rescaled once; decay continuous across the rebase")
+
+    def test_refresh_interval(self):
+        print("\n🔹 Testing adaptive refresh intervals")
+        calm = scheduler.refresh_interval(0, 0.5)
+        busy = scheduler.refresh_interval(7, 0.5)
+        volatile = scheduler.refresh_interval(0, 15)
+        self.assertLess(busy, calm)
+        self.assertLess(volatile, calm)
+        self.assertEqual(scheduler.refresh_interval(1000, 50), settings.SCHEDULER_MIN_INTERVAL)
+        print(f"✅ calm {calm:.0f}s, busy {busy:.0f}s, volatile {volatile:.0f}s")
+
+    async def test_plan_follows_demand_within_budget(self):
+        print("\n🔹 Testing the scheduler plan")
+        market = MarketService()
+        with patch.object(scheduler, "hot_keys", self.tracker):
+            for _ in range(50):
+                self.tracker.record("toncoin")
+                self.tracker.record("toncoin", "7")
+            await self.tracker.flush()
+
+            plan = await scheduler.plan_refresh(market, time.time())
+            self.assertEqual(plan["kpis"][0], "toncoin") # Requested coin first, then the seeds
+            self.assertEqual(plan["charts"][0], ("toncoin", "7"))
+            self.assertLessEqual(len(plan["charts"]) + 1 + int(plan["heatmap"]), settings.SCHEDULER_UPSTREAM_BUDGET)
+
+            # Once refreshed, nothing is due until its interval elapses
+            now = time.time()
+            for asset in plan["kpis"]:
+                scheduler._last_refresh[f"kpi:{asset}"] = now
+            for asset, days in plan["charts"]:
+                scheduler._last_refresh[f"chart:{asset}:{days}"] = now
+            scheduler._last_refresh["heatmap"] = now
+            later = await scheduler.plan_refresh(market, now + 30)
+            self.assertEqual(later["kpis"], [])
+            self.assertNotIn(("toncoin", "7"), later["charts"])
+        print(f"✅ {len(plan['kpis'])} KPIs and {len(plan['charts'])} charts planned; toncoin every {plan['intervals']['toncoin']}s")
+
+    async def test_only_known_coins_and_ranges_count(self):
+        print("\n🔹 Testing client input cannot pollute the hot keys")
+        market = MarketService()
+        with patch.object(market_module, "hot_keys", self.tracker), \
+             patch.object(MarketService, "_get_cached_or_fetch", AsyncMock(return_value=None)):
+            await market.get_market_chart("btc", days="30")
+            await market.get_market_chart("bitcoin", days="31337")
+            await market.get_market_chart("not-a-real-coin", days="30")
+            await market.get_coin_data("not-a-real-coin")
+            await market.get_coin_data("eth")
+
+        members = {member for _, member in self.tracker.pending}
+        self.assertEqual(members, {"bitcoin:30", "ethereum"})
+        print(f"✅ Recorded {sorted(members)} only")
+
+if __name__ == "__main__":
+    unittest.main()
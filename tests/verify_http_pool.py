@@ -0,0 +1,76 @@
+import unittest
+import asyncio
+from unittest.mock import patch
+
+# Adjust path
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GEMINI_API_KEY", "mock-key-for-testing")
+
+import httpx
+from app.core.config import get_settings
+from app.core.http_client import HTTPClientManager
+
+settings = get_settings()
+
+class TestHTTPPool(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.manager = HTTPClientManager()
+
+        async def handler(request):
+            await asyncio.sleep(0.02) # Keep requests in flight together
+            if request.url.path == "/fail":
+                raise httpx.ConnectError("refused", request=request)
+            return httpx.Response(200, json={"ok": True})
+
+        # Pooled transports are swapped for a mock; the counting wrapper stays real
+        self.transport = patch.object(httpx, "AsyncHTTPTransport", lambda **kwargs: httpx.MockTransport(handler))
+        self.transport.start()
+
+    async def asyncTearDown(self):
+        self.transport.stop()
+        await self.manager.close()
+
+    async def test_client_reuse(self):
+        print("\n🔹 Testing one shared client per upstream host")
+        client = self.manager.get("coingecko")
+        self.assertIs(self.manager.get("coingecko"), client)
+        self.assertIsNot(self.manager.get("wikipedia"), client)
+
+        await client.aclose()
+        rebuilt = self.manager.get("coingecko")
+        self.assertIsNot(rebuilt, client)
+        self.assertFalse(rebuilt.is_closed)
+        print("✅ Clients reused, closed ones rebuilt")
+
+    async def test_timeout_selection(self):
+        print("\n🔹 Testing per-upstream timeouts")
+        self.assertEqual(self.manager.get("coingecko").timeout.read, settings.HTTP_TIMEOUT_COINGECKO)
+        self.assertEqual(self.manager.get("wikipedia").timeout.read, settings.HTTP_TIMEOUT_WIKIPEDIA)
+        self.assertEqual(self.manager.get("exchangerate").timeout.read, settings.HTTP_TIMEOUT_EXCHANGERATE)
+        self.assertEqual(self.manager.get("unknown").timeout.read, 10.0)
+        print("✅ Each host gets its configured timeout")
+
+    async def test_request_counters(self):
+        print("\n🔹 Testing pool counters from the counting transport")
+        client = self.manager.get("coingecko")
+        await asyncio.gather(*[client.get("https://api.example/ok") for _ in range(5)])
+        with self.assertRaises(httpx.ConnectError):
+            await client.get("https://api.example/fail")
+
+        # Counters survive a client rebuild
+        await client.aclose()
+        await self.manager.get("coingecko").get("https://api.example/ok")
+
+        stats = self.manager.stats()["coingecko"]
+        self.assertEqual(stats["requests_total"], 7)
+        self.assertEqual(stats["errors"], 1)
+        self.assertEqual(stats["in_flight"], 0)
+        self.assertEqual(stats["peak_in_flight"], 5)
+        self.assertEqual(stats["max_connections"], settings.HTTP_MAX_CONNECTIONS)
+        print(f"✅ {stats}")
+
+if __name__ == "__main__":
+    unittest.main()
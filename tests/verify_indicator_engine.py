@@ -0,0 +1,58 @@
+import unittest
+
+# Adjust path
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+from app.services.indicators import compute_indicators, to_json_list, volatility
+
+class TestIndicatorEngine(unittest.TestCase):
+    """
+    The NumPy engine must reproduce the original pandas definitions.
+    """
+
+    def assert_series_close(self, actual, expected):
+        expected = np.asarray(expected, dtype=float)
+        np.testing.assert_array_equal(np.isnan(actual), np.isnan(expected))
+        np.testing.assert_allclose(actual[~np.isnan(actual)], expected[~np.isnan(expected)], rtol=1e-8, atol=1e-8)
+
+    def test_matches_pandas(self):
+        print("\n🔹 Testing engine parity with pandas")
+        rng = np.random.default_rng(0)
+        for n in [1, 2, 15, 30, 720, 10_000]:
+            prices = 60_000 + np.cumsum(rng.normal(0, 150, n))
+            series = pd.Series(prices)
+            result = compute_indicators(prices.tolist())
+
+            delta = series.diff()
+            avg_gain = delta.clip(lower=0).rolling(window=14).mean()
+            avg_loss = (-delta.clip(upper=0)).rolling(window=14).mean()
+            macd = series.ewm(span=12, adjust=False).mean() - series.ewm(span=26, adjust=False).mean()
+            signal = macd.ewm(span=9, adjust=False).mean()
+
+            self.assert_series_close(result["sma"], series.rolling(window=20).mean())
+            self.assert_series_close(result["ema"], series.ewm(span=20, adjust=False).mean())
+            self.assert_series_close(result["rsi"], 100 - (100 / (1 + avg_gain / avg_loss)))
+            self.assert_series_close(result["macd"], macd)
+            self.assert_series_close(result["macd_signal"], signal)
+            if n > 2:
+                self.assertAlmostEqual(volatility(prices), series.pct_change().std() * 100)
+        print("✅ SMA/EMA/RSI/MACD match pandas at 1 to 10k points.")
+
+    def test_flat_prices_and_serialisation(self):
+        print("\n🔹 Testing flat series RSI and NaN serialisation")
+        result = compute_indicators([100.0] * 30)
+        rsi = to_json_list(result["rsi"])
+        # 0/0 average gain/loss is undefined, exactly as in pandas
+        self.assertTrue(all(value is None for value in rsi))
+        sma = to_json_list(result["sma"])
+        self.assertEqual(sma[:19], [None] * 19)
+        self.assertEqual(sma[19:], [100.0] * 11)
+        self.assertEqual(result["trend"], "Neutral")
+        print("✅ NaN becomes None only at serialisation.")
+
+if __name__ == "__main__":
+    unittest.main()
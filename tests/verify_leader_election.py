@@ -0,0 +1,79 @@
+import unittest
+import asyncio
+from unittest.mock import patch, AsyncMock
+
+# Adjust path
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GEMINI_API_KEY", "mock-key-for-testing")
+
+from app.core import scheduler
+from app.services.l1_cache import l1_cache
+from app.services.leader_election import LeaderElection
+
+KEY = "test:leader"
+
+class TestLeaderElection(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.a = LeaderElection(KEY, ttl=0.3)
+        self.b = LeaderElection(KEY, ttl=0.3)
+        await self.a.redis.flushall()
+        l1_cache.clear()
+
+    async def test_single_leader_and_clean_handover(self):
+        print("\n🔹 Testing one leader, handover on shutdown")
+        await self.a.start()
+        await self.b.start()
+        self.assertTrue(self.a.is_leader)
+        self.assertFalse(self.b.is_leader)
+
+        await asyncio.sleep(0.5) # Longer than the TTL: the lease is being renewed
+        self.assertTrue(self.a.is_leader)
+        self.assertFalse(self.b.is_leader)
+
+        await self.a.stop()
+        self.assertIsNone(await self.a.redis.get(KEY))
+        await self.b.campaign()
+        self.assertTrue(self.b.is_leader)
+        self.assertEqual((await self.a.status())["leader"], self.b.instance_id)
+        await self.b.stop()
+        print("✅ Lease renewed while alive, released on stop, taken by the follower")
+
+    async def test_failover_after_crash(self):
+        print("\n🔹 Testing failover when the leader dies")
+        self.assertTrue(await self.a.campaign()) # Leader that never renews again (crashed)
+        self.assertFalse(await self.b.campaign())
+
+        await asyncio.sleep(0.35)
+        self.assertTrue(await self.b.campaign())
+
+        # The old leader must not renew (or release) a lease it no longer owns
+        self.assertFalse(await self.a.campaign())
+        await self.a.stop()
+        self.assertEqual(await self.a.redis.get(KEY), self.b.instance_id)
+        print("✅ Follower took over within the TTL; stale leader stood down")
+
+    async def test_only_leader_sweeps(self):
+        print("\n🔹 Testing the refresh job is leader-only")
+        plan = {"kpis": ["bitcoin"], "charts": [], "heatmap": False}
+        sweep = AsyncMock(return_value=plan)
+        with patch.object(scheduler, "_refresh_hot_assets", sweep), \
+             patch.object(scheduler, "scheduler_leader", self.b):
+            await scheduler.refresh_market_data()
+            self.assertEqual(sweep.await_count, 0)
+
+            await self.b.campaign()
+            await scheduler.refresh_market_data()
+            self.assertEqual(sweep.await_count, 1)
+
+            status = await scheduler.scheduler_status()
+            self.assertEqual(status["leader"], self.b.instance_id)
+            self.assertEqual(status["last_sweep"]["instance"], self.b.instance_id)
+            self.assertEqual(status["last_sweep"]["kpis"], 1)
+        await self.b.stop()
+        print("✅ Follower skipped; leader swept and reported its duration")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import unittest
+import datetime
+import numpy as np
+from unittest.mock import patch, AsyncMock
+
+# Adjust path
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GEMINI_API_KEY", "mock-key-for-testing")
+
+from app.services.l1_cache import l1_cache
+from app.services.indicators import IndicatorState, compute_indicators
+from app.services.live_indicators import LiveIndicatorService
+
+START_MS = 1_700_000_000_000
+STEP_MS = 300_000
+
+def iso(i):
+    ts = datetime.datetime.fromtimestamp((START_MS + i * STEP_MS) / 1000, tz=datetime.timezone.utc)
+    return ts.isoformat().replace("+00:00", "Z")
+
+def seed_chart(values):
+    return {"timestamps": [START_MS + i * STEP_MS for i in range(len(values))], "values": values}
+
+class TestLiveIndicators(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.seed = [100.0 - i * 0.5 for i in range(60)] # Steady decline: MACD below signal, RSI 0
+        self.service = self._service()
+        await self.service.cache.redis.flushall()
+        l1_cache.clear()
+
+    def _service(self):
+        service = LiveIndicatorService()
+        service.market.resolve_symbol = AsyncMock(side_effect=lambda symbol: symbol)
+        service.market.get_market_chart = AsyncMock(return_value=seed_chart(self.seed))
+        return service
+
+    def test_running_sums_match_full_series(self):
+        print("\n🔹 Testing O(1) SMA/RSI updates against the full-series engine")
+        rng = np.random.default_rng(3)
+        prices = list(100 + np.cumsum(rng.normal(0, 1, 500)))
+        prices[200:230] = [prices[199]] * 30 # Flat stretch: RSI undefined, no float residue
+        state = IndicatorState()
+        full = compute_indicators(prices)
+        for i, price in enumerate(prices):
+            point = state.update(price)
+            for name in ("sma", "rsi"):
+                expected = full[name][i]
+                if np.isnan(expected):
+                    self.assertIsNone(point[name], f"{name}[{i}]")
+                else:
+                    self.assertAlmostEqual(point[name], expected, places=9, msg=f"{name}[{i}]")
+        print("✅ 500 ticks identical to the vectorised series")
+
+    async def test_checkpoint_round_trip(self):
+        print("\n🔹 Testing checkpoint save/restore")
+        for i, price in enumerate([71.0, 72.5, 71.8], start=60):
+            await self.service.on_tick("bitcoin", price, iso(i))
+
+        restarted = self._service() # New process: no in-memory state
+        resumed = await restarted.on_tick("bitcoin", 73.0, iso(63))
+        continued = await self.service.on_tick("bitcoin", 73.0, iso(63))
+
+        restarted.market.get_market_chart.assert_not_awaited() # Restored, not re-seeded
+        self.assertEqual(resumed, continued)
+        state = restarted.states["indicator:live:bitcoin:" + IndicatorState().params_id]
+        self.assertEqual(state.to_dict(), IndicatorState.from_dict(state.to_dict()).to_dict())
+        self.assertEqual(state.count, 64)
+        print("✅ Restored state continues exactly where the checkpoint left off")
+
+    async def test_crossover_and_threshold_events(self):
+        print("\n🔹 Testing crossover and RSI threshold events")
+        rally = [70.5 + i * 1.0 for i in range(40)]
+        selloff = [rally[-1] - i * 1.0 for i in range(1, 41)]
+        events = []
+        for i, price in enumerate(rally + selloff, start=60):
+            events.extend((await self.service.on_tick("bitcoin", price, iso(i)))["events"])
+
+        self.assertEqual(events.count("macd_bullish_crossover"), 1)
+        self.assertEqual(events.count("macd_bearish_crossover"), 1)
+        self.assertEqual(events.count("rsi_overbought"), 1)
+        self.assertEqual(events.count("rsi_oversold"), 1)
+        self.assertLess(events.index("macd_bullish_crossover"), events.index("macd_bearish_crossover"))
+        self.assertLess(events.index("rsi_overbought"), events.index("rsi_oversold"))
+        print(f"✅ Events in order: {events}")
+
+    async def test_repeated_ticks_applied_once(self):
+        print("\n🔹 Testing duplicate ticks are ignored")
+        first = await self.service.on_tick("bitcoin", 75.0, iso(60))
+        with patch.object(self.service.cache, "set", AsyncMock()) as checkpoint:
+            repeat = await self.service.on_tick("bitcoin", 75.0, iso(60))
+            stale = await self.service.on_tick("bitcoin", 90.0, iso(59)) # Older than the last tick
+            checkpoint.assert_not_awaited()
+
+        self.assertEqual(repeat, {**first, "events": []})
+        self.assertEqual(stale, repeat)
+        state = self.service.states["indicator:live:bitcoin:" + IndicatorState().params_id]
+        self.assertEqual(state.count, 61)
+        print("✅ Same upstream update applied once, older ones dropped")
+
+if __name__ == "__main__":
+    unittest.main()
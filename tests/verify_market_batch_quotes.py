@@ -0,0 +1,84 @@
+import unittest
+from unittest.mock import patch
+
+# Adjust path
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GEMINI_API_KEY", "mock-key-for-testing")
+
+import httpx
+from app.services.l1_cache import l1_cache
+from app.services.market import MarketService
+from app.core.http_client import http_clients
+
+class TestBatchQuotes(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.market = MarketService()
+        self.requested_ids = []
+
+        async def handler(request):
+            ids = request.url.params["ids"].split(",")
+            self.requested_ids.append(ids)
+            return httpx.Response(200, json=[
+                {"id": coin_id, "name": coin_id.title(), "symbol": coin_id[:3], "current_price": 10.0}
+                for coin_id in ids if coin_id != "not-a-coin"
+            ])
+
+        self.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        await self.market.cache.redis.flushall()
+        l1_cache.clear()
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+
+    async def test_only_misses_go_upstream(self):
+        print("\n🔹 Testing batched KPI fetch with a partially warm cache")
+        await self.market.cache.set("market:kpi:bitcoin", {"name": "Bitcoin", "current_price_usd": 68000.0})
+
+        with patch.object(http_clients, "get", return_value=self.client):
+            result = await self.market.get_coin_data_many(["btc", "ethereum", "solana", "not-a-coin"])
+
+        # One upstream call, carrying only the cache misses
+        self.assertEqual(len(self.requested_ids), 1)
+        self.assertEqual(sorted(self.requested_ids[0]), ["ethereum", "not-a-coin", "solana"])
+
+        # Results are keyed by the requested ids (symbols included)
+        self.assertEqual(result["btc"]["current_price_usd"], 68000.0)
+        self.assertEqual(result["ethereum"]["current_price_usd"], 10.0)
+        self.assertIn("error", result["not-a-coin"])
+
+        # Fan-out into the per-coin KPI keys
+        self.assertEqual((await self.market.cache.get("market:kpi:solana"))["name"], "Solana")
+        self.assertIsNone(await self.market.cache.get("market:kpi:not-a-coin"))
+        print("✅ Misses fetched in one call and fanned out to market:kpi:{id}.")
+
+    async def test_batch_endpoint(self):
+        print("\n🔹 Testing GET /market/batch")
+        from fastapi import FastAPI
+        from app.api.market import router
+        from app.services.rate_limiter import limiter
+
+        app = FastAPI()
+        app.state.limiter = limiter
+        app.include_router(router, prefix="/api/v1")
+        api = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+        with patch.object(http_clients, "get", return_value=self.client):
+            resp = await api.get("/api/v1/market/batch", params={"ids": "btc,ethereum,not-a-coin", "fields": "kpi"})
+            too_many = await api.get("/api/v1/market/batch", params={"ids": ",".join(f"c{i}" for i in range(51))})
+        await api.aclose()
+
+        self.assertEqual(resp.status_code, 200)
+        body = resp.json()
+        self.assertEqual(list(body["assets"]), ["btc", "ethereum", "not-a-coin"])
+        self.assertEqual(body["assets"]["btc"]["kpi"]["current_price_usd"], 10.0)
+        self.assertNotIn("chart_data", body["assets"]["btc"])
+        self.assertIn("error", body["assets"]["not-a-coin"])
+        self.assertEqual(len(self.requested_ids), 1) # One upstream quote call for all misses
+        self.assertEqual(too_many.status_code, 400)
+        print("✅ One request, one upstream call, one payload.")
+
+if __name__ == "__main__":
+    unittest.main()
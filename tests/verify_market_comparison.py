@@ -0,0 +1,79 @@
+import unittest
+import asyncio
+import time
+from unittest.mock import patch
+
+# Adjust path
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GEMINI_API_KEY", "mock-key-for-testing")
+
+import httpx
+import numpy as np
+from app.services.l1_cache import l1_cache
+from app.services.market import MarketService
+from app.services.comparison import align_series, normalised_returns
+from app.core.http_client import http_clients
+
+HOUR_MS = 3_600_000
+ASSETS = ["bitcoin", "ethereum", "solana", "cardano", "ripple", "dogecoin", "polkadot", "litecoin", "chainlink", "uniswap"]
+
+class TestComparisonEngine(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.market = MarketService()
+        self.calls = 0
+        now = int(time.time() * 1000)
+
+        async def handler(request):
+            self.calls += 1
+            await asyncio.sleep(0.1) # Upstream latency
+            # Each coin's hourly series is offset by a few minutes, like CoinGecko's
+            offset = (ASSETS.index(request.url.path.split("/")[4]) + 1) * 60_000
+            prices = [[now - offset - i * HOUR_MS, 100.0 + (720 - i)] for i in range(720, -1, -1)]
+            return httpx.Response(200, json={"prices": prices})
+
+        self.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        await self.market.cache.redis.flushall()
+        l1_cache.clear()
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+
+    def test_alignment(self):
+        print("\n🔹 Testing resampling onto a common grid")
+        charts = {
+            "a": {"timestamps": [0, 10, 20, 30], "values": [1.0, 2.0, 3.0, 4.0]},
+            "b": {"timestamps": [5, 15, 25, 35], "values": [10.0, 20.0, 30.0, 40.0]},
+        }
+        names, grid, prices = align_series(charts, step_ms=10)
+        self.assertEqual(names, ["a", "b"])
+        self.assertEqual(grid.tolist(), [10, 20, 30]) # Overlap only, anchored on the earliest last point
+        np.testing.assert_allclose(prices, [[2.0, 3.0, 4.0], [15.0, 25.0, 35.0]])
+        np.testing.assert_allclose(normalised_returns(prices), [[0, 50, 100], [0, 100 * 10 / 15, 100 * 20 / 15]])
+        print("✅ Series interpolated onto shared timestamps")
+
+    async def test_ten_assets_concurrently(self):
+        print("\n🔹 Testing a 10-asset comparison fetches concurrently")
+        started = time.perf_counter()
+        with patch.object(http_clients, "get", return_value=self.client):
+            result = await self.market.get_comparison_data(ASSETS, "30")
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(self.calls, 10)
+        self.assertLess(elapsed, 0.6) # Sequential would be >= 1s
+        self.assertEqual(len(result["datasets"]), 10)
+        lengths = {len(d["values"]) for d in result["datasets"]}
+        self.assertEqual(lengths, {len(result["timestamps"])})
+        self.assertEqual(result["datasets"][0]["values"][0], 0.0)
+        print(f"✅ 10 charts in {elapsed:.2f}s on one {len(result['timestamps'])}-point grid")
+
+    async def test_symbol_limit(self):
+        print("\n🔹 Testing the symbol bound")
+        with self.assertRaises(ValueError):
+            await self.market.get_comparison_data([f"coin-{i}" for i in range(11)])
+        print("✅ Too many symbols rejected")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import unittest
+import asyncio
+import time
+from unittest.mock import patch
+
+# Adjust path
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GEMINI_API_KEY", "mock-key-for-testing")
+
+import httpx
+from app.services.l1_cache import l1_cache
+from app.services.market import MarketService
+from app.core.http_client import http_clients
+
+def coin(rank):
+    return {
+        "id": f"coin-{rank}", "symbol": f"c{rank}", "name": f"Coin {rank}",
+        "current_price": 1000.0 / rank,
+        "price_change_percentage_24h": None if rank == 7 else ((rank * 37) % 41) - 20.0,
+        "market_cap": 1e12 / rank,
+        "total_volume": 1e9 / ((rank * 13) % 97 + 1)
+    }
+
+class TestMarketHeatmap(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.market = MarketService()
+        self.pages = []
+
+        async def handler(request):
+            page = int(request.url.params["page"])
+            per_page = int(request.url.params["per_page"])
+            self.pages.append(page)
+            await asyncio.sleep(0.1) # Upstream latency
+            ranks = range((page - 1) * per_page + 1, page * per_page + 1)
+            return httpx.Response(200, json=[coin(r) for r in ranks])
+
+        self.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        await self.market.cache.redis.flushall()
+        l1_cache.clear()
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+
+    async def test_universe_pages_fetched_concurrently(self):
+        print("\n🔹 Testing the top-500 universe is fetched in parallel pages")
+        started = time.perf_counter()
+        with patch.object(http_clients, "get", return_value=self.client):
+            universe = await self.market.get_market_universe()
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(sorted(self.pages), [1, 2])
+        self.assertLess(elapsed, 0.19) # Sequential pages would take >= 0.2s
+        self.assertEqual(len(universe["id"]), 500)
+        self.assertEqual(universe["id"][499], "coin-500")
+        print(f"✅ 2 pages in {elapsed:.2f}s")
+
+    async def test_every_view_from_one_entry(self):
+        print("\n🔹 Testing sizes, sorts and filters are slices of one entry")
+        with patch.object(http_clients, "get", return_value=self.client):
+            top10 = await self.market.get_market_heatmap(limit=10)
+            top50 = await self.market.get_market_heatmap(limit=50)
+            gainers = await self.market.get_market_heatmap(limit=5, sort="gainers")
+            losers = await self.market.get_market_heatmap(limit=5, sort="losers")
+            by_volume = await self.market.get_market_heatmap(limit=3, sort="volume")
+            liquid_large = await self.market.get_market_heatmap(limit=500, min_volume=5e8, min_market_cap=1e10)
+
+        self.assertEqual(len(self.pages), 2) # Everything after the first call is served from cache
+        self.assertEqual(top50[:10], top10)
+        self.assertEqual(top10[0], {"id": "coin-1", "symbol": "C1", "name": "Coin 1", "price": 1000.0,
+                                    "change_24h": 17.0, "market_cap": 1e12, "volume": 1e9 / 14})
+
+        changes = [c["change_24h"] for c in gainers]
+        self.assertEqual(changes, sorted(changes, reverse=True))
+        self.assertEqual(changes[0], 20.0)
+        self.assertEqual([c["change_24h"] for c in losers][0], -20.0)
+        self.assertNotIn("coin-7", [c["id"] for c in gainers + losers]) # No 24h change: unranked
+        volumes = [c["volume"] for c in by_volume]
+        self.assertEqual(volumes, sorted(volumes, reverse=True))
+        self.assertTrue(liquid_large)
+        self.assertTrue(all(c["volume"] >= 5e8 and c["market_cap"] >= 1e10 for c in liquid_large))
+        print(f"✅ 6 views, 1 upstream fetch ({len(liquid_large)} coins pass the filters)")
+
+    async def test_refused_universe_not_cached(self):
+        print("\n🔹 Testing an all-pages failure is not cached")
+        refused = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(401, json={})))
+        with patch.object(http_clients, "get", return_value=refused):
+            self.assertEqual(await self.market.get_market_heatmap(limit=10), [])
+        await refused.aclose()
+        self.assertIsNone(await self.market.cache.get(self.market._universe_key()))
+
+        with patch.object(http_clients, "get", return_value=self.client):
+            self.assertEqual(len(await self.market.get_market_heatmap(limit=10)), 10) # Retried at once, not after the TTL
+        print("✅ Empty universe left uncached; next request refetched")
+
+if __name__ == "__main__":
+    unittest.main()
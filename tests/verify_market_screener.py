@@ -0,0 +1,120 @@
+import unittest
+import time
+import numpy as np
+from unittest.mock import patch
+
+# Adjust path
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GEMINI_API_KEY", "mock-key-for-testing")
+
+import httpx
+from app.services import screener
+from app.services.l1_cache import l1_cache
+from app.services.market import MarketService
+from app.core.http_client import http_clients
+
+ASSETS = 500
+HOUR_MS = 3_600_000
+
+def coin(rank):
+    return {
+        "id": f"coin-{rank}", "symbol": f"c{rank}", "name": f"Coin {rank}",
+        "current_price": 100.0,
+        "price_change_percentage_24h": None if rank == 7 else ((rank * 37) % 41) - 20.0,
+        "market_cap": 1e12 / rank,
+        "total_volume": 1e9 / ((rank * 13) % 97 + 1)
+    }
+
+def walk(rng, n, drift):
+    # 30 days of hourly prices; short, flat and single-point histories mixed in
+    return list(100 * np.exp(np.cumsum(rng.normal(drift, rng.uniform(0.001, 0.08), n))))
+
+class TestMarketScreener(unittest.IsolatedAsyncioTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        rng = np.random.default_rng(7)
+        lengths = [720] * 480 + [5, 1, 15, 16, 30, 100, 200, 2, 3, 40]
+        cls.charts = {}
+        for rank, n in enumerate(lengths, start=1):
+            values = [42.0] * n if rank == 3 else walk(rng, n, rng.normal(0, 0.002))
+            prices = [[1_700_000_000_000 + i * HOUR_MS, v] for i, v in enumerate(values)]
+            cls.charts[f"coin-{rank}"], _ = MarketService()._build_chart(prices, "30")
+
+    async def asyncSetUp(self):
+        self.market = MarketService()
+
+        async def handler(request):
+            page = int(request.url.params["page"])
+            per_page = int(request.url.params["per_page"])
+            ranks = range((page - 1) * per_page + 1, page * per_page + 1)
+            return httpx.Response(200, json=[coin(r) for r in ranks])
+
+        self.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        await self.market.cache.redis.flushall()
+        l1_cache.clear()
+
+        await self.market.cache.set_many({self.market._chart_key(coin_id, "30"): chart for coin_id, chart in self.charts.items()}, 600)
+        # coin-491 .. coin-500 have no cached chart
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+
+    async def test_matches_per_asset_health(self):
+        print("\n🔹 Testing bulk scores equal calculate_market_health")
+        with patch.object(http_clients, "get", return_value=self.client):
+            result = await self.market.get_screener(limit=ASSETS, sort="market_cap", ascending=True)
+            heatmap = await self.market.get_market_heatmap(limit=50)
+
+        self.assertEqual(result["screened"], 490)
+        self.assertEqual(result["missing"], 10)
+        for row in result["results"]:
+            kpi = {"price_change_percentage_24h": row["change_24h"]}
+            health = self.market.calculate_market_health(self.charts[row["id"]], kpi, heatmap)
+            self.assertEqual((row["score"], row["status"]), (health["score"], health["status"]), row["id"])
+            self.assertEqual(row["components"], health["components"], row["id"])
+            self.assertIn(self.charts[row["id"]]["signal_type"].split()[0], row["trend"])
+        print(f"✅ {result['screened']} assets scored identically, {result['missing']} without a cached chart")
+
+    async def test_filters_and_ranking(self):
+        print("\n🔹 Testing screener filters")
+        with patch.object(http_clients, "get", return_value=self.client):
+            ranked = await self.market.get_screener(limit=20)
+            oversold = await self.market.get_screener(limit=ASSETS, max_rsi=30, min_score=40)
+            bearish = await self.market.get_screener(limit=ASSETS, trend="Bearish", sort="rsi", ascending=True)
+
+        scores = [row["score"] for row in ranked["results"]]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+        self.assertEqual(len(scores), 20)
+        self.assertTrue(oversold["results"])
+        self.assertEqual(len(oversold["results"]), oversold["matched"])
+        for row in oversold["results"]:
+            self.assertLessEqual(row["rsi"], 30)
+            self.assertGreaterEqual(row["score"], 40)
+        rsis = [row["rsi"] for row in bearish["results"] if row["rsi"] is not None]
+        self.assertEqual(rsis, sorted(rsis))
+        self.assertTrue(all(row["trend"] == "Bearish" for row in bearish["results"]))
+        print(f"✅ {oversold['matched']} oversold with score >= 40; {bearish['matched']} bearish")
+
+    async def test_bulk_speed(self):
+        print("\n🔹 Testing end-to-end screener latency for 500 assets x 720 points")
+        with patch.object(http_clients, "get", return_value=self.client):
+            started = time.perf_counter()
+            await self.market.get_screener(limit=50) # Builds the universe and feature caches
+            cold = time.perf_counter() - started
+
+            # Later requests read the cached features, even with a cold L1
+            l1_cache.clear()
+            started = time.perf_counter()
+            result = await self.market.get_screener(limit=50)
+            elapsed = time.perf_counter() - started
+
+        self.assertEqual(result["screened"], 490)
+        self.assertEqual(result["coverage"], 0.98)
+        self.assertLess(elapsed, 0.1)
+        print(f"✅ Screened in {elapsed * 1000:.1f}ms (first request {cold * 1000:.1f}ms)")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+import asyncio
+from unittest.mock import patch
+
+# Adjust path
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GEMINI_API_KEY", "mock-key-for-testing")
+
+import httpx
+from redis.commands.core import BasicKeyCommands
+from app.services.l1_cache import l1_cache
+from app.services.market import MarketService
+from app.core.http_client import http_clients
+
+class TestSingleFlight(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.market = MarketService()
+        self.upstream_calls = 0
+
+        async def handler(request):
+            self.upstream_calls += 1
+            await asyncio.sleep(0.05) # Keep the fetch in flight while waiters pile up
+            return httpx.Response(200, json={
+                "name": "Bitcoin", "symbol": "btc",
+                "market_data": {"current_price": {"usd": 68000.0}}
+            })
+
+        self.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        await self.market.cache.redis.flushall()
+        l1_cache.clear()
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+
+    async def test_cold_key_stampede(self):
+        print("\n🔹 Testing 500 concurrent requests for one cold key")
+        with patch.object(http_clients, "get", return_value=self.client):
+            results = await asyncio.gather(*[self.market.get_coin_data("bitcoin") for _ in range(500)])
+
+        self.assertEqual(self.upstream_calls, 1)
+        self.assertTrue(all(r["current_price_usd"] == 68000.0 for r in results))
+        self.assertEqual(MarketService.inflight.in_flight(), 0)
+        print("✅ Exactly one upstream call served all 500 requests.")
+
+    async def test_peer_lock_waits_for_cache(self):
+        print("\n🔹 Testing waiter when another worker holds the fetch lock")
+        key = "market:kpi:ethereum"
+        token = await self.market.cache.acquire_lock(key)
+        self.assertIsNotNone(token)
+
+        async def peer_publishes():
+            await asyncio.sleep(0.2)
+            await self.market.cache.set(key, {"name": "Ethereum", "current_price_usd": 3000.0})
+            await self.market.cache.release_lock(key, token)
+
+        with patch.object(http_clients, "get", return_value=self.client):
+            result, _ = await asyncio.gather(self.market.get_coin_data("ethereum"), peer_publishes())
+
+        self.assertEqual(self.upstream_calls, 0)
+        self.assertEqual(result["current_price_usd"], 3000.0)
+        print("✅ Waiter reused the peer's cached value.")
+
+    async def test_release_never_deletes_a_peer_lock(self):
+        print("\n🔹 Testing lock release when a peer takes the lock mid-release")
+        cache, key = self.market.cache, "market:kpi:solana"
+        token = await cache.acquire_lock(key)
+        original_get = BasicKeyCommands.get
+
+        async def racing_get(client, name):
+            value = await original_get(client, name)
+            if name == f"lock:{key}" and value == token:
+                # Our lock expires and a peer acquires it right after we read it
+                await cache.redis.delete(name)
+                await cache.redis.set(name, "peer-token")
+            return value
+
+        with patch.object(BasicKeyCommands, "get", racing_get):
+            await cache.release_lock(key, token)
+
+        self.assertEqual(await cache.redis.get(f"lock:{key}"), "peer-token")
+        await cache.release_lock(key, "peer-token")
+        self.assertFalse(await cache.is_locked(key))
+        print("✅ The peer's lock survived; its owner released it.")
+
+if __name__ == "__main__":
+    unittest.main()
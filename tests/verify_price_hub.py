@@ -0,0 +1,249 @@
+import unittest
+import asyncio
+import time
+from unittest.mock import patch, AsyncMock
+
+# Adjust path
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GEMINI_API_KEY", "mock-key-for-testing")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.api.market import router as market_router, websocket_price_stream
+from app.services.price_hub import PriceHub, Subscription, price_hub, binary_frames_available
+from app.services.live_indicators import live_indicators
+
+class TestPriceHub(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.hub = PriceHub(interval=0.05, queue_size=1)
+        self.price = 100.0
+
+        async def get_coin_data(coin_id):
+            self.price += 1
+            return {"current_price_usd": self.price, "price_change_percentage_24h": 1.5}
+
+        self.fetch = AsyncMock(side_effect=get_coin_data)
+        self.patches = [
+            patch.object(self.hub.market, "get_coin_data", self.fetch),
+            patch.object(self.hub.market, "resolve_symbol", AsyncMock(side_effect=lambda s: {"btc": "bitcoin"}.get(s, s))),
+            patch.object(live_indicators, "on_tick", AsyncMock(return_value={"rsi": 50.0})),
+        ]
+        for p in self.patches:
+            p.start()
+
+    async def asyncTearDown(self):
+        await self.hub.stop()
+        for p in self.patches:
+            p.stop()
+
+    async def test_one_poller_per_symbol(self):
+        print("\n🔹 Testing 1000 subscribers share one poller")
+        subs = [await self.hub.subscribe("btc" if i % 2 else "bitcoin") for i in range(1000)]
+        updates = await asyncio.gather(*(s.get() for s in subs))
+
+        self.assertEqual(len(self.hub.pollers), 1)
+        self.assertEqual({u["price"] for u in updates}, {101.0})
+        self.assertEqual(self.fetch.await_count, 1)
+        self.assertEqual(live_indicators.on_tick.await_count, 1) # Indicators computed once per tick
+        print("✅ One upstream read and one indicator update fanned out to 1000 clients")
+
+    async def test_slow_consumer_is_conflated(self):
+        print("\n🔹 Testing a slow consumer never blocks the poller")
+        fast = await self.hub.subscribe("bitcoin")
+        slow = await self.hub.subscribe("bitcoin")
+        for _ in range(4):
+            await fast.get()
+
+        latest = await slow.get()
+        self.assertGreaterEqual(slow.conflated, 2)
+        self.assertEqual(latest["price"], self.hub.latest["bitcoin"]["price"]) # Skipped straight to the newest
+        print(f"✅ Slow client skipped {slow.conflated} stale updates")
+
+    async def test_poller_stops_with_last_subscriber(self):
+        print("\n🔹 Testing the poller lifecycle")
+        a = await self.hub.subscribe("bitcoin")
+        b = await self.hub.subscribe("bitcoin")
+        await a.get()
+        poller = self.hub.pollers["bitcoin"]
+
+        self.hub.unsubscribe(a)
+        self.assertFalse(poller.cancelled())
+        self.hub.unsubscribe(b)
+        await asyncio.sleep(0)
+        self.assertTrue(poller.cancelled())
+        self.assertEqual(self.hub.stats()["symbols"], 0)
+
+        # Resubscribing starts a fresh poller
+        c = await self.hub.subscribe("bitcoin")
+        self.assertEqual((await c.get())["symbol"], "bitcoin")
+        print("✅ Poller stopped on last unsubscribe and restarted on demand")
+
+    async def test_session_batches_symbols(self):
+        print("\n🔹 Testing a multiplexed session gets one frame per tick")
+        session = self.hub.session()
+        session.batch_window = 0.02
+        resolved = await session.subscribe(["btc", "ethereum", "solana", "bitcoin"])
+        self.assertEqual(resolved["btc"], "bitcoin")
+        self.assertEqual(len(self.hub.pollers), 3)
+
+        batch = await session.next_batch()
+        self.assertEqual(set(batch), {"bitcoin", "ethereum", "solana"})
+
+        await session.unsubscribe(["solana"])
+        self.assertNotIn("solana", self.hub.pollers)
+        with self.assertRaises(ValueError):
+            await session.subscribe([f"coin-{i}" for i in range(session.max_symbols)])
+        session.close()
+        self.assertEqual(self.hub.pollers, {})
+        print("✅ 3 symbols in one batch; pollers released on close")
+
+    async def test_session_aliases_are_reference_counted(self):
+        print("\n🔹 Testing aliases of one coin share a counted subscription")
+        session = self.hub.session()
+        await session.subscribe(["btc", "bitcoin"])
+        self.assertEqual(len(self.hub.pollers), 1)
+
+        self.assertEqual(await session.unsubscribe(["btc"]), [])
+        self.assertIn("bitcoin", self.hub.pollers) # Still wanted as "bitcoin"
+        self.assertEqual(await session.unsubscribe(["btc"]), []) # Repeats are no-ops
+        self.assertIn("bitcoin", self.hub.pollers)
+
+        self.assertEqual(await session.unsubscribe(["bitcoin"]), ["bitcoin"])
+        self.assertEqual(self.hub.pollers, {})
+        session.close()
+        print("✅ Coin released only with its last alias")
+
+    async def test_unchanged_polls_are_not_published(self):
+        print("\n🔹 Testing repeated prices are not re-broadcast")
+        self.fetch.side_effect = None
+        self.fetch.return_value = {"current_price_usd": 100.0, "price_change_percentage_24h": 1.5}
+        sub = await self.hub.subscribe("bitcoin")
+        await sub.get()
+        await asyncio.sleep(0.2)
+
+        self.assertGreaterEqual(self.fetch.await_count, 3)
+        self.assertEqual(self.hub.ticks, 1)
+        self.assertTrue(sub.queue.empty())
+        print(f"✅ {self.hub.unchanged} unchanged polls suppressed")
+
+    async def test_session_sends_deltas_at_max_rate(self):
+        print("\n🔹 Testing delta frames and the per-client rate cap")
+        session = self.hub.session()
+        session.batch_window, session.min_interval = 0, 0.2
+        session.offer({"symbol": "bitcoin", "price": 1.0, "change_24h": 2.0, "indicators": {"rsi": 50.0, "trend": "up"}})
+        self.assertEqual(set((await session.next_batch())["bitcoin"]), {"price", "change_24h", "indicators"})
+
+        started = asyncio.get_running_loop().time()
+        for price in (1.5, 2.0, 2.5): # Burst: conflated into one frame
+            session.offer({"symbol": "bitcoin", "price": price, "change_24h": 2.0, "indicators": {"rsi": 51.0, "trend": "up"}})
+        batch = await session.next_batch()
+        self.assertGreaterEqual(asyncio.get_running_loop().time() - started, 0.15)
+        self.assertEqual(batch, {"bitcoin": {"price": 2.5, "indicators": {"rsi": 51.0}}})
+        self.assertEqual(session.conflated, 2)
+        print("✅ Only changed fields sent, burst held to the client's rate")
+
+    def test_mailbox_keeps_newest(self):
+        print("\n🔹 Testing the bounded mailbox")
+        sub = Subscription("bitcoin", maxsize=2)
+        for price in (1, 2, 3, 4):
+            sub.offer({"price": price})
+        self.assertEqual([sub.queue.get_nowait()["price"] for _ in range(2)], [3, 4])
+        self.assertEqual(sub.conflated, 2)
+        print("✅ Oldest updates dropped first")
+
+class TestMultiplexedEndpoint(unittest.TestCase):
+
+    def setUp(self):
+        app = FastAPI()
+        app.include_router(market_router)
+        self.client = TestClient(app)
+
+        async def get_coin_data(coin_id):
+            return {"current_price_usd": 1.0 + len(coin_id), "price_change_percentage_24h": 0.5}
+
+        self.patches = [
+            patch.object(price_hub, "interval", 0.1),
+            patch.object(price_hub.market, "get_coin_data", AsyncMock(side_effect=get_coin_data)),
+            patch.object(price_hub.market, "resolve_symbol", AsyncMock(side_effect=lambda s: {"btc": "bitcoin"}.get(s, s))),
+            patch.object(live_indicators, "on_tick", AsyncMock(return_value={"rsi": 50.0})),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+
+    def test_subscribe_ping_unsubscribe(self):
+        print("\n🔹 Testing /ws control messages and batched frames")
+        with self.client.websocket_connect("/ws") as ws:
+            ws.send_json({"action": "subscribe", "symbols": ["BTC", "ethereum"]})
+            self.assertEqual(ws.receive_json(), {"type": "subscribed", "symbols": {"btc": "bitcoin", "ethereum": "ethereum"}})
+
+            frame = ws.receive_json()
+            self.assertEqual(frame["type"], "prices")
+            self.assertEqual(set(frame["data"]), {"bitcoin", "ethereum"})
+            self.assertEqual(frame["data"]["bitcoin"]["price"], 8.0)
+
+            ws.send_json({"action": "unsubscribe", "symbols": ["btc"]})
+            ws.send_json({"action": "ping"})
+            ws.send_json({"action": "bogus"})
+            frames = []
+            while len(frames) < 3:
+                frame = ws.receive_json()
+                if frame["type"] != "prices": # Price frames interleave with the replies
+                    frames.append(frame)
+            self.assertEqual([f["type"] for f in frames], ["unsubscribed", "pong", "error"])
+            self.assertEqual(frames[0]["symbols"], ["bitcoin"])
+        for _ in range(50): # The server tears the session down on its own thread
+            if not price_hub.pollers:
+                break
+            time.sleep(0.02)
+        self.assertEqual(price_hub.pollers, {})
+        print("✅ One socket carried both symbols; pollers released on disconnect")
+
+    def test_legacy_stream_released_on_disconnect(self):
+        print("\n🔹 Testing /ws/{symbol} releases its poller when the client leaves")
+
+        class LeavingClient:
+            # Takes one frame, then goes away; the price never changes again,
+            # so no later send would notice the disconnect
+            def __init__(self):
+                self.sent = []
+                self.gone = asyncio.Event()
+
+            async def accept(self):
+                pass
+
+            async def send_json(self, data):
+                self.sent.append(data)
+                self.gone.set()
+
+            async def receive(self):
+                await self.gone.wait()
+                return {"type": "websocket.disconnect", "code": 1000}
+
+        async def run():
+            client = LeavingClient()
+            await asyncio.wait_for(websocket_price_stream(client, "btc"), timeout=2)
+            return client
+
+        client = asyncio.run(run())
+        self.assertEqual(client.sent[0]["symbol"], "btc")
+        self.assertEqual(price_hub.pollers, {})
+        print("✅ Handler returned and poller stopped without waiting for a failed send")
+
+    @unittest.skipIf(binary_frames_available(), "msgpack installed")
+    def test_msgpack_falls_back_to_json(self):
+        print("\n🔹 Testing ?format=msgpack without msgpack installed")
+        with self.client.websocket_connect("/ws?format=msgpack&max_rate=0.5") as ws:
+            self.assertEqual(ws.receive_json()["type"], "error")
+            ws.send_json({"action": "ping"})
+            self.assertEqual(ws.receive_json()["type"], "pong")
+        print("✅ Client told, JSON frames sent instead")
+
+if __name__ == "__main__":
+    unittest.main()
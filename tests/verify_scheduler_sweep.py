@@ -0,0 +1,87 @@
+import unittest
+import asyncio
+import time
+from unittest.mock import patch, AsyncMock
+
+# Adjust path
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GEMINI_API_KEY", "mock-key-for-testing")
+
+from app.core import scheduler
+from app.core.config import get_settings
+from app.services.l1_cache import l1_cache
+from app.services.leader_election import LeaderElection
+from app.services.market import MarketService
+
+settings = get_settings()
+CHARTS = [(f"coin-{i}", "30") for i in range(8)]
+
+class TestSchedulerSweep(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        await MarketService().cache.redis.flushall()
+        l1_cache.clear()
+        scheduler._last_refresh.clear()
+        self.leader = LeaderElection("test:leader", ttl=5)
+        self.leader.is_leader = True
+        self.active = self.peak = 0
+
+        async def slow_chart(asset, days="30", **kwargs):
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            await asyncio.sleep(0.1)
+            self.active -= 1
+            return {"timestamps": [], "values": []}
+
+        plan = {"kpis": ["bitcoin"], "charts": CHARTS, "heatmap": True, "intervals": {}}
+        self.patches = [
+            patch.object(scheduler, "scheduler_leader", self.leader),
+            patch.object(scheduler, "plan_refresh", AsyncMock(side_effect=lambda *a: {**plan})),
+            patch.object(MarketService, "get_market_chart", side_effect=slow_chart),
+            patch.object(MarketService, "get_coin_data_many", AsyncMock(return_value={"bitcoin": {"name": "Bitcoin"}})),
+            patch.object(MarketService, "get_market_universe", AsyncMock(return_value={})),
+        ]
+        for p in self.patches:
+            p.start()
+
+    async def asyncTearDown(self):
+        for p in self.patches:
+            p.stop()
+
+    async def test_bounded_concurrency_and_latency(self):
+        print("\n🔹 Testing the sweep runs targets concurrently, bounded")
+        started = time.perf_counter()
+        await scheduler.refresh_market_data()
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(self.peak, settings.SCHEDULER_CONCURRENCY)
+        self.assertLess(elapsed, 0.1 * len(CHARTS) / 2) # Sequential would be 0.8s
+        sweep = (await scheduler.scheduler_status())["last_sweep"]
+        self.assertEqual(len(sweep["latency_ms"]), len(CHARTS) + 2)
+        self.assertGreaterEqual(sweep["latency_ms"]["chart:coin-0:30"], 90)
+        self.assertIn("chart:coin-7:30", scheduler._last_refresh)
+        print(f"✅ {len(CHARTS)} charts in {elapsed:.2f}s, at most {self.peak} at once; per-target latency recorded")
+
+    async def test_sweeps_never_overlap(self):
+        print("\n🔹 Testing overlapping ticks are skipped")
+        await asyncio.gather(scheduler.refresh_market_data(), scheduler.refresh_market_data())
+        self.assertEqual(scheduler.plan_refresh.await_count, 1)
+        print("✅ Second tick skipped while the first ran")
+
+    async def test_warm_up_before_ready(self):
+        print("\n🔹 Testing the startup warm-up")
+        await scheduler.warm_up()
+        self.assertIn("chart:coin-0:30", scheduler._last_refresh) # Finished before returning
+
+        scheduler._last_refresh.clear()
+        with patch.object(settings, "SCHEDULER_WARMUP_TIMEOUT", 0.05):
+            await scheduler.warm_up() # Gives up waiting, the sweep carries on
+            self.assertNotIn("chart:coin-0:30", scheduler._last_refresh)
+            await asyncio.gather(*scheduler._warmup_tasks)
+        self.assertIn("chart:coin-0:30", scheduler._last_refresh)
+        print("✅ Startup waits for the first sweep, bounded by the warm-up timeout")
+
+if __name__ == "__main__":
+    unittest.main()
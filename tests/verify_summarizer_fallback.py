@@ -0,0 +1,47 @@
+import unittest
+from unittest.mock import patch, MagicMock, AsyncMock
+
+# Adjust path
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GEMINI_API_KEY", "mock-key-for-testing")
+
+from app.core.config import get_settings
+from app.services.summarizer import SummarizerService
+
+settings = get_settings()
+ANALYSIS = {"text_summary": "Bitcoin is UP by 2.00% in 24h.", "key_stats": {"Bitcoin Price": 64000}}
+
+class TestSummarizerMockFallback(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.service = SummarizerService()
+        self.service._model = MagicMock() # No Gemini calls
+        self.sleep = patch("asyncio.sleep", AsyncMock()) # Mock "thinking" time and retry backoff
+        self.sleep.start()
+
+    async def asyncTearDown(self):
+        self.sleep.stop()
+
+    async def test_dev_mode_uses_mock_provider(self):
+        print("\n🔹 Testing DEV_MODE answers from the MockAIProvider")
+        with patch.object(settings, "DEV_MODE", True):
+            response = await self.service.summarize("bitcoin price", ANALYSIS)
+        self.assertEqual(response.asset, "bitcoin")
+        self.assertIn("Mock", response.explanation)
+        self.service._model.generate_content_async.assert_not_called()
+        print("✅ Mock response, Gemini untouched")
+
+    async def test_rate_limited_falls_back_to_mock_provider(self):
+        print("\n🔹 Testing a 429 from Gemini falls back to the MockAIProvider")
+        self.service._model.generate_content_async = AsyncMock(side_effect=Exception("429 Resource has been exhausted"))
+        with patch.object(settings, "DEV_MODE", False):
+            response = await self.service.summarize("bitcoin price", ANALYSIS)
+        self.assertEqual(self.service._model.generate_content_async.await_count, 2) # One retry
+        self.assertEqual(response.asset, "bitcoin")
+        self.assertIn("Mock", response.explanation)
+        print("✅ Tier-1 mock fallback served after the retry")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import unittest
+import asyncio
+
+# Adjust path
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GEMINI_API_KEY", "mock-key-for-testing")
+
+from app.core.config import get_settings
+from app.services.upstream_governor import TokenBucketGovernor, Priority, priority_scope, take_token
+
+async def scripting_redis():
+    """
+    A Redis that runs Lua: FakeRedis when `lupa` is installed, else REDIS_URL.
+    """
+    from fakeredis import FakeAsyncRedis
+    import redis.asyncio as redis
+    for client in (FakeAsyncRedis(decode_responses=True),
+                   redis.from_url(get_settings().REDIS_URL, decode_responses=True, socket_connect_timeout=1)):
+        try:
+            await client.eval("return 1", 0)
+            return client
+        except Exception:
+            await client.aclose()
+    return None
+
+class TestUpstreamGovernor(unittest.IsolatedAsyncioTestCase):
+
+    def make_governor(self, rate_per_minute=600, burst=10):
+        governor = TokenBucketGovernor("test", rate_per_minute=rate_per_minute, burst=burst)
+        governor.use_redis = False # FakeRedis has no Lua support
+        return governor
+
+    async def test_user_requests_win_over_background(self):
+        print("\n🔹 Testing priority reserves")
+        governor = self.make_governor(rate_per_minute=1, burst=10)
+
+        # Background may only drain the bucket down to its 50% reserve
+        with priority_scope(Priority.BACKGROUND):
+            results = [await governor.acquire() for _ in range(10)]
+        self.assertEqual(results.count(True), 5)
+
+        # User traffic can still use the reserved half
+        for _ in range(5):
+            self.assertTrue(await governor.acquire(Priority.USER))
+        print("✅ Background stopped at its reserve; user requests found tokens.")
+
+    async def test_waits_for_refill_and_records_metrics(self):
+        print("\n🔹 Testing refill wait and metrics")
+        governor = self.make_governor(rate_per_minute=1200, burst=1) # 20 tokens/s
+        self.assertTrue(await governor.acquire(Priority.USER))
+        self.assertTrue(await governor.acquire(Priority.USER)) # Waits ~50ms for a refill
+
+        stats = governor.stats()
+        self.assertEqual(stats["backend"], "memory")
+        self.assertEqual(stats["priorities"]["user"]["acquired"], 2)
+        self.assertGreater(stats["priorities"]["user"]["wait_ms_max"], 10)
+        print("✅ Second call waited for a refill and was recorded.")
+
+    async def test_denies_when_wait_exceeds_budget(self):
+        print("\n🔹 Testing denial past the wait budget")
+        governor = self.make_governor(rate_per_minute=1, burst=1)
+        self.assertTrue(await governor.acquire(Priority.USER))
+        self.assertFalse(await governor.acquire(Priority.USER))
+        self.assertEqual(governor.stats()["priorities"]["user"]["denied"], 1)
+        print("✅ Caller was denied instead of sleeping for a minute.")
+
+    def test_take_token_arithmetic(self):
+        print("\n🔹 Testing bucket arithmetic")
+        # 10 tokens/s: 250ms refills 2.5 tokens, capped at capacity
+        self.assertEqual(take_token(1.0, 250, capacity=10, rate=10, floor=0), (True, 2.5, 0))
+        self.assertEqual(take_token(9.0, 5000, capacity=10, rate=10, floor=0), (True, 9.0, 0))
+        # Below the floor: wait until floor + 1 tokens have accumulated
+        self.assertEqual(take_token(4.0, 0, capacity=10, rate=10, floor=5), (False, 4.0, 200))
+        # Clock skew never drains the bucket
+        self.assertEqual(take_token(3.0, -100, capacity=10, rate=10, floor=0), (True, 2.0, 0))
+        print("✅ Refill, cap, floor and wait computed as expected")
+
+    async def test_lua_matches_in_memory_arithmetic(self):
+        print("\n🔹 Testing Redis script parity with take_token")
+        client = await scripting_redis()
+        if client is None:
+            self.skipTest("No Redis with Lua scripting available (install `lupa` or run Redis)")
+
+        governor = TokenBucketGovernor("parity-test", rate_per_minute=600, burst=5)
+        governor.redis, governor.use_redis = client, True
+        await client.delete(governor.key)
+        try:
+            for step, floor in enumerate([0, 0, 0, 0, 0, 0, 2.5, 0, 0]):
+                before = await client.hmget(governor.key, "tokens", "ts")
+                allowed, tokens, wait_ms = await governor._take(floor)
+                after = await client.hmget(governor.key, "tokens", "ts")
+                self.assertTrue(governor.use_redis) # No silent fallback to memory
+
+                elapsed = int(after[1]) - int(before[1]) if before[1] else 0
+                expected = take_token(float(before[0] or governor.capacity), elapsed,
+                                      governor.capacity, governor.rate, floor)
+                self.assertEqual(allowed, expected[0], f"step {step}")
+                self.assertAlmostEqual(tokens, expected[1], places=9, msg=f"step {step}")
+                self.assertEqual(wait_ms, expected[2], f"step {step}")
+                await asyncio.sleep(0.03)
+        finally:
+            await client.delete(governor.key)
+            await client.aclose()
+        print("✅ Script and in-memory bucket agree step by step")
+
+if __name__ == "__main__":
+    unittest.main()